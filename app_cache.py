@@ -0,0 +1,378 @@
+"""
+Application Caches for ATOM SHAALE AMS
+Two-level caches for data every student reads identically:
+- LRUCache (L1): per-process, bounded, TTL-expiring, with hit/miss counters
+  and single-flight loading (when a 500-student exam opens, one request
+  loads it and the others wait for that result)
+- TieredCache: L1 in front of the shared L2 store (shared_cache.py), so a
+  worker's cold L1 is usually filled from Redis instead of MySQL, and an
+  invalidation anywhere is broadcast to every worker's L1
+- Caches: exam snapshots (attempt_exam), the registered course list and the
+  active registration fields; the admin write paths invalidate explicitly
+
+Cached values are shared between requests and must never be mutated.
+Values go to the shared store as JSON, not pickle, so whoever can write to
+Redis cannot run code in the workers: tuples, scalars, datetimes, Decimals
+and bytes are encoded natively, and namedtuples only if their type was
+registered with register_cached_type() (decoded by that tag, never by an
+import path). Entries that don't decode - e.g. left by an older deploy -
+are treated as misses.
+"""
+
+import os
+import json
+import time
+import base64
+import logging
+import datetime
+import threading
+from decimal import Decimal
+from collections import OrderedDict, namedtuple
+
+import shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+class _Inflight:
+    """A load in progress that concurrent misses for the same key wait on"""
+
+    __slots__ = ('event', 'value', 'failed')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+class LRUCache:
+    """Bounded LRU cache whose entries also expire after `ttl` seconds"""
+
+    def __init__(self, name, maxsize=256, ttl=300.0):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()   # key -> (value, expires_at)
+        self._loading = {}           # key -> _Inflight
+        self._lock = threading.Lock()
+        self._epoch = 0              # bumped by every invalidation
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    def get(self, key, loader):
+        """
+        Cached value for `key`, calling loader() on a miss
+
+        A loader result of None (e.g. exam not found) is returned but not cached.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._data[key]
+                self._expirations += 1
+            self._misses += 1
+            inflight = self._loading.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._loading[key] = _Inflight()
+                epoch = self._epoch
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.failed:
+                return loader()
+            return inflight.value
+
+        try:
+            value = loader()
+            inflight.value = value
+        except Exception:
+            inflight.failed = True
+            raise
+        finally:
+            with self._lock:
+                if self._loading.get(key) is inflight:
+                    del self._loading[key]
+                # Skip storing if an invalidation raced with the load: the
+                # value may predate the write that triggered it
+                if not inflight.failed and value is not None and epoch == self._epoch:
+                    self._store_locked(key, value)
+            inflight.event.set()
+        return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store_locked(key, value)
+
+    def _store_locked(self, key, value):
+        self._data[key] = (value, time.monotonic() + self.ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            self._data.pop(key, None)
+            # Later misses start a fresh load instead of waiting for one that may be stale
+            self._loading.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._invalidations += 1
+            self._data.clear()
+            self._loading.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'coalesced_loads': self._coalesced,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+                'invalidations': self._invalidations,
+                'pid': os.getpid(),
+            }
+
+
+# ============================================================================
+# L1 + SHARED L2
+# ============================================================================
+
+L2_TTL = float(os.getenv('CACHE_L2_TTL', 900))
+
+_tiered = {}
+
+_cached_types = {}   # tag -> namedtuple class allowed in shared cache values
+
+_SCALAR_CODECS = {
+    datetime.datetime: ('datetime', datetime.datetime.isoformat, datetime.datetime.fromisoformat),
+    datetime.date: ('date', datetime.date.isoformat, datetime.date.fromisoformat),
+    datetime.timedelta: ('timedelta', lambda td: [td.days, td.seconds, td.microseconds],
+                         lambda parts: datetime.timedelta(*parts)),
+    Decimal: ('decimal', str, Decimal),
+    bytes: ('bytes', lambda b: base64.b64encode(b).decode('ascii'), base64.b64decode),
+}
+_SCALAR_DECODERS = {tag: decode for tag, _, decode in _SCALAR_CODECS.values()}
+
+
+def register_cached_type(cls):
+    """Allow namedtuple `cls` in TieredCache values (usable as a class decorator)"""
+    registered = _cached_types.setdefault(cls.__name__, cls)
+    if registered is not cls:
+        raise ValueError(f"cached type name {cls.__name__!r} is already registered")
+    return cls
+
+
+def _encode(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if type(value) is tuple:
+        return [_encode(item) for item in value]
+    if isinstance(value, tuple) and _cached_types.get(type(value).__name__) is type(value):
+        return {'__type__': type(value).__name__, 'fields': [_encode(item) for item in value]}
+    codec = _SCALAR_CODECS.get(type(value))
+    if codec is not None:
+        tag, encode, _ = codec
+        return {'__type__': tag, 'value': encode(value)}
+    raise TypeError(f"{type(value).__name__} cannot be stored in the shared cache")
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return tuple(_decode(item) for item in value)
+    if isinstance(value, dict):
+        tag = value.get('__type__')
+        if tag in _SCALAR_DECODERS:
+            return _SCALAR_DECODERS[tag](value['value'])
+        if tag in _cached_types:
+            return _cached_types[tag](*(_decode(item) for item in value['fields']))
+        raise ValueError(f"unknown cached type {tag!r}")
+    return value
+
+
+def _dumps(value):
+    """Shared store encoding of a cached value (TypeError for types it can't hold)"""
+    return json.dumps(_encode(value), separators=(',', ':')).encode('utf-8')
+
+
+def _loads(data):
+    """Cached value from _dumps() output (ValueError if `data` isn't one)"""
+    try:
+        return _decode(json.loads(data))
+    except (TypeError, KeyError) as err:
+        raise ValueError(f"malformed cached value: {err}") from err
+
+
+class TieredCache:
+    """Per-process LRUCache backed by the shared store, invalidated via pub/sub"""
+
+    def __init__(self, namespace, maxsize, ttl, l2_ttl=None):
+        self.namespace = namespace
+        self.l1 = LRUCache(namespace, maxsize=maxsize, ttl=ttl)
+        self.l2_ttl = L2_TTL if l2_ttl is None else l2_ttl
+        self._l2_hits = 0
+        self._l2_misses = 0
+        self._l2_errors = 0
+        _tiered[namespace] = self
+
+    def get(self, key, loader):
+        key = str(key)
+        return self.l1.get(key, lambda: self._load_shared(key, loader))
+
+    def _load_shared(self, key, loader):
+        store = shared_cache.get_store()
+        try:
+            version = shared_cache.current_version(store, self.namespace, key)
+            data = store.get(shared_cache.value_key(self.namespace, key, version))
+        except shared_cache.StoreError as err:
+            self._l2_errors += 1
+            logger.warning("Shared cache read failed for %s:%s: %s", self.namespace, key, err)
+            return loader()
+
+        if data is not None:
+            try:
+                value = _loads(data)
+            except ValueError as err:
+                self._l2_errors += 1
+                logger.warning("Unreadable shared cache entry for %s:%s, reloading: %s", self.namespace, key, err)
+            else:
+                self._l2_hits += 1
+                return value
+
+        self._l2_misses += 1
+        value = loader()
+        if value is not None:
+            try:
+                store.set(shared_cache.value_key(self.namespace, key, version), _dumps(value), ex=self.l2_ttl)
+            except TypeError as err:
+                self._l2_errors += 1
+                logger.error("Shared cache cannot hold %s:%s: %s", self.namespace, key, err)
+            except shared_cache.StoreError as err:
+                self._l2_errors += 1
+                logger.warning("Shared cache write failed for %s:%s: %s", self.namespace, key, err)
+        return value
+
+    def invalidate(self, key):
+        """Drop `key` here, in the shared store and (via pub/sub) in every other process"""
+        key = str(key)
+        self.l1.invalidate(key)
+        try:
+            shared_cache.bump_version(shared_cache.get_store(), self.namespace, key)
+        except shared_cache.StoreError as err:
+            self._l2_errors += 1
+            logger.error("Shared cache invalidation failed for %s:%s: %s", self.namespace, key, err)
+
+    def stats(self):
+        return dict(
+            self.l1.stats(),
+            l2_backend=shared_cache.get_store().name,
+            l2_ttl_seconds=self.l2_ttl,
+            l2_hits=self._l2_hits,
+            l2_misses=self._l2_misses,
+            l2_errors=self._l2_errors,
+        )
+
+
+def _on_invalidation(message):
+    parsed = shared_cache.parse_message(message)
+    if parsed is None:
+        return
+    namespace, key = parsed
+    cache = _tiered.get(namespace)
+    if cache is not None:
+        cache.l1.invalidate(key)
+
+
+def _on_reconnect():
+    for cache in _tiered.values():
+        cache.l1.clear()
+
+
+def start_invalidation_listener():
+    """Subscribe this process to cross-worker invalidations (call once per worker, after fork)"""
+    shared_cache.get_store().listen(shared_cache.CHANNEL, _on_invalidation, on_reconnect=_on_reconnect)
+
+
+# ============================================================================
+# CACHES
+# ============================================================================
+
+# exam: row of exam_statements.ATTEMPT_EXAM; questions: rows of ATTEMPT_QUESTIONS
+ExamSnapshot = register_cached_type(namedtuple('ExamSnapshot', ['exam', 'questions']))
+
+exam_cache = TieredCache(
+    'exam_content',
+    maxsize=int(os.getenv('EXAM_CACHE_SIZE', 256)),
+    ttl=float(os.getenv('EXAM_CACHE_TTL', 300)),
+)
+
+# Pre-rendered attempt_exam.html skeletons (attempt_page.py), one per exam version and template build
+attempt_skeleton_cache = TieredCache(
+    'attempt_skeleton',
+    maxsize=int(os.getenv('EXAM_CACHE_SIZE', 256)),
+    ttl=float(os.getenv('EXAM_CACHE_TTL', 300)),
+)
+
+# Distinct student courses (exam assignment and announcement forms)
+course_list_cache = TieredCache('course_list', maxsize=1, ttl=60)
+
+# Active registration fields (registration form)
+registration_fields_cache = TieredCache('registration_fields', maxsize=1, ttl=60)
+
+
+def get_exam_snapshot(exam_id, loader):
+    """ExamSnapshot for exam_id (loader() returns one, or None if the exam doesn't exist)"""
+    return exam_cache.get(exam_id, loader)
+
+
+def invalidate_exam(exam_id):
+    """Drop a cached exam after any write to it or its questions"""
+    exam_cache.invalidate(exam_id)
+
+
+def get_attempt_skeleton(key, loader):
+    """Skeleton under attempt_page.skeleton_key(); an exam edit changes the key, not the entry"""
+    return attempt_skeleton_cache.get(key, loader)
+
+
+def get_course_list(loader):
+    return course_list_cache.get('registered', loader)
+
+
+def invalidate_course_list():
+    """Call after students are added or removed"""
+    course_list_cache.invalidate('registered')
+
+
+def get_active_registration_fields(loader):
+    return registration_fields_cache.get('active', loader)
+
+
+def invalidate_registration_fields():
+    registration_fields_cache.invalidate('active')
+
+
+def cache_stats():
+    return {namespace: cache.stats() for namespace, cache in _tiered.items()}
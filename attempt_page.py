@@ -0,0 +1,72 @@
+"""
+Pre-rendered Attempt Page for ATOM SHAALE AMS
+attempt_exam.html is the same for every student of an exam; only the
+shuffle, the restored drafts and the submission token differ. The page is
+rendered once per exam version into a skeleton with three markers, cached
+(app_cache.get_attempt_skeleton), and each request only splices in:
+- the request's CSP nonce and CSRF token
+- a small JSON block with the student's data (first question page of
+  their shuffle, drafts, submission token)
+
+The cache key (skeleton_key()) holds the template's file hash and a hash
+of the exam data the page is rendered from, so an exam edit or a template
+change simply selects a new entry. Nothing has to be invalidated, and
+workers of an old and a new deploy running side by side each use their
+own skeletons.
+"""
+
+import os
+import re
+import hashlib
+from collections import namedtuple
+
+from jinja2.utils import htmlsafe_json_dumps
+
+from app_cache import register_cached_type
+
+TEMPLATE_NAME = 'attempt_exam.html'
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', TEMPLATE_NAME)
+
+NONCE_MARK = '__ATTEMPT_NONCE__'
+CSRF_MARK = '__ATTEMPT_CSRF__'
+DATA_MARK = '__ATTEMPT_DATA__'
+_MARKS = re.compile(f'({NONCE_MARK}|{CSRF_MARK}|{DATA_MARK})')
+
+# parts: static HTML at even indices, marker names at odd indices
+AttemptSkeleton = register_cached_type(namedtuple('AttemptSkeleton', ['build', 'parts']))
+
+
+def _template_build():
+    try:
+        with open(TEMPLATE_PATH, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()[:12]
+    except OSError:
+        return 'unknown'
+
+
+TEMPLATE_BUILD = _template_build()
+
+
+def build_skeleton(render):
+    """
+    Render the exam-wide part of the page
+
+    Args:
+        render: callable(**context) rendering TEMPLATE_NAME with the exam's
+            variables plus the marker context passed here
+    """
+    html = render(csp_nonce=lambda: NONCE_MARK, csrf_token=lambda: CSRF_MARK, attempt_data=DATA_MARK)
+    return AttemptSkeleton(TEMPLATE_BUILD, tuple(_MARKS.split(html)))
+
+
+def skeleton_key(exam_id, exam, question_count):
+    """Cache key of an exam's skeleton for this template build and this exam data"""
+    content = hashlib.sha1(repr((tuple(exam), question_count)).encode()).hexdigest()[:12]
+    return f"{exam_id}:{TEMPLATE_BUILD}:{content}"
+
+
+def render_attempt_page(skeleton, nonce, csrf_token, attempt_data):
+    """Full page for one student: the skeleton with this request's values spliced in"""
+    values = {NONCE_MARK: nonce, CSRF_MARK: csrf_token, DATA_MARK: str(htmlsafe_json_dumps(attempt_data))}
+    parts = skeleton.parts
+    return ''.join(values[part] if i % 2 else part for i, part in enumerate(parts))
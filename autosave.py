@@ -0,0 +1,230 @@
+"""
+Answer Autosave for ATOM SHAALE AMS
+Students' answers are sent as deltas while they work and persisted as
+drafts, so a dropped connection or a reload loses at most a few seconds
+and a resumed attempt is restored from the database:
+- DraftBuffer.add(): coalesce deltas in memory per attempt (only the latest
+  answer per question is kept; no database work on the request path)
+- A background task flushes everything pending every AUTOSAVE_FLUSH_INTERVAL
+  seconds with one multi-row upsert per batch into exam_drafts
+- load_drafts(): one indexed read of an attempt's drafts
+
+Each worker buffers its own requests, so deltas held by another worker can
+reach exam_drafts after the exam was submitted. The submitted form is
+therefore authoritative: the exam page posts every answer it knows of
+(drafts of unrendered pages included), grading falls back to a draft only
+for a question the form lacks, and drafts written after the submission are
+ignored. flush_attempt() forces this worker's pending answers out before a
+resume reads them back or a submission is queued. Rows the database
+rejects (e.g. the attempt was deleted, an answer too long for the column)
+are isolated and dropped so they can't block the rest of the buffer;
+connection errors put everything back for the next flush.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+
+import mysql.connector
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_FLUSH_INTERVAL = float(os.getenv('AUTOSAVE_FLUSH_INTERVAL', 3))
+AUTOSAVE_BATCH_SIZE = int(os.getenv('AUTOSAVE_BATCH_SIZE', 500))
+MAX_ANSWER_LENGTH = 20000   # characters kept per draft answer
+
+_ROW_PLACEHOLDER = '(%s, %s, %s)'
+
+# Errors caused by the rows themselves: retrying the same rows can't succeed
+PERMANENT_ERRORS = (mysql.connector.IntegrityError, mysql.connector.DataError, mysql.connector.ProgrammingError)
+
+
+def _upsert_drafts(conn, rows):
+    """Write (attempt_id, question_id, answer) rows and commit"""
+    cursor = conn.cursor()
+    try:
+        for start in range(0, len(rows), AUTOSAVE_BATCH_SIZE):
+            batch = rows[start:start + AUTOSAVE_BATCH_SIZE]
+            cursor.execute(
+                "INSERT INTO exam_drafts (attempt_id, question_id, answer) VALUES "
+                + ', '.join([_ROW_PLACEHOLDER] * len(batch))
+                + " ON DUPLICATE KEY UPDATE answer = VALUES(answer)",
+                [value for row in batch for value in row])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _split(rows):
+    """Rows grouped per attempt, or one row per group within a single attempt"""
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[0], []).append(row)
+    if len(groups) > 1:
+        return list(groups.values())
+    return [[row] for row in rows]
+
+
+def load_drafts(cursor, attempt_id):
+    """{question_id: answer} of an attempt's persisted drafts"""
+    cursor.execute("SELECT question_id, answer FROM exam_drafts WHERE attempt_id = %s", (attempt_id,))
+    return {question_id: answer for question_id, answer in cursor.fetchall()}
+
+
+class DraftBuffer:
+    """Per-process coalescing buffer of autosaved answers"""
+
+    def __init__(self, interval=AUTOSAVE_FLUSH_INTERVAL):
+        self.interval = interval
+        self._pending = {}           # attempt_id -> {question_id: answer}
+        self._lock = threading.Lock()
+        self._get_connection = None
+        self._running = False
+        self._deltas = 0
+        self._coalesced = 0
+        self._rows_written = 0
+        self._flushes = 0
+        self._errors = 0
+        self._dropped = 0
+
+    def add(self, attempt_id, answers, question_ids=None):
+        """
+        Queue {question_id: answer} deltas; returns how many were accepted
+
+        Args:
+            question_ids: the attempt's exam's question ids; answers to any
+                other id are ignored
+        """
+        accepted = 0
+        with self._lock:
+            drafts = self._pending.setdefault(attempt_id, {})
+            for question_id, answer in answers.items():
+                try:
+                    question_id = int(question_id)
+                except (TypeError, ValueError):
+                    continue
+                if question_ids is not None and question_id not in question_ids:
+                    continue
+                if answer is not None:
+                    answer = str(answer)[:MAX_ANSWER_LENGTH]
+                if question_id in drafts:
+                    self._coalesced += 1
+                drafts[question_id] = answer
+                accepted += 1
+            if not drafts:
+                del self._pending[attempt_id]
+            self._deltas += accepted
+        return accepted
+
+    def _take(self, attempt_id=None):
+        with self._lock:
+            if attempt_id is None:
+                pending, self._pending = self._pending, {}
+            else:
+                drafts = self._pending.pop(attempt_id, None)
+                pending = {attempt_id: drafts} if drafts else {}
+        return [(attempt_id, question_id, answer)
+                for attempt_id, drafts in pending.items()
+                for question_id, answer in drafts.items()]
+
+    def _restore(self, rows):
+        # Put rows back after a failed write unless a newer answer arrived meanwhile
+        with self._lock:
+            for attempt_id, question_id, answer in rows:
+                self._pending.setdefault(attempt_id, {}).setdefault(question_id, answer)
+
+    def _write(self, conn, rows, unresolved):
+        """
+        Upsert rows, isolating the ones the database rejects
+
+        A rejected batch is retried attempt by attempt, a rejected attempt
+        row by row, and a rejected single row is dropped. Rows leave
+        `unresolved` once written or dropped.
+        """
+        try:
+            _upsert_drafts(conn, rows)
+        except PERMANENT_ERRORS as err:
+            if len(rows) > 1:
+                return sum(self._write(conn, group, unresolved) for group in _split(rows))
+            attempt_id, question_id, _ = rows[0]
+            unresolved.discard(rows[0])
+            self._dropped += 1
+            logger.error("Dropped autosaved draft (attempt %s, question %s): %s", attempt_id, question_id, err)
+            return 0
+        unresolved.difference_update(rows)
+        self._rows_written += len(rows)
+        return len(rows)
+
+    def flush(self, attempt_id=None, conn=None):
+        """Write pending drafts (all, or one attempt's); returns rows written"""
+        rows = self._take(attempt_id)
+        if not rows:
+            return 0
+        unresolved = set(rows)
+        own_conn = conn is None
+        try:
+            if own_conn:
+                conn = self._get_connection()
+            written = self._write(conn, rows, unresolved)
+        except Exception as err:
+            # Connection-level failure: keep what wasn't written for the next flush
+            self._errors += 1
+            self._restore(unresolved)
+            logger.error("Autosave flush of %d draft(s) failed: %s", len(unresolved), err)
+            return 0
+        finally:
+            if own_conn and conn is not None:
+                conn.close()
+        self._flushes += 1
+        return written
+
+    def flush_attempt(self, attempt_id, conn):
+        """Persist one attempt's pending drafts on the caller's connection"""
+        return self.flush(attempt_id, conn)
+
+    def discard(self, attempt_id):
+        with self._lock:
+            self._pending.pop(attempt_id, None)
+
+    def start(self, get_connection, spawn=None):
+        """Start the periodic flusher (once per worker, after fork)"""
+        self._get_connection = get_connection
+        if self._running:
+            return
+        self._running = True
+
+        def run():
+            while self._running:
+                time.sleep(self.interval)
+                self.flush()
+
+        if spawn is not None:
+            spawn(run)
+        else:
+            threading.Thread(target=run, name='autosave-flusher', daemon=True).start()
+        atexit.register(self.flush)
+
+    def stats(self):
+        with self._lock:
+            pending = sum(len(drafts) for drafts in self._pending.values())
+            attempts = len(self._pending)
+        return {
+            'pending_answers': pending,
+            'pending_attempts': attempts,
+            'deltas_received': self._deltas,
+            'coalesced': self._coalesced,
+            'rows_written': self._rows_written,
+            'flushes': self._flushes,
+            'errors': self._errors,
+            'dropped': self._dropped,
+            'flush_interval_seconds': self.interval,
+            'pid': os.getpid(),
+        }
+
+
+draft_buffer = DraftBuffer()
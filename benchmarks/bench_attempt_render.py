@@ -0,0 +1,118 @@
+"""
+Attempt Page Render Benchmark for ATOM SHAALE AMS
+=================================================
+Times producing the attempt_exam page for one student, the old way (a full
+Jinja render of attempt_exam.html per request) against the cached
+per-exam skeleton with the student's data spliced in (attempt_page.py).
+Each student's data (shuffled first question page, token) is built before
+timing: that cost is the same either way, so only the page render is timed.
+
+Uses a synthetic exam (no database needed); importing `app` may log pool
+warnings when MySQL is unreachable, which does not affect the measurement.
+
+Usage:
+    python benchmarks/bench_attempt_render.py
+    python benchmarks/bench_attempt_render.py --renders 500 --questions 10 50 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from flask import render_template
+from jinja2.utils import htmlsafe_json_dumps
+
+import app as ams
+from attempt_page import TEMPLATE_NAME, build_skeleton, render_attempt_page
+from question_pages import question_page
+from shuffle import attempt_seed, shuffle_exam, shuffled_questions
+
+TYPES = ('mcq', 'mcq', 'mcq', 'true_false', 'image_mcq', 'descriptive')
+
+
+def make_exam(question_count):
+    """ATTEMPT_EXAM row and ATTEMPT_QUESTIONS rows of a mixed exam"""
+    exam = (1, 'Benchmark Exam', 'Physics', 60, None, None, None)
+    questions = []
+    for question_id in range(1, question_count + 1):
+        question_type = TYPES[question_id % len(TYPES)]
+        media = 'static/uploads/question_images/figure.png' if question_type == 'image_mcq' else None
+        questions.append((question_id, 1, f'Question {question_id}: which statement about the system is correct?',
+                          question_type, 'First option text', 'Second option text', 'Third option text',
+                          'Fourth option text', 'A' if question_type != 'true_false' else 'True',
+                          'Because.', media))
+    return exam, questions
+
+
+def student_data(questions, student_id):
+    layout = shuffle_exam(questions, attempt_seed(student_id, 1, student_id, 'benchmark-secret'))
+    first_page = question_page(shuffled_questions(questions, layout), 1, ams.static_url)
+    return {'first_page': first_page, 'drafts': {}, 'submission_token': f'{student_id:032x}'}
+
+
+def render_full(exam, questions, data):
+    return render_template(TEMPLATE_NAME, exam=exam, question_count=len(questions),
+                           attempt_data=htmlsafe_json_dumps(data))
+
+
+def render_skeleton(skeleton, data):
+    return render_attempt_page(skeleton, ams.app.jinja_env.globals['csp_nonce'](),
+                               ams.app.jinja_env.globals['csrf_token'](), data)
+
+
+def bench(render, students):
+    """Per-render latencies (ms), one render per student's data"""
+    latencies = []
+    for data in students:
+        started = time.perf_counter()
+        render(data)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full Jinja renders of the attempt page with the cached skeleton")
+    parser.add_argument('--questions', type=int, nargs='+', default=[10, 50, 200], help="Exam sizes (default 10 50 200)")
+    parser.add_argument('--renders', type=int, default=200, help="Students rendered per size and mode (default 200)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"📊 ATTEMPT PAGE RENDER: FULL JINJA vs CACHED SKELETON - {args.renders} students per size")
+    print("=" * 80)
+    print(f"{'Questions':<11}{'Mode':<11}{'KB':>8}{'p50 (ms)':>11}{'p95 (ms)':>11}{'max (ms)':>11}{'speedup':>10}")
+
+    with ams.app.test_request_context('/student/exam/1'):
+        for question_count in args.questions:
+            exam, questions = make_exam(question_count)
+            started = time.perf_counter()
+            skeleton = build_skeleton(lambda **marks: render_template(TEMPLATE_NAME, exam=exam,
+                                                                      question_count=question_count, **marks))
+            build_ms = (time.perf_counter() - started) * 1000
+
+            students = [student_data(questions, student_id) for student_id in range(1, args.renders + 1)]
+            p50s = {}
+            for mode, render in (('full', lambda data: render_full(exam, questions, data)),
+                                 ('skeleton', lambda data: render_skeleton(skeleton, data))):
+                size_kb = len(render(students[0]).encode()) / 1024
+                bench(render, students[:10])   # warm-up
+                latencies = bench(render, students)
+                p50s[mode] = statistics.median(latencies)
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                speedup = f"{p50s['full'] / p50s[mode]:.1f}x" if mode == 'skeleton' else ''
+                print(f"{question_count:<11}{mode:<11}{size_kb:>8.1f}{p50s[mode]:>11.3f}{p95:>11.3f}"
+                      f"{latencies[-1]:>11.3f}{speedup:>10}")
+            print(f"{'':<11}(skeleton built once in {build_ms:.2f} ms)")
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
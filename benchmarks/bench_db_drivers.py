@@ -0,0 +1,103 @@
+"""
+DB Driver Fetch Benchmark for ATOM SHAALE AMS
+==============================================
+Measures fetch throughput of every installed driver backend (db_drivers.py)
+on a large generated result set shaped like the export/report queries
+(int id, name, email, course, score, timestamp).
+
+Requires a reachable MySQL 8 server configured through the usual
+DATABASE_URL / DB_* environment variables. No tables are created.
+
+Usage:
+    python benchmarks/bench_db_drivers.py
+    python benchmarks/bench_db_drivers.py --rows 100000 --repeat 5 --drivers mysql-pure mysql-c
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from db_drivers import DRIVERS, available_drivers
+from db_pool import load_db_config
+
+load_dotenv()
+
+ROWS_QUERY = """
+    WITH RECURSIVE seq (n) AS (
+        SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s
+    )
+    SELECT n AS student_id,
+           CONCAT('Student ', n) AS name,
+           CONCAT('student', n, '@example.com') AS email,
+           ELT(1 + n %% 4, 'Computer Science', 'Mathematics', 'Physics', 'Chemistry') AS course,
+           CAST((n * 37) %% 10000 / 100 AS DECIMAL(5,2)) AS score,
+           NOW() - INTERVAL n SECOND AS recorded_at
+    FROM seq
+"""
+
+
+def bench_driver(driver, config, rows, repeat, dictionary):
+    """Return list of fetch timings (seconds) for one driver"""
+    conn = driver.connect(config)
+    cursor = conn.cursor()
+    cursor.execute("SET SESSION cte_max_recursion_depth = %s", (rows + 1,))
+    cursor.close()
+
+    timings = []
+    try:
+        for _ in range(repeat):
+            cursor = conn.cursor(dictionary=dictionary)
+            started = time.perf_counter()
+            cursor.execute(ROWS_QUERY, (rows,))
+            result = cursor.fetchall()
+            timings.append(time.perf_counter() - started)
+            cursor.close()
+            if len(result) != rows:
+                raise RuntimeError(f"{driver.name}: expected {rows} rows, got {len(result)}")
+        conn.rollback()
+    finally:
+        conn.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch throughput per DB driver")
+    parser.add_argument('--rows', type=int, default=100000, help="Rows per result set (default 100000)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per driver (default 5)")
+    parser.add_argument('--drivers', nargs='*', default=None, help="Driver names (default: all installed)")
+    parser.add_argument('--dictionary', action='store_true', help="Use dictionary cursors")
+    args = parser.parse_args()
+
+    config = load_db_config()
+    names = args.drivers or available_drivers()
+
+    print("=" * 80)
+    print(f"📊 DB DRIVER FETCH BENCHMARK - {args.rows:,} rows x {args.repeat} runs"
+          f" ({'dict' if args.dictionary else 'tuple'} cursor)")
+    print("=" * 80)
+    print(f"{'Driver':<14}{'median (s)':>12}{'best (s)':>12}{'rows/s (median)':>20}")
+
+    for name in names:
+        driver = DRIVERS.get(name)
+        if driver is None or not driver.available():
+            print(f"{name:<14}{'not installed':>12}")
+            continue
+        try:
+            timings = bench_driver(driver, config, args.rows, args.repeat, args.dictionary)
+        except Exception as e:
+            print(f"{name:<14}  ❌ {e}")
+            continue
+        median = statistics.median(timings)
+        print(f"{name:<14}{median:>12.3f}{min(timings):>12.3f}{args.rows / median:>20,.0f}")
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
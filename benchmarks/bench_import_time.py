@@ -0,0 +1,108 @@
+"""
+Import Time & Memory Benchmark for ATOM SHAALE AMS
+===================================================
+Imports each target module in a fresh interpreter and reports wall-clock
+import time and peak RSS, so worker startup cost can be tracked over time.
+With --importtime the slowest modules from `python -X importtime` are listed
+for the app import as well.
+
+Importing `app` only builds the application: the DB pool and background
+tasks are opened per worker by the gunicorn hooks, so no database is needed.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 5 --importtime --top 15
+    python benchmarks/bench_import_time.py --modules app cv2 numpy openpyxl
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['app', 'proctoring', 'cv2', 'numpy', 'openpyxl', 'flask_socketio']
+
+CHILD_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+heavy = [name for name in ('cv2', 'numpy', 'openpyxl') if name in sys.modules]
+print('@@BENCH@@' + json.dumps({{
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+    'heavy_loaded': heavy,
+}}))
+"""
+
+
+def measure(module):
+    """Import `module` in a fresh interpreter; return its measurement dict"""
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_SCRIPT.format(module=module)],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith('@@BENCH@@'):
+            return json.loads(line[len('@@BENCH@@'):])
+    raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed')
+
+
+def importtime_top(module, top):
+    """Slowest modules (cumulative µs) from python -X importtime"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time:   self_us | cumulative_us | name"
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        entries.append((int(cumulative_us), int(self_us), name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark module import time and peak RSS")
+    parser.add_argument('--modules', nargs='*', default=DEFAULT_MODULES, help="Modules to import")
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per module (default 3)")
+    parser.add_argument('--importtime', action='store_true', help="Show slowest imports via -X importtime")
+    parser.add_argument('--top', type=int, default=10, help="Entries shown with --importtime (default 10)")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"📊 IMPORT TIME BENCHMARK - {args.repeat} fresh interpreter(s) per module")
+    print("=" * 80)
+    print(f"{'Module':<18}{'median (ms)':>12}{'best (ms)':>12}{'peak RSS (MB)':>16}{'modules':>10}  heavy deps loaded")
+
+    for module in args.modules:
+        try:
+            runs = [measure(module) for _ in range(args.repeat)]
+        except Exception as e:
+            print(f"{module:<18}  ❌ {e}")
+            continue
+        timings = [run['seconds'] * 1000 for run in runs]
+        rss_mb = max(run['max_rss_kb'] for run in runs) / 1024
+        heavy = ', '.join(runs[-1]['heavy_loaded']) or '-'
+        print(f"{module:<18}{statistics.median(timings):>12.1f}{min(timings):>12.1f}{rss_mb:>16.1f}"
+              f"{runs[-1]['modules']:>10}  {heavy}")
+
+    if args.importtime:
+        target = args.modules[0]
+        print(f"\nSlowest imports under `import {target}` (-X importtime):")
+        print(f"{'cumulative (ms)':>16}{'self (ms)':>12}  module")
+        for cumulative_us, self_us, name in importtime_top(target, args.top):
+            print(f"{cumulative_us / 1000:>16.1f}{self_us / 1000:>12.1f}  {name}")
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
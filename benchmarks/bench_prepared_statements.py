@@ -0,0 +1,145 @@
+"""
+Prepared vs Text Protocol Benchmark for ATOM SHAALE AMS
+=======================================================
+Replays the exam-start statement sequence (duplicate-attempt check, exam
+fetch, question fetch - see exam_statements.py) from many concurrent
+"students", once with plain text-protocol cursors and once with the
+per-connection prepared statement cache (db_prepared.py).
+
+Requires a reachable MySQL 8 server configured through the usual
+DATABASE_URL / DB_* variables and at least one exam with questions.
+Nothing is written.
+
+Usage:
+    python benchmarks/bench_prepared_statements.py
+    python benchmarks/bench_prepared_statements.py --concurrency 100 --starts 20 --exam-id 3
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from db_drivers import get_driver
+from db_pool import ConnectionPool, load_db_config
+from db_prepared import query_prepared, statement_sql
+from exam_statements import EXAM_START_SEQUENCE, ATTEMPT_DUPLICATE_CHECK
+
+load_dotenv()
+
+
+def exam_start_params(name, student_id, exam_id):
+    return (student_id, exam_id) * 2 if name == ATTEMPT_DUPLICATE_CHECK else (exam_id,)
+
+
+def run_text(conn, student_id, exam_id):
+    cursor = conn.cursor()
+    try:
+        for name in EXAM_START_SEQUENCE:
+            cursor.execute(statement_sql(name), exam_start_params(name, student_id, exam_id))
+            cursor.fetchall()
+    finally:
+        cursor.close()
+
+
+def run_prepared(conn, student_id, exam_id):
+    for name in EXAM_START_SEQUENCE:
+        query_prepared(conn, name, exam_start_params(name, student_id, exam_id))
+
+
+def bench_mode(mode, pool, concurrency, starts, exam_id):
+    """Return (wall seconds, list of per-start latencies) for one mode"""
+    runner = run_prepared if mode == 'prepared' else run_text
+    latencies = []
+    latencies_lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+    errors = []
+
+    def student(student_id):
+        local = []
+        barrier.wait()
+        try:
+            for _ in range(starts):
+                started = time.perf_counter()
+                conn = pool.get_connection()
+                try:
+                    runner(conn, student_id, exam_id)
+                    conn.rollback()
+                finally:
+                    conn.close()
+                local.append(time.perf_counter() - started)
+        except Exception as e:
+            errors.append(e)
+        with latencies_lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=student, args=(1000000 + i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    if errors:
+        raise errors[0]
+    return wall, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare text vs prepared execution of the exam-start queries")
+    parser.add_argument('--concurrency', type=int, default=50, help="Concurrent students (default 50)")
+    parser.add_argument('--starts', type=int, default=10, help="Exam starts per student (default 10)")
+    parser.add_argument('--pool-size', type=int, default=32, help="Pool size, like DB_POOL_SIZE (default 32)")
+    parser.add_argument('--exam-id', type=int, default=None, help="Exam to load (default: exam with most questions)")
+    parser.add_argument('--driver', default=None, help="DB driver name (default: DB_DRIVER)")
+    args = parser.parse_args()
+
+    driver = get_driver(args.driver)
+    config = load_db_config()
+
+    exam_id = args.exam_id
+    if exam_id is None:
+        conn = driver.connect(config)
+        cursor = conn.cursor()
+        cursor.execute("SELECT exam_id FROM questions GROUP BY exam_id ORDER BY COUNT(*) DESC LIMIT 1")
+        row = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        if not row:
+            print("❌ No exam with questions found - create one or pass --exam-id")
+            sys.exit(1)
+        exam_id = row[0]
+
+    print("=" * 80)
+    print(f"📊 EXAM-START QUERIES: TEXT vs PREPARED - exam {exam_id}, {args.concurrency} students x "
+          f"{args.starts} starts, pool {args.pool_size} ({driver.name})")
+    print("=" * 80)
+    print(f"{'Mode':<10}{'starts/s':>12}{'p50 (ms)':>12}{'p95 (ms)':>12}{'max (ms)':>12}")
+
+    for mode in ('text', 'prepared'):
+        pool = ConnectionPool(f'bench-{mode}', config, size=args.pool_size, prewarm=args.pool_size,
+                              borrow_timeout=60, driver=driver)
+        pool.prewarm()
+        try:
+            # One untimed round so both modes start with warm connections (and prepared handles)
+            bench_mode(mode, pool, min(args.concurrency, args.pool_size), 1, exam_id)
+            wall, latencies = bench_mode(mode, pool, args.concurrency, args.starts, exam_id)
+        finally:
+            pool.close()
+        latencies_ms = sorted(latency * 1000 for latency in latencies)
+        p95 = latencies_ms[int(len(latencies_ms) * 0.95) - 1] if latencies_ms else 0
+        print(f"{mode:<10}{len(latencies) / wall:>12.1f}{statistics.median(latencies_ms):>12.2f}"
+              f"{p95:>12.2f}{latencies_ms[-1]:>12.2f}")
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Proctoring Frame Transport Benchmark for ATOM SHAALE AMS
+========================================================
+Compares the old proctor_frame payload (640x480 JPEG at quality 0.85, sent
+as a base64 data URL in a text Socket.IO packet) with binary attachments,
+at the old capture settings and at the settings the server negotiates
+(proctoring.frame_settings()). Per frame it reports:
+- wire bytes of the encoded Socket.IO packet(s)
+- receive CPU: turning the payload into a buffer for cv2.imdecode
+  (split + base64 decode for data URLs; a zero-copy view for binary)
+- analysis CPU: analyze_frame() (JPEG decode + face detection), as run in
+  the proctoring pool
+
+Frames are synthetic by default (smoothed noise with webcam-like JPEG
+sizes); pass --image with a real webcam snapshot for representative
+detection times. Browser-side encoding is not measured.
+
+Usage:
+    python benchmarks/bench_proctor_frames.py
+    python benchmarks/bench_proctor_frames.py --frames 200 --image snapshot.jpg
+"""
+
+import os
+import sys
+import time
+import base64
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import cv2
+import numpy as np
+from socketio import packet
+
+from proctoring import analyze_frame, frame_payload, frame_settings
+
+
+def source_image(path):
+    """BGR 640x480 source frame: the given snapshot, or smoothed noise"""
+    if path:
+        img = cv2.imread(path, cv2.IMREAD_COLOR)
+        if img is None:
+            sys.exit(f"Cannot read image: {path}")
+        return cv2.resize(img, (640, 480), interpolation=cv2.INTER_AREA)
+    rng = np.random.default_rng(7)
+    noise = rng.integers(0, 256, (480, 640, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(noise, (0, 0), 3)
+
+
+def encode_jpeg(img, width, height, quality):
+    if (width, height) != (img.shape[1], img.shape[0]):
+        img = cv2.resize(img, (width, height), interpolation=cv2.INTER_AREA)
+    ok, jpeg = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, int(quality * 100)])
+    return jpeg.tobytes()
+
+
+def wire_bytes(frame):
+    """Bytes of the proctor_frame event as sent over the websocket"""
+    encoded = packet.Packet(packet.EVENT, data=['proctor_frame', {'frame': frame, 'exam_id': 1}],
+                            namespace='/').encode()
+    parts = encoded if isinstance(encoded, list) else [encoded]
+    return sum(len(part.encode() if isinstance(part, str) else part) for part in parts)
+
+
+def receive_legacy(frame):
+    # What handle_proctor_frame() did before binary frames
+    return np.frombuffer(base64.b64decode(frame.split(',')[1]), np.uint8)
+
+
+def receive_binary(frame):
+    return np.frombuffer(frame_payload(frame), np.uint8)
+
+
+def cpu_per_frame(work, frame, count):
+    """Mean process CPU (ms) of work(frame)"""
+    for _ in range(min(5, count)):
+        work(frame)   # warm-up (cascades load on the first analysis)
+    started = time.process_time()
+    for _ in range(count):
+        work(frame)
+    return (time.process_time() - started) * 1000 / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare base64 data URL and binary proctoring frames")
+    parser.add_argument('--frames', type=int, default=100, help="Frames analyzed per mode (default 100)")
+    parser.add_argument('--image', help="Webcam snapshot to use instead of a synthetic frame")
+    args = parser.parse_args()
+
+    img = source_image(args.image)
+    negotiated = frame_settings(640, 480)
+    modes = [
+        ('data URL', 640, 480, 0.85),
+        ('binary', 640, 480, 0.85),
+        ('binary', negotiated['width'], negotiated['height'], negotiated['quality']),
+    ]
+
+    print("=" * 80)
+    print(f"📊 PROCTOR FRAME TRANSPORT - {args.frames} frames per mode")
+    print("=" * 80)
+    print(f"{'Mode':<10}{'Size':<10}{'Quality':>8}{'JPEG KB':>9}{'Wire KB':>9}{'vs old':>8}"
+          f"{'Receive (us)':>14}{'Analyze (ms)':>14}")
+
+    baseline = None
+    for name, width, height, quality in modes:
+        jpeg = encode_jpeg(img, width, height, quality)
+        if name == 'data URL':
+            frame = 'data:image/jpeg;base64,' + base64.b64encode(jpeg).decode()
+            receive = receive_legacy
+        else:
+            frame = jpeg
+            receive = receive_binary
+        wire = wire_bytes(frame)
+        baseline = baseline or wire
+        receive_us = cpu_per_frame(receive, frame, args.frames * 20) * 1000
+        analyze_ms = cpu_per_frame(analyze_frame, frame, args.frames)
+        print(f"{name:<10}{f'{width}x{height}':<10}{quality:>8.2f}{len(jpeg) / 1024:>9.1f}{wire / 1024:>9.1f}"
+              f"{wire / baseline:>7.0%} {receive_us:>13.1f}{analyze_ms:>14.2f}")
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
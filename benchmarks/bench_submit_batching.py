@@ -0,0 +1,114 @@
+"""
+Submit Response Persistence Benchmark for ATOM SHAALE AMS
+=========================================================
+Times the student_responses writes of one exam submission, the old way
+(one INSERT per question) against the batched multi-row INSERT used by
+submit_exam() (exam_responses.py), at 10, 50 and 200 questions.
+
+Rows go into a TEMPORARY copy of student_responses inside a transaction
+that is rolled back, so nothing is persisted. Requires a reachable MySQL
+server (DATABASE_URL / DB_* variables) and the CREATE TEMPORARY TABLES
+privilege.
+
+Usage:
+    python benchmarks/bench_submit_batching.py
+    python benchmarks/bench_submit_batching.py --submits 200 --questions 10 50 200 500
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from db_drivers import get_driver
+from db_pool import load_db_config
+from exam_responses import insert_responses, RESPONSE_COLUMNS
+
+load_dotenv()
+
+TABLE = 'bench_student_responses'
+
+
+def make_responses(question_count):
+    """A submission mixing answered/unanswered MCQs and descriptive answers"""
+    rows = []
+    for question_id in range(1, question_count + 1):
+        if question_id % 10 == 0:
+            rows.append((1, 1, question_id, 'A descriptive answer of reasonable length.', None, 'descriptive'))
+        elif question_id % 7 == 0:
+            rows.append((1, 1, question_id, None, 0, 'mcq'))
+        else:
+            rows.append((1, 1, question_id, 'ABCD'[question_id % 4], question_id % 2, 'mcq'))
+    return rows
+
+
+def insert_per_row(cursor, responses):
+    sql = (f"INSERT INTO {TABLE} ({', '.join(RESPONSE_COLUMNS)}, submitted_at) "
+           f"VALUES (%s, %s, %s, %s, %s, %s, NOW())")
+    for row in responses:
+        cursor.execute(sql, row)
+    return len(responses)
+
+
+def bench(conn, writer, responses, submits):
+    """Per-submission latencies (ms) for writing `responses` `submits` times"""
+    cursor = conn.cursor()
+    latencies = []
+    statements = 0
+    try:
+        for _ in range(submits):
+            conn.start_transaction()
+            started = time.perf_counter()
+            statements = writer(cursor, responses)
+            latencies.append((time.perf_counter() - started) * 1000)
+            conn.rollback()
+    finally:
+        cursor.close()
+    return latencies, statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-row vs batched student_responses inserts")
+    parser.add_argument('--questions', type=int, nargs='+', default=[10, 50, 200], help="Exam sizes (default 10 50 200)")
+    parser.add_argument('--submits', type=int, default=100, help="Submissions timed per size and mode (default 100)")
+    parser.add_argument('--driver', default=None, help="DB driver name (default: DB_DRIVER)")
+    args = parser.parse_args()
+
+    driver = get_driver(args.driver)
+    conn = driver.connect(load_db_config())
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TEMPORARY TABLE {TABLE} LIKE student_responses")
+    cursor.close()
+
+    print("=" * 80)
+    print(f"📊 SUBMIT RESPONSE WRITES: PER-ROW vs BATCHED - {args.submits} submissions per size ({driver.name})")
+    print("=" * 80)
+    print(f"{'Questions':<11}{'Mode':<10}{'stmts':>7}{'p50 (ms)':>11}{'p95 (ms)':>11}{'max (ms)':>11}{'speedup':>10}")
+
+    try:
+        for question_count in args.questions:
+            responses = make_responses(question_count)
+            p50s = {}
+            for mode, writer in (('per-row', insert_per_row),
+                                 ('batched', lambda cursor, rows: insert_responses(cursor, rows, table=TABLE))):
+                bench(conn, writer, responses, min(5, args.submits))   # warm-up
+                latencies, statements = bench(conn, writer, responses, args.submits)
+                latencies.sort()
+                p50s[mode] = statistics.median(latencies)
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                speedup = f"{p50s['per-row'] / p50s[mode]:.1f}x" if mode == 'batched' else ''
+                print(f"{question_count:<11}{mode:<10}{statements:>7}{p50s[mode]:>11.2f}{p95:>11.2f}"
+                      f"{latencies[-1]:>11.2f}{speedup:>10}")
+    finally:
+        conn.close()
+
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
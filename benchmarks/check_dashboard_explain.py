@@ -0,0 +1,94 @@
+"""
+Student Dashboard Query Plan Check for ATOM SHAALE AMS
+=======================================================
+Runs EXPLAIN on the student dashboard exam queries (exam_courses.py) and
+fails when MySQL plans a full table scan (type=ALL) on exam or exam_courses.
+
+Run it against a database with production-sized data: on a near-empty
+exam table the optimizer may legitimately prefer a scan.
+
+Usage:
+    python benchmarks/check_dashboard_explain.py
+    python benchmarks/check_dashboard_explain.py --course "Computer Science"
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+from db_drivers import get_driver
+from db_pool import load_db_config
+from exam_courses import STUDENT_EXAMS_QUERY, ALL_COURSES_EXAMS_QUERY
+
+load_dotenv()
+
+CHECKED_TABLES = {'e', 'ec', 'exam', 'exam_courses'}
+
+
+def explain(cursor, query, params=None):
+    cursor.execute("EXPLAIN " + query, params)
+    return cursor.fetchall()
+
+
+def full_scans(plan):
+    """Plan rows scanning a checked table without an index"""
+    return [row for row in plan if row.get('table') in CHECKED_TABLES and row.get('type') == 'ALL']
+
+
+def print_plan(title, plan):
+    print(f"\n{title}")
+    print(f"{'id':<4}{'select_type':<14}{'table':<16}{'type':<8}{'key':<26}{'rows':>8}  Extra")
+    for row in plan:
+        print(f"{str(row.get('id') or ''):<4}{str(row.get('select_type') or ''):<14}{str(row.get('table') or ''):<16}"
+              f"{str(row.get('type') or ''):<8}{str(row.get('key') or ''):<26}{str(row.get('rows') or ''):>8}  {row.get('Extra') or ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the student dashboard exam queries")
+    parser.add_argument('--course', default=None, help="Course to plan for (default: most common student course)")
+    args = parser.parse_args()
+
+    conn = get_driver().connect(load_db_config())
+    cursor = conn.cursor(dictionary=True)
+    try:
+        course = args.course
+        if course is None:
+            cursor.execute("""
+                SELECT course FROM students WHERE course IS NOT NULL AND course != ''
+                GROUP BY course ORDER BY COUNT(*) DESC LIMIT 1
+            """)
+            row = cursor.fetchone()
+            course = row['course'] if row else 'Computer Science'
+
+        print("=" * 80)
+        print(f"🔍 STUDENT DASHBOARD QUERY PLANS (course: {course})")
+        print("=" * 80)
+
+        failures = 0
+        for title, query, params in (
+            ("Exams for a course", STUDENT_EXAMS_QUERY, (course,)),
+            ("Exams for all courses", ALL_COURSES_EXAMS_QUERY, None),
+        ):
+            plan = explain(cursor, query, params)
+            print_plan(title, plan)
+            for row in full_scans(plan):
+                failures += 1
+                print(f"   ❌ full table scan on {row['table']}")
+        conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
+
+    print("=" * 80)
+    if failures:
+        print(f"❌ {failures} full table scan(s) in the dashboard queries")
+        sys.exit(1)
+    print("✅ Dashboard queries are index-driven")
+
+
+if __name__ == '__main__':
+    main()
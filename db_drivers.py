@@ -0,0 +1,253 @@
+"""
+Database Driver Backends for ATOM SHAALE AMS
+Selects the DB-API driver used by the connection pool (DB_DRIVER):
+- mysql-pure:   mysql-connector-python, pure Python protocol (default)
+- mysql-c:      mysql-connector-python C extension (much faster row decoding)
+- pymysql:      PyMySQL
+- mysqlclient:  mysqlclient (MySQLdb, libmysqlclient based)
+
+Every backend keeps the mysql.connector cursor semantics the routes rely on:
+cursor(dictionary=True), start_transaction(), ping(reconnect=...),
+in_transaction, and errors raised as mysql.connector.Error subclasses.
+"""
+
+import os
+
+import mysql.connector
+from mysql.connector import errors as mysql_errors
+
+
+# ============================================================================
+# MYSQL-CONNECTOR BACKENDS
+# ============================================================================
+
+class MySQLConnectorDriver:
+    """mysql-connector-python, pure Python or C extension"""
+
+    def __init__(self, name, use_pure):
+        self.name = name
+        self.use_pure = use_pure
+
+    def available(self):
+        return self.use_pure or bool(getattr(mysql.connector, 'HAVE_CEXT', False))
+
+    def connect(self, config):
+        return mysql.connector.connect(**config, use_pure=self.use_pure)
+
+
+# ============================================================================
+# GENERIC DB-API BACKENDS (PyMySQL / mysqlclient)
+# ============================================================================
+
+def _translate_error(err):
+    """Re-raise a driver error as the matching mysql.connector error"""
+    args = getattr(err, 'args', ())
+    if len(args) >= 2 and isinstance(args[0], int):
+        return mysql_errors.get_mysql_exception(args[0], str(args[1]))
+    return mysql_errors.DatabaseError(msg=str(err))
+
+
+class DBAPICursorAdapter:
+    """Cursor wrapper translating driver errors into mysql.connector errors"""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+
+    def execute(self, operation, params=None):
+        try:
+            result = self._cursor.execute(operation, params)
+        except self._connection.driver_errors as err:
+            raise _translate_error(err) from err
+        self._connection._mark_statement(operation)
+        return result
+
+    def executemany(self, operation, seq_params):
+        try:
+            result = self._cursor.executemany(operation, seq_params)
+        except self._connection.driver_errors as err:
+            raise _translate_error(err) from err
+        self._connection._mark_statement(operation)
+        return result
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class DBAPIConnectionAdapter:
+    """Gives a PyMySQL/MySQLdb connection the mysql.connector interface used by app.py"""
+
+    def __init__(self, conn, tuple_cursor, dict_cursor, driver_errors):
+        self._conn = conn
+        self._tuple_cursor = tuple_cursor
+        self._dict_cursor = dict_cursor
+        self.driver_errors = driver_errors
+        self.in_transaction = False
+        self.autocommit = False
+
+    def _mark_statement(self, operation):
+        # With autocommit off every statement runs inside an implicit transaction
+        self.in_transaction = True
+
+    def cursor(self, dictionary=False, buffered=None, prepared=False, **kwargs):
+        # Server-side prepared statements are not supported here: plain cursor
+        cursor_class = self._dict_cursor if dictionary else self._tuple_cursor
+        return DBAPICursorAdapter(self, self._conn.cursor(cursor_class))
+
+    def start_transaction(self, **kwargs):
+        try:
+            self._conn.begin()
+        except self.driver_errors as err:
+            raise _translate_error(err) from err
+        self.in_transaction = True
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except self.driver_errors as err:
+            raise _translate_error(err) from err
+        self.in_transaction = False
+
+    def rollback(self):
+        try:
+            self._conn.rollback()
+        except self.driver_errors as err:
+            raise _translate_error(err) from err
+        self.in_transaction = False
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        try:
+            self._conn.ping(reconnect)
+        except self.driver_errors as err:
+            raise _translate_error(err) from err
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except mysql.connector.Error:
+            return False
+
+    def close(self):
+        try:
+            self._conn.close()
+        except self.driver_errors:
+            pass
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class PyMySQLDriver:
+    """PyMySQL (pure Python, optional dependency)"""
+
+    name = 'pymysql'
+
+    def available(self):
+        try:
+            import pymysql  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def connect(self, config):
+        import pymysql
+        import pymysql.cursors
+        try:
+            conn = pymysql.connect(
+                host=config['host'],
+                user=config['user'],
+                password=config['password'],
+                database=config['database'],
+                port=config['port'],
+                autocommit=config.get('autocommit', False),
+                charset='utf8mb4',
+                ssl_disabled=config.get('ssl_disabled', False),
+            )
+        except pymysql.MySQLError as err:
+            raise _translate_error(err) from err
+        return DBAPIConnectionAdapter(conn, pymysql.cursors.Cursor, pymysql.cursors.DictCursor, pymysql.MySQLError)
+
+
+class MySQLClientDriver:
+    """mysqlclient / MySQLdb (C, optional dependency)"""
+
+    name = 'mysqlclient'
+
+    def available(self):
+        try:
+            import MySQLdb  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def connect(self, config):
+        import MySQLdb
+        import MySQLdb.cursors
+        try:
+            conn = MySQLdb.connect(
+                host=config['host'],
+                user=config['user'],
+                password=config['password'],
+                database=config['database'],
+                port=config['port'],
+                autocommit=config.get('autocommit', False),
+                charset='utf8mb4',
+            )
+        except MySQLdb.MySQLError as err:
+            raise _translate_error(err) from err
+        return DBAPIConnectionAdapter(conn, MySQLdb.cursors.Cursor, MySQLdb.cursors.DictCursor, MySQLdb.MySQLError)
+
+
+# ============================================================================
+# DRIVER REGISTRY
+# ============================================================================
+
+DRIVERS = {
+    'mysql-pure': MySQLConnectorDriver('mysql-pure', use_pure=True),
+    'mysql-c': MySQLConnectorDriver('mysql-c', use_pure=False),
+    'pymysql': PyMySQLDriver(),
+    'mysqlclient': MySQLClientDriver(),
+}
+
+DEFAULT_DRIVER = 'mysql-pure'
+
+
+def get_driver(name=None):
+    """
+    Resolve a driver backend by name (defaults to DB_DRIVER)
+
+    Falls back to the pure Python connector when the requested driver
+    is not installed, so a missing optional package never stops the app.
+    """
+    name = (name or os.getenv('DB_DRIVER', DEFAULT_DRIVER)).strip().lower()
+    driver = DRIVERS.get(name)
+    if driver is None:
+        raise ValueError(f"Unknown DB_DRIVER '{name}'. Choose one of: {', '.join(DRIVERS)}")
+    if not driver.available():
+        print(f"⚠️  DB driver '{name}' is not installed - falling back to '{DEFAULT_DRIVER}'")
+        driver = DRIVERS[DEFAULT_DRIVER]
+    return driver
+
+
+def available_drivers():
+    """Names of the driver backends importable in this environment"""
+    return [name for name, driver in DRIVERS.items() if driver.available()]
@@ -0,0 +1,243 @@
+"""
+SQL Instrumentation for ATOM SHAALE AMS
+Per-request query accounting on top of the connection pool:
+- Statement count, total DB time and slowest statements per request
+- Per-route aggregates (/admin/query_stats)
+- Slow-query log (logs/slow_queries.log, SLOW_QUERY_MS threshold)
+- N+1 detection: a normalized statement run more than N_PLUS_ONE_THRESHOLD
+  times in one request is flagged
+- X-DB-* response headers in debug mode
+"""
+
+import os
+import re
+import time
+import heapq
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
+
+from flask import g, has_app_context, has_request_context, request
+
+import db_pool
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 10))
+SLOWEST_KEPT = 5
+
+slow_query_logger = logging.getLogger('ams.slow_query')
+n_plus_one_logger = logging.getLogger('ams.n_plus_one')
+
+
+# ============================================================================
+# STATEMENT NORMALIZATION
+# ============================================================================
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.I)
+_VALUES_LIST_RE = re.compile(r'\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.I)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """Collapse literals, IN/VALUES lists and whitespace so equivalent statements group together"""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _COMMENT_RE.sub(' ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_LIST_RE.sub(r'VALUES \1, ...', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+# ============================================================================
+# PER-REQUEST COLLECTOR
+# ============================================================================
+
+class RequestQueryStats:
+    """Query accounting for one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.by_statement = {}   # normalized SQL -> [count, total_time]
+        self._slowest = []       # min-heap of (elapsed, seq, normalized SQL)
+
+    def record(self, normalized, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        entry = self.by_statement.setdefault(normalized, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        item = (elapsed, self.count, normalized)
+        if len(self._slowest) < SLOWEST_KEPT:
+            heapq.heappush(self._slowest, item)
+        else:
+            heapq.heappushpop(self._slowest, item)
+
+    def slowest(self):
+        return [(sql, elapsed) for elapsed, _, sql in sorted(self._slowest, reverse=True)]
+
+    def repeated_statements(self, threshold=None):
+        """Normalized statements run more than `threshold` times (N+1 candidates)"""
+        threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return {sql: entry[0] for sql, entry in self.by_statement.items() if entry[0] > threshold}
+
+
+def current_stats():
+    """Collector for the active request, or None outside a request"""
+    if not has_app_context():
+        return None
+    return g.get('query_stats')
+
+
+# ============================================================================
+# INSTRUMENTED CURSOR
+# ============================================================================
+
+class InstrumentedCursor:
+    """Cursor wrapper timing execute()/executemany() into the request collector"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, params, **kwargs)
+        finally:
+            _record(operation, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params)
+        finally:
+            _record(operation, time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+
+def _record(operation, elapsed):
+    normalized = normalize_sql(operation)
+    stats = current_stats()
+    if stats is not None:
+        stats.record(normalized, elapsed)
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        endpoint = request.endpoint if has_request_context() else None
+        slow_query_logger.warning("%.1f ms | %s | %s", elapsed * 1000, endpoint or '-', normalized)
+
+
+# ============================================================================
+# PER-ROUTE AGGREGATES
+# ============================================================================
+
+_route_stats = {}
+_route_lock = threading.Lock()
+
+
+def _aggregate(endpoint, stats, flagged):
+    with _route_lock:
+        route = _route_stats.setdefault(endpoint, {
+            'requests': 0, 'queries': 0, 'db_time_ms': 0.0,
+            'max_queries': 0, 'max_db_time_ms': 0.0, 'n_plus_one_requests': 0,
+            'slowest': [],
+        })
+        db_ms = stats.total_time * 1000
+        route['requests'] += 1
+        route['queries'] += stats.count
+        route['db_time_ms'] += db_ms
+        route['max_queries'] = max(route['max_queries'], stats.count)
+        route['max_db_time_ms'] = max(route['max_db_time_ms'], db_ms)
+        if flagged:
+            route['n_plus_one_requests'] += 1
+        merged = route['slowest'] + [(sql, round(elapsed * 1000, 2)) for sql, elapsed in stats.slowest()]
+        route['slowest'] = sorted(merged, key=lambda item: item[1], reverse=True)[:SLOWEST_KEPT]
+
+
+def route_stats():
+    """Per-route query statistics for this worker process"""
+    with _route_lock:
+        result = {}
+        for endpoint, route in _route_stats.items():
+            requests = route['requests'] or 1
+            result[endpoint] = dict(
+                route,
+                db_time_ms=round(route['db_time_ms'], 2),
+                max_db_time_ms=round(route['max_db_time_ms'], 2),
+                avg_queries=round(route['queries'] / requests, 2),
+                avg_db_time_ms=round(route['db_time_ms'] / requests, 2),
+                slowest=[{'sql': sql, 'ms': ms} for sql, ms in route['slowest']],
+            )
+        return result
+
+
+# ============================================================================
+# FLASK INTEGRATION
+# ============================================================================
+
+def init_query_instrumentation(app):
+    """Wrap pooled cursors and register the per-request hooks"""
+    if os.getenv('SQL_INSTRUMENTATION', 'True').lower() in ('false', '0', 'no'):
+        print("⚠️  SQL instrumentation disabled (SQL_INSTRUMENTATION=False)")
+        return
+
+    db_pool.set_cursor_wrapper(InstrumentedCursor)
+
+    if not slow_query_logger.handlers:
+        log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        handler = RotatingFileHandler(
+            os.path.join(log_dir, 'slow_queries.log'),
+            maxBytes=10485760,  # 10MB
+            backupCount=5
+        )
+        handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s'))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+
+    debug_headers = app.debug or os.getenv('SQL_DEBUG_HEADERS', 'False').lower() in ('true', '1', 'yes')
+
+    @app.before_request
+    def start_query_stats():
+        g.query_stats = RequestQueryStats()
+
+    @app.after_request
+    def add_query_headers(response):
+        stats = g.get('query_stats')
+        if debug_headers and stats is not None:
+            slowest = stats.slowest()
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f"{stats.total_time * 1000:.1f}"
+            response.headers['X-DB-Slowest-Ms'] = f"{slowest[0][1] * 1000:.1f}" if slowest else "0"
+            repeated = stats.repeated_statements()
+            if repeated:
+                response.headers['X-DB-N-Plus-One'] = str(max(repeated.values()))
+        return response
+
+    @app.teardown_request
+    def finish_query_stats(exc):
+        stats = g.pop('query_stats', None)
+        if stats is None or stats.count == 0:
+            return
+        endpoint = request.endpoint or request.path
+        repeated = stats.repeated_statements()
+        for sql, count in repeated.items():
+            n_plus_one_logger.warning("N+1 suspected in %s: %d x %s", endpoint, count, sql)
+        _aggregate(endpoint, stats, bool(repeated))
+
+    print(f"✓ SQL instrumentation enabled (slow query >= {SLOW_QUERY_MS:.0f} ms, "
+          f"N+1 threshold {N_PLUS_ONE_THRESHOLD})")
@@ -0,0 +1,112 @@
+"""
+Server-side Prepared Statements for ATOM SHAALE AMS
+Hot, fixed statements (exam start and submit) are prepared once per pooled
+connection and then run over the binary protocol:
+- register_statement(): declare a hot statement once, at import
+- query_prepared(): run it on a pooled connection and fetch the rows
+- Each physical connection owns a StatementCache; the pool drops it when
+  the connection is discarded or recycled (the server frees the handles
+  when the session closes)
+
+mysql-connector only re-uses a prepared statement when it is handed the
+*same* SQL string object, so statements are kept in the registry and never
+rebuilt. Drivers without server-side prepares (PyMySQL, mysqlclient) get a
+plain cached cursor and the text protocol.
+
+Handles per connection are bounded by the number of registered statements,
+well below MySQL's max_prepared_stmt_count.
+"""
+
+import threading
+
+import mysql.connector
+
+# MySQL: "Unknown prepared statement handler"
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+_statements = {}
+_counters = {'prepared': 0, 'executions': 0, 'invalidated': 0, 'reprepared': 0}
+_counters_lock = threading.Lock()
+
+
+def _count(key, amount=1):
+    with _counters_lock:
+        _counters[key] += amount
+
+
+def register_statement(name, sql):
+    """Register a hot statement under `name`; returns the name"""
+    if name in _statements and _statements[name] != sql:
+        raise ValueError(f"Prepared statement '{name}' registered twice with different SQL")
+    _statements.setdefault(name, sql)
+    return name
+
+
+def statement_sql(name):
+    return _statements[name]
+
+
+class StatementCache:
+    """Prepared cursors of one physical connection, keyed by statement name"""
+
+    __slots__ = ('cursors',)
+
+    def __init__(self):
+        self.cursors = {}
+
+    def cursor_for(self, conn, name):
+        cursor = self.cursors.get(name)
+        if cursor is None:
+            cursor = conn.cursor(prepared=True)
+            self.cursors[name] = cursor
+            _count('prepared')
+        return cursor
+
+    def invalidate(self):
+        """Forget every handle; called when the connection is closed or recycled"""
+        if self.cursors:
+            _count('invalidated', len(self.cursors))
+            self.cursors = {}
+
+    def __len__(self):
+        return len(self.cursors)
+
+
+def query_prepared(conn, name, params=(), one=False):
+    """
+    Execute a registered statement on a pooled connection
+
+    Args:
+        conn: PooledConnection borrowed from db_pool
+        name: name passed to register_statement()
+        params: positional parameters
+        one: return only the first row (or None)
+
+    Returns:
+        list of row tuples, or a single row when one=True
+    """
+    sql = _statements[name]
+    for attempt in (1, 2):
+        cursor = conn.prepared_cursor(name)
+        try:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            break
+        except mysql.connector.Error as err:
+            # Handle vanished server-side (e.g. FLUSH/failover on the same socket): re-prepare once
+            if err.errno != ER_UNKNOWN_STMT_HANDLER or attempt == 2:
+                raise
+            conn.statement_cache.invalidate()
+            _count('reprepared')
+    _count('executions')
+    if one:
+        return rows[0] if rows else None
+    return rows
+
+
+def prepared_stats():
+    """Per-process prepared statement counters"""
+    with _counters_lock:
+        stats = dict(_counters)
+    stats['registered'] = sorted(_statements)
+    return stats
@@ -152,7 +152,7 @@ systemctl enable mysql
 mysql -u root -p"$MYSQL_ROOT_PASS" <<EOF
 CREATE DATABASE IF NOT EXISTS lms_system CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci;
 CREATE USER IF NOT EXISTS 'lms_user'@'localhost' IDENTIFIED BY '$MYSQL_USER_PASS';
-GRANT SELECT, INSERT, UPDATE, DELETE ON lms_system.* TO 'lms_user'@'localhost';
+GRANT SELECT, INSERT, UPDATE, DELETE, CREATE TEMPORARY TABLES ON lms_system.* TO 'lms_user'@'localhost';
 FLUSH PRIVILEGES;
 EOF
 
@@ -227,6 +227,9 @@ PERMANENT_SESSION_LIFETIME=3600
 RATELIMIT_STORAGE_URL=redis://localhost:6379/0
 RATELIMIT_STRATEGY=fixed-window
 
+# Shared Cache
+CACHE_URL=redis://localhost:6379/1
+
 # File Upload Configuration
 MAX_CONTENT_LENGTH=52428800
 ALLOWED_EXTENSIONS=txt,pdf,png,jpg,jpeg,gif,mp4,webm,csv,xlsx
@@ -244,6 +247,13 @@ chmod 600 "$APP_DIR/.env"
 
 echo -e "${GREEN}✅ Environment configuration created${NC}"
 
+# Apply schema migrations (lms_user has no DDL rights, so run them as root)
+cd "$APP_DIR"
+sudo -u "$APP_USER" DB_MIGRATION_USER=root DB_MIGRATION_PASSWORD="$MYSQL_ROOT_PASS" \
+    "$APP_DIR/venv/bin/python" migrate.py
+
+echo -e "${GREEN}✅ Database schema migrated${NC}"
+
 ###############################################################################
 # PHASE 8: Gunicorn & Supervisor Setup
 ###############################################################################
@@ -253,7 +263,7 @@ echo -e "${BLUE}================================================================
 
 cat > /etc/supervisor/conf.d/cognitiopro.conf <<EOF
 [program:cognitiopro]
-command=$APP_DIR/venv/bin/gunicorn --worker-class eventlet -w 4 --bind unix:$APP_DIR/cognitiopro.sock --timeout 120 app:app
+command=$APP_DIR/venv/bin/gunicorn -c $APP_DIR/gunicorn.conf.py --bind unix:$APP_DIR/cognitiopro.sock
 directory=$APP_DIR
 user=$APP_USER
 autostart=true
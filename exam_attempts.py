@@ -0,0 +1,101 @@
+"""
+Exam Attempt State for ATOM SHAALE AMS
+Per-attempt state (start time, status, shuffle version) lives in the
+exam_attempts table instead of the signed session cookie:
+- attempt_exam() creates a row and keeps only its attempt_id in the session
+- submit_exam() loads the row with one primary-key lookup, scoped to the
+  student and exam so an attempt id from another exam is rejected
+- The option mapping is recomputed from the attempt (shuffle.py); only
+  attempts started before the deterministic shuffle carry a stored mapping
+- Each attempt carries a random submission token that the exam form posts
+  back; submit_exam() claims it once (submission_queue.claim_submission)
+"""
+
+import json
+import secrets
+from collections import namedtuple
+
+from db_prepared import query_prepared
+from exam_statements import LOAD_ATTEMPT
+
+ExamAttempt = namedtuple('ExamAttempt', ['attempt_id', 'status', 'started_at', 'shuffle_version', 'option_mapping',
+                                         'submission_token'])
+
+
+def session_key(exam_id):
+    """Session entry holding the current attempt_id for exam_id"""
+    return f'exam_{exam_id}_attempt'
+
+
+def new_submission_token():
+    return secrets.token_hex(16)
+
+
+def create_attempt(conn, student_id, exam_id, shuffle_version):
+    """Insert an in-progress attempt and commit; returns (attempt_id, submission_token)"""
+    token = new_submission_token()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            INSERT INTO exam_attempts (student_id, exam_id, shuffle_version, submission_token)
+            VALUES (%s, %s, %s, %s)
+        """, (student_id, exam_id, shuffle_version, token))
+        attempt_id = cursor.lastrowid
+        conn.commit()
+    finally:
+        cursor.close()
+    return attempt_id, token
+
+
+def ensure_submission_token(conn, attempt):
+    """
+    Token of a resumed attempt, issuing one for attempts started before tokens existed
+
+    When concurrent resumes race to issue the token, every caller returns
+    the one that was stored, so all of the attempt's pages can submit.
+    """
+    if attempt.submission_token:
+        return attempt.submission_token
+    token = new_submission_token()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE exam_attempts SET submission_token = %s
+            WHERE attempt_id = %s AND submission_token IS NULL
+        """, (token, attempt.attempt_id))
+        issued = cursor.rowcount == 1
+        conn.commit()
+        if not issued:
+            # Lost the race: read the winner's token in a fresh snapshot
+            cursor.execute("SELECT submission_token FROM exam_attempts WHERE attempt_id = %s",
+                           (attempt.attempt_id,))
+            row = cursor.fetchone()
+            conn.rollback()
+            if row and row[0]:
+                token = row[0]
+    finally:
+        cursor.close()
+    return token
+
+
+def load_attempt(conn, attempt_id, student_id, exam_id):
+    """ExamAttempt for this student and exam, or None"""
+    if not attempt_id:
+        return None
+    row = query_prepared(conn, LOAD_ATTEMPT, (attempt_id, student_id, exam_id), one=True)
+    if not row:
+        return None
+    mapping = row[4]
+    if isinstance(mapping, (bytes, bytearray, str)):
+        mapping = json.loads(mapping)
+    return ExamAttempt(row[0], row[1], row[2], row[3], mapping, row[5])
+
+
+def mark_submitted(cursor, attempt_ids):
+    """Flag graded attempts submitted (inside the transaction recording their results)"""
+    if not attempt_ids:
+        return
+    cursor.execute(f"""
+        UPDATE exam_attempts SET status = 'submitted', submitted_at = NOW()
+        WHERE attempt_id IN ({', '.join(['%s'] * len(attempt_ids))})
+    """, list(attempt_ids))
@@ -0,0 +1,76 @@
+"""
+Exam-to-Course Assignment for ATOM SHAALE AMS
+Exams are assigned either to every student (exam.all_courses = 1) or to
+specific courses through rows in exam_courses(exam_id, course). Both paths
+are index lookups, so the student dashboard no longer scans every exam row
+with LIKE / FIND_IN_SET over the comma-separated exam.courses string.
+
+exam.courses is still written as the human-readable label shown on the
+admin pages; it is never used for filtering.
+"""
+
+ALL_COURSES = 'All Courses'
+
+# Exams visible to a student of a given course (newest first)
+STUDENT_EXAMS_QUERY = """
+    SELECT e.exam_id, e.exam_title, e.subject_name, e.courses, e.start_datetime, e.end_datetime, e.created_at
+    FROM exam_courses ec
+    JOIN exam e ON e.exam_id = ec.exam_id
+    WHERE ec.course = %s
+    UNION ALL
+    SELECT e.exam_id, e.exam_title, e.subject_name, e.courses, e.start_datetime, e.end_datetime, e.created_at
+    FROM exam e
+    WHERE e.all_courses = 1
+    ORDER BY created_at DESC
+"""
+
+# Exams visible to a student without a course
+ALL_COURSES_EXAMS_QUERY = """
+    SELECT e.exam_id, e.exam_title, e.subject_name, e.courses, e.start_datetime, e.end_datetime, e.created_at
+    FROM exam e
+    WHERE e.all_courses = 1
+    ORDER BY e.created_at DESC
+"""
+
+
+def parse_courses(selected_courses):
+    """
+    Normalize a course selection
+
+    Args:
+        selected_courses: list of course names from the form, or the legacy
+            comma-separated exam.courses string
+
+    Returns:
+        tuple: (all_courses, courses) - an empty selection or one containing
+        'All Courses' means every student sees the exam
+    """
+    if isinstance(selected_courses, str):
+        selected_courses = selected_courses.split(',')
+    courses = []
+    for course in selected_courses or []:
+        course = (course or '').strip()
+        if course and course not in courses:
+            courses.append(course)
+    if not courses or ALL_COURSES in courses:
+        return True, []
+    return False, courses
+
+
+def save_exam_courses(cursor, exam_id, selected_courses):
+    """Replace an exam's course assignment (caller commits)"""
+    all_courses, courses = parse_courses(selected_courses)
+    label = ALL_COURSES if all_courses and selected_courses else (', '.join(courses) or None)
+    cursor.execute("UPDATE exam SET courses = %s, all_courses = %s WHERE exam_id = %s",
+                   (label, all_courses, exam_id))
+    cursor.execute("DELETE FROM exam_courses WHERE exam_id = %s", (exam_id,))
+    if courses:
+        cursor.executemany("INSERT INTO exam_courses (exam_id, course) VALUES (%s, %s)",
+                           [(exam_id, course) for course in courses])
+    return all_courses, courses
+
+
+def get_exam_courses(cursor, exam_id):
+    """Course names an exam is assigned to (empty list when assigned to all)"""
+    cursor.execute("SELECT course FROM exam_courses WHERE exam_id = %s ORDER BY course", (exam_id,))
+    return [row[0] for row in cursor.fetchall()]
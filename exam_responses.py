@@ -0,0 +1,46 @@
+"""
+Batched Response Persistence for ATOM SHAALE AMS
+submit_exam() collects one row per question in memory and writes them with
+a single multi-row INSERT instead of one round trip per question, so the
+submit transaction holds its locks for one statement rather than 100+.
+
+The statement is built explicitly (not left to executemany) because only
+some drivers rewrite executemany into a multi-row INSERT, and none of them
+do it when the VALUES clause contains NOW().
+"""
+
+import os
+
+# Rows per INSERT; keeps descriptive answers well under max_allowed_packet
+RESPONSE_BATCH_SIZE = int(os.getenv('RESPONSE_BATCH_SIZE', 500))
+
+RESPONSE_COLUMNS = ('student_id', 'exam_id', 'question_id', 'selected_option', 'is_correct', 'response_type')
+
+_ROW_PLACEHOLDER = '(' + ', '.join(['%s'] * len(RESPONSE_COLUMNS)) + ', NOW())'
+
+
+def _insert_sql(table, rows):
+    return (f"INSERT INTO {table} ({', '.join(RESPONSE_COLUMNS)}, submitted_at) VALUES "
+            + ', '.join([_ROW_PLACEHOLDER] * rows))
+
+
+def insert_responses(cursor, responses, table='student_responses', batch_size=None):
+    """
+    Write response rows with as few statements as possible
+
+    Args:
+        cursor: cursor inside the caller's transaction
+        responses: tuples in RESPONSE_COLUMNS order
+        table: target table (the benchmark writes to a temporary copy)
+        batch_size: rows per statement (default RESPONSE_BATCH_SIZE)
+
+    Returns:
+        number of statements executed
+    """
+    batch_size = batch_size or RESPONSE_BATCH_SIZE
+    statements = 0
+    for start in range(0, len(responses), batch_size):
+        batch = responses[start:start + batch_size]
+        cursor.execute(_insert_sql(table, len(batch)), [value for row in batch for value in row])
+        statements += 1
+    return statements
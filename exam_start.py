@@ -0,0 +1,215 @@
+"""
+Exam-Start Stampede Control for ATOM SHAALE AMS
+Exams have a start_datetime, so the rush on login, the dashboard and
+attempt_exam() is predictable:
+- ExamPrewarmer: a background task that, from PREWARM_LEAD_SECONDS before
+  each start until shortly after it, keeps the exam's cached content warm
+  (snapshot, course list, ...) so the first students don't all miss at once
+- AdmissionController: caps concurrent attempt_exam() renders per process;
+  students over the cap get a lightweight waiting page (no database work)
+  that retries after an estimated wait, instead of queueing on the DB pool
+  until borrows time out
+
+Both are per worker process, like the DB pool they protect.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from functools import wraps
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+PREWARM_LEAD_SECONDS = int(os.getenv('PREWARM_LEAD_SECONDS', 300))     # warm this long before start
+PREWARM_GRACE_SECONDS = int(os.getenv('PREWARM_GRACE_SECONDS', 120))   # ... and keep warm after it
+PREWARM_POLL_INTERVAL = float(os.getenv('PREWARM_POLL_INTERVAL', 30))
+
+ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', 16))  # keep below DB_POOL_SIZE
+ADMISSION_RETRY_MIN = float(os.getenv('ADMISSION_RETRY_MIN', 2))
+ADMISSION_RETRY_MAX = float(os.getenv('ADMISSION_RETRY_MAX', 30))
+ADMISSION_WINDOW = 10.0     # seconds of turned-away requests counted as "waiting"
+SERVICE_TIME_ALPHA = 0.2    # EWMA weight of the latest render time
+
+
+# ============================================================================
+# PRE-WARM SCHEDULER
+# ============================================================================
+
+class ExamPrewarmer:
+    """Warm caches for exams about to start"""
+
+    def __init__(self, lead=PREWARM_LEAD_SECONDS, grace=PREWARM_GRACE_SECONDS, interval=PREWARM_POLL_INTERVAL):
+        self.lead = lead
+        self.grace = grace
+        self.interval = interval
+        self._running = False
+        self._runs = 0
+        self._warmed = 0
+        self._errors = 0
+        self._last_exams = []
+
+    def start(self, get_connection, warm, spawn=None):
+        """
+        Start the scheduler (once per process, after fork)
+
+        Args:
+            get_connection: returns a pooled connection
+            warm: callback(conn, exam_ids) loading whatever those exams' first
+                requests need into the caches (a no-op for what is still cached)
+            spawn: background task starter (default: daemon thread)
+        """
+        if self._running:
+            return
+        self._running = True
+        if spawn is not None:
+            spawn(self._run, get_connection, warm)
+        else:
+            threading.Thread(target=self._run, args=(get_connection, warm),
+                             name='exam-prewarm', daemon=True).start()
+
+    def upcoming(self, cursor, now=None):
+        """Exams starting within the lead time (or started within the grace period)"""
+        now = now or datetime.now()
+        cursor.execute("""
+            SELECT exam_id FROM exam
+            WHERE start_datetime BETWEEN %s AND %s
+            ORDER BY start_datetime
+        """, (now - timedelta(seconds=self.grace), now + timedelta(seconds=self.lead)))
+        return [row[0] for row in cursor.fetchall()]
+
+    def run_once(self, conn, warm):
+        cursor = conn.cursor()
+        try:
+            exam_ids = self.upcoming(cursor)
+        finally:
+            cursor.close()
+        conn.rollback()
+        if exam_ids:
+            warm(conn, exam_ids)
+        self._runs += 1
+        self._warmed += len(exam_ids)
+        self._last_exams = exam_ids
+        return exam_ids
+
+    def _run(self, get_connection, warm):
+        while self._running:
+            conn = None
+            try:
+                conn = get_connection()
+                exam_ids = self.run_once(conn, warm)
+                if exam_ids:
+                    logger.info("Pre-warmed %d upcoming exam(s): %s", len(exam_ids), exam_ids)
+            except Exception as err:
+                self._errors += 1
+                logger.error("Exam pre-warm failed: %s", err)
+            finally:
+                if conn is not None:
+                    conn.close()
+            time.sleep(self.interval)
+
+    def stats(self):
+        return {
+            'lead_seconds': self.lead,
+            'grace_seconds': self.grace,
+            'interval_seconds': self.interval,
+            'runs': self._runs,
+            'exams_warmed': self._warmed,
+            'errors': self._errors,
+            'current_exams': list(self._last_exams),
+            'pid': os.getpid(),
+        }
+
+
+# ============================================================================
+# ADMISSION CONTROL
+# ============================================================================
+
+class AdmissionController:
+    """Non-blocking cap on concurrent renders with a wait estimate for the overflow"""
+
+    def __init__(self, limit=ADMISSION_MAX_CONCURRENT, retry_min=ADMISSION_RETRY_MIN, retry_max=ADMISSION_RETRY_MAX):
+        self.limit = max(1, limit)
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._service_time = 1.0      # EWMA seconds per render
+        self._turned_away = []        # monotonic times of recent rejections
+        self._admitted = 0
+        self._rejected = 0
+        self._peak = 0
+
+    def try_admit(self):
+        """Start time of an admitted render, or None when at capacity"""
+        with self._lock:
+            if self._in_flight >= self.limit:
+                self._rejected += 1
+                self._turned_away.append(time.monotonic())
+                return None
+            self._in_flight += 1
+            self._admitted += 1
+            self._peak = max(self._peak, self._in_flight)
+        return time.perf_counter()
+
+    def release(self, started):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._in_flight -= 1
+            self._service_time += SERVICE_TIME_ALPHA * (elapsed - self._service_time)
+
+    def _waiting(self):
+        cutoff = time.monotonic() - ADMISSION_WINDOW
+        while self._turned_away and self._turned_away[0] < cutoff:
+            self._turned_away.pop(0)
+        return len(self._turned_away)
+
+    def eta(self):
+        """Seconds a turned-away student should wait before retrying"""
+        with self._lock:
+            waves = 1 + self._waiting() / self.limit
+            estimate = self._service_time * waves
+        return min(self.retry_max, max(self.retry_min, estimate))
+
+    def retry_after(self):
+        """eta() with +/-25% jitter so the waiting students don't come back in lockstep"""
+        return round(self.eta() * random.uniform(0.75, 1.25), 1)
+
+    def stats(self):
+        with self._lock:
+            waiting = self._waiting()
+            return {
+                'limit': self.limit,
+                'in_flight': self._in_flight,
+                'peak_in_flight': self._peak,
+                'admitted': self._admitted,
+                'turned_away': self._rejected,
+                'recently_waiting': waiting,
+                'avg_render_ms': round(self._service_time * 1000, 1),
+                'pid': os.getpid(),
+            }
+
+
+def admission_controlled(controller, waiting_response):
+    """
+    Route decorator: run the view only when `controller` admits it, else
+    return waiting_response(retry_after_seconds, *args, **kwargs)
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            started = controller.try_admit()
+            if started is None:
+                return waiting_response(controller.retry_after(), *args, **kwargs)
+            try:
+                return f(*args, **kwargs)
+            finally:
+                controller.release(started)
+        return decorated_function
+    return decorator
+
+
+exam_prewarmer = ExamPrewarmer()
+attempt_admission = AdmissionController()
@@ -0,0 +1,63 @@
+"""
+Hot Exam Statements for ATOM SHAALE AMS
+Fixed queries run by every student at exam start (attempt_exam) and
+submission (submit_exam). They are registered with db_prepared so each
+pooled connection prepares them once and re-executes them in binary form.
+"""
+
+from db_prepared import register_statement
+
+# A submission waiting in the grading queue counts as taken: it has no
+# student_performance row yet, but the exam cannot be submitted twice
+ATTEMPT_DUPLICATE_CHECK = register_statement('attempt_duplicate_check', """
+    SELECT performance_id, score, recorded_at
+    FROM student_performance
+    WHERE student_id = %s AND exam_id = %s
+    UNION ALL
+    SELECT NULL, NULL, created_at
+    FROM exam_submissions
+    WHERE student_id = %s AND exam_id = %s
+    LIMIT 1
+""")
+
+ATTEMPT_EXAM = register_statement('attempt_exam', """
+    SELECT exam_id, exam_title, subject_name, time_limit,
+           start_datetime, end_datetime, question_paper_path
+    FROM exam
+    WHERE exam_id = %s
+""")
+
+ATTEMPT_QUESTIONS = register_statement('attempt_questions', """
+    SELECT question_id, exam_id, question_text, question_type,
+           option_a, option_b, option_c, option_d, correct_option,
+           explanation, media_path
+    FROM questions
+    WHERE exam_id = %s
+    ORDER BY question_id
+""")
+
+SUBMIT_DUPLICATE_CHECK = register_statement('submit_duplicate_check', """
+    SELECT performance_id, recorded_at
+    FROM student_performance
+    WHERE student_id = %s AND exam_id = %s
+    UNION ALL
+    SELECT NULL, created_at
+    FROM exam_submissions
+    WHERE student_id = %s AND exam_id = %s
+    LIMIT 1
+""")
+
+SUBMIT_EXAM = register_statement('submit_exam', """
+    SELECT exam_title, time_limit, end_datetime
+    FROM exam
+    WHERE exam_id = %s
+""")
+
+LOAD_ATTEMPT = register_statement('load_attempt', """
+    SELECT attempt_id, status, started_at, shuffle_version, option_mapping, submission_token
+    FROM exam_attempts
+    WHERE attempt_id = %s AND student_id = %s AND exam_id = %s
+""")
+
+# Statements of one exam start, in execution order (used by the benchmark)
+EXAM_START_SEQUENCE = (ATTEMPT_DUPLICATE_CHECK, ATTEMPT_EXAM, ATTEMPT_QUESTIONS)
@@ -0,0 +1,143 @@
+"""
+Grading Engine for ATOM SHAALE AMS
+Objective questions (MCQ, image MCQ, true/false) are graded as NumPy
+arrays instead of a per-question if/elif chain:
+- AnswerKey: question ids, types and correct options encoded as small ints
+  (optionally with a student's shuffle mapping applied)
+- AnswerKey.encode(): one student's raw form answers -> code vector, with
+  invalid answers treated as unanswered
+- grade(): score one submission (1-D) or a whole cohort (2-D, one row per
+  student) in a single call
+
+Descriptive and video questions are not auto-graded; they are excluded from
+the totals exactly as before (score = correct / objective questions * 100).
+"""
+
+from collections import namedtuple
+
+MCQ_TYPES = ('mcq', 'image_mcq')
+TRUE_FALSE = 'true_false'
+TRUE_FALSE_ANSWERS = ('True', 'False')
+MCQ_ANSWERS = 'ABCD'
+UNGRADED_TYPES = ('descriptive', 'video_response')
+
+UNANSWERED = -1   # answer code: blank or invalid
+NO_KEY = -2       # key code: correct option missing/invalid (never matches)
+
+GradeResult = namedtuple('GradeResult', [
+    'correct',          # bool array, True where the answer matches the key
+    'answered',         # bool array, True where a valid answer was given
+    'correct_count',    # objective questions answered correctly
+    'graded_count',     # objective questions in the exam
+    'incorrect_count',  # graded_count - correct_count (unanswered counts as incorrect)
+    'score',            # percentage, 0 when the exam has no objective questions
+    'by_type',          # {question_type: {'correct': n, 'total': n}}
+])
+
+
+def _encode(question_type, value, unknown):
+    """Code of one option/answer for a question type"""
+    if value is None:
+        return unknown
+    if question_type == TRUE_FALSE:
+        # Stored and submitted as 'True'/'False'; compared exactly
+        return TRUE_FALSE_ANSWERS.index(value) if value in TRUE_FALSE_ANSWERS else unknown
+    value = value.strip().upper()
+    return MCQ_ANSWERS.index(value) if len(value) == 1 and value in MCQ_ANSWERS else unknown
+
+
+def encode_answer(question_type, value):
+    """Answer code of one raw answer (UNANSWERED when blank or invalid)"""
+    return _encode(question_type, value, UNANSWERED) if value else UNANSWERED
+
+
+class AnswerKey:
+    """Encoded answer key of one exam (as seen by one student when a mapping is given)"""
+
+    def __init__(self, question_ids, question_types, correct_options):
+        import numpy as np
+
+        self.question_ids = list(question_ids)
+        self.question_types = [question_type or 'mcq' for question_type in question_types]
+        self.graded = np.array([t not in UNGRADED_TYPES for t in self.question_types], dtype=bool)
+        self.codes = np.array([_encode(t, option, NO_KEY) if graded else NO_KEY
+                               for t, option, graded in zip(self.question_types, correct_options, self.graded)],
+                              dtype=np.int8)
+        self._positions = {str(question_id): i for i, question_id in enumerate(self.question_ids)}
+
+    @classmethod
+    def from_questions(cls, questions, mapping=None):
+        """
+        Build from (question_id, question_type, correct_option, ...) rows
+
+        `mapping` ({str(question_id): displayed correct option}, see
+        shuffle.py) replaces the stored option for shuffled questions.
+        """
+        mapping = mapping or {}
+        corrections = []
+        for question_id, question_type, correct_option, *_ in questions:
+            if (question_type or 'mcq') in MCQ_TYPES + (TRUE_FALSE,):
+                correct_option = mapping.get(str(question_id), correct_option)
+            corrections.append(correct_option)
+        return cls((q[0] for q in questions), (q[1] for q in questions), corrections)
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    def mapped_codes(self, mapping):
+        """Key codes as seen by a student whose shuffle produced `mapping`"""
+        codes = self.codes.copy()
+        for i, question_id in enumerate(self.question_ids):
+            option = mapping.get(str(question_id))
+            if option is not None and self.question_types[i] in MCQ_TYPES + (TRUE_FALSE,):
+                codes[i] = _encode(self.question_types[i], option, NO_KEY)
+        return codes
+
+    def encode(self, answers):
+        """Answer code vector from {question_id (int or str): raw answer string}"""
+        import numpy as np
+
+        codes = np.full(len(self), UNANSWERED, dtype=np.int8)
+        for question_id, value in answers.items():
+            i = self._positions.get(str(question_id))
+            if i is not None and self.graded[i]:
+                codes[i] = encode_answer(self.question_types[i], value)
+        return codes
+
+
+def grade(key, answers, key_codes=None):
+    """
+    Grade one submission or a cohort
+
+    Args:
+        key: AnswerKey of the exam
+        answers: answer codes, shape (questions,) or (students, questions)
+        key_codes: per-student keys of shape (students, questions) when the
+            students saw different shuffles (default: key.codes for everyone)
+
+    Returns:
+        GradeResult; counts and score are scalars for 1-D input and arrays
+        (one entry per student) for 2-D input
+    """
+    import numpy as np
+
+    answers = np.asarray(answers, dtype=np.int8)
+    codes = key.codes if key_codes is None else np.asarray(key_codes, dtype=np.int8)
+    answered = (answers >= 0) & key.graded
+    correct = answered & (answers == codes)
+
+    correct_count = correct.sum(axis=-1)
+    graded_count = int(key.graded.sum())
+    score = correct_count * (100.0 / graded_count) if graded_count else np.zeros_like(correct_count, dtype=float)
+
+    by_type = {}
+    types = np.array(key.question_types, dtype=object)
+    for question_type in dict.fromkeys(t for t, graded in zip(key.question_types, key.graded) if graded):
+        columns = types == question_type
+        by_type[question_type] = {'correct': correct[..., columns].sum(axis=-1), 'total': int(columns.sum())}
+
+    if answers.ndim == 1:
+        correct_count = int(correct_count)
+        score = float(score)
+        by_type = {t: {'correct': int(v['correct']), 'total': v['total']} for t, v in by_type.items()}
+    return GradeResult(correct, answered, correct_count, graded_count, graded_count - correct_count, score, by_type)
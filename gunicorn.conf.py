@@ -0,0 +1,51 @@
+"""
+Gunicorn Configuration for ATOM SHAALE AMS
+==========================================
+The master preloads the app once (create_app(): templates, config, schema
+check) and forks workers that share that memory copy-on-write. Each worker
+then opens its own DB pool and rate-limit storage connections in post_fork.
+Background tasks (cache invalidation listener, autosave flusher, grading
+workers, exam pre-warm, proctoring results) start in post_worker_init: the
+eventlet worker installs its hub between the two hooks, and anything spawned
+in post_fork would belong to the discarded hub and never run. Proctoring
+detection runs in per-worker spawned processes (see proctoring.py).
+
+Usage:
+    gunicorn -c gunicorn.conf.py
+    gunicorn -c gunicorn.conf.py --bind unix:/var/www/cognitiopro/cognitiopro.sock
+"""
+
+import os
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'eventlet')
+
+if worker_class == 'eventlet':
+    # Patch before the app is preloaded so module-level locks and sockets are green
+    import eventlet
+    eventlet.monkey_patch()
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = True
+
+
+def when_ready(server):
+    # Everything allocated so far is shared with workers; keep the GC from
+    # touching those objects and un-sharing their pages
+    import gc
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import init_worker_resources
+    init_worker_resources()
+    server.log.info("Worker %s: per-process resources ready", worker.pid)
+
+
+def post_worker_init(worker):
+    from app import start_background_tasks
+    start_background_tasks()
+    worker.log.info("Worker %s: background tasks started", worker.pid)
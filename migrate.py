@@ -0,0 +1,270 @@
+"""
+Schema Migration Runner for ATOM SHAALE AMS
+===========================================
+Applies the ordered migration files in migrations/ (NNNN_description.py,
+each defining upgrade(cursor)) exactly once and records them in the
+schema_version table. A MySQL advisory lock (GET_LOCK) makes concurrent
+runs safe during rolling deploys: only one runner applies migrations,
+the others wait and then find nothing left to do.
+
+Worker startup only calls schema_status(), a single cheap SELECT.
+
+Usage:
+    python migrate.py              # Apply pending migrations
+    python migrate.py --status     # Show applied and pending migrations
+
+DDL needs a privileged account; set MIGRATION_DATABASE_URL (or
+DB_MIGRATION_USER / DB_MIGRATION_PASSWORD) when the app user is read/write only.
+"""
+
+import os
+import re
+import sys
+import time
+import importlib.util
+
+import mysql.connector
+from dotenv import load_dotenv
+
+from db_drivers import get_driver
+from db_pool import load_db_config
+
+load_dotenv()
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+LOCK_NAME = 'ams_schema_migrations'
+LOCK_TIMEOUT = int(os.getenv('MIGRATION_LOCK_TIMEOUT', 300))
+
+
+# ============================================================================
+# MIGRATION HELPERS (used by files in migrations/)
+# ============================================================================
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def column_type(cursor, table, column):
+    """Full column type (e.g. 'varchar(10)'), or None if the column doesn't exist"""
+    cursor.execute("""
+        SELECT COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    value = row[0]
+    return value.decode() if isinstance(value, (bytes, bytearray)) else value
+
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def add_column_if_missing(cursor, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN only when the column is not there yet"""
+    if column_type(cursor, table, column) is None:
+        cursor.execute(f"ALTER TABLE `{table}` ADD COLUMN `{column}` {definition}")
+        print(f"   ✓ {table}.{column} added")
+
+
+def modify_column_if_different(cursor, table, column, expected_type, definition):
+    """ALTER TABLE ... MODIFY COLUMN only when the current type differs"""
+    current = column_type(cursor, table, column)
+    if current is not None and current.lower() != expected_type.lower():
+        cursor.execute(f"ALTER TABLE `{table}` MODIFY COLUMN `{column}` {definition}")
+        print(f"   ✓ {table}.{column} changed from {current} to {expected_type}")
+
+
+def add_index_if_missing(cursor, table, index, columns):
+    if not index_exists(cursor, table, index):
+        cursor.execute(f"ALTER TABLE `{table}` ADD INDEX `{index}` ({columns})")
+        print(f"   ✓ index {table}.{index} added")
+
+
+# ============================================================================
+# MIGRATION DISCOVERY
+# ============================================================================
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location(f"migrations.m{self.version:04d}_{self.name}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not hasattr(module, 'upgrade'):
+            raise RuntimeError(f"Migration {self.path} has no upgrade(cursor) function")
+        return module
+
+
+def discover_migrations():
+    """All migration files, ordered by version"""
+    migrations = []
+    seen = set()
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in seen:
+            raise RuntimeError(f"Duplicate migration version {version:04d}")
+        seen.add(version)
+        migrations.append(Migration(version, match.group(2), os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+
+def latest_version():
+    migrations = discover_migrations()
+    return migrations[-1].version if migrations else 0
+
+
+# ============================================================================
+# SCHEMA VERSION
+# ============================================================================
+
+SCHEMA_VERSION_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INT PRIMARY KEY,
+        name VARCHAR(200) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        duration_ms INT
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+"""
+
+
+def applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def schema_status(conn):
+    """
+    Cheap startup check
+
+    Returns:
+        tuple: (current_version, latest_version); current is 0 when the
+        schema_version table doesn't exist yet
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        current = cursor.fetchone()[0]
+    except mysql.connector.Error:
+        current = 0
+    finally:
+        cursor.close()
+    conn.rollback()
+    return current, latest_version()
+
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def get_migration_connection():
+    """Connection for DDL, using MIGRATION_DATABASE_URL / DB_MIGRATION_* when set"""
+    if os.getenv('MIGRATION_DATABASE_URL'):
+        config = load_db_config(url_env='MIGRATION_DATABASE_URL')
+    else:
+        config = load_db_config()
+        if os.getenv('DB_MIGRATION_USER'):
+            config['user'] = os.getenv('DB_MIGRATION_USER')
+            config['password'] = os.getenv('DB_MIGRATION_PASSWORD', '')
+    return get_driver().connect(config)
+
+
+def run_migrations(conn):
+    """
+    Apply pending migrations under the advisory lock
+
+    Returns:
+        list of applied version numbers
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_TIMEOUT))
+    if cursor.fetchone()[0] != 1:
+        cursor.close()
+        raise RuntimeError(f"Could not acquire migration lock '{LOCK_NAME}' within {LOCK_TIMEOUT}s")
+
+    applied = []
+    try:
+        cursor.execute(SCHEMA_VERSION_DDL)
+        done = applied_versions(cursor)
+
+        for migration in discover_migrations():
+            if migration.version in done:
+                continue
+            print(f"🔄 Applying {migration.version:04d}_{migration.name}...")
+            module = migration.load()
+            started = time.perf_counter()
+            module.upgrade(cursor)
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            cursor.execute(
+                "INSERT INTO schema_version (version, name, duration_ms) VALUES (%s, %s, %s)",
+                (migration.version, migration.name, duration_ms)
+            )
+            conn.commit()
+            applied.append(migration.version)
+            print(f"✅ {migration.version:04d}_{migration.name} applied ({duration_ms} ms)")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
+        cursor.close()
+
+    return applied
+
+
+def print_status(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version, applied_at FROM schema_version")
+        done = {row[0]: row[1] for row in cursor.fetchall()}
+    except mysql.connector.Error:
+        done = {}
+    finally:
+        cursor.close()
+
+    for migration in discover_migrations():
+        if migration.version in done:
+            print(f"   ✅ {migration.version:04d}_{migration.name}  (applied {done[migration.version]})")
+        else:
+            print(f"   ⏳ {migration.version:04d}_{migration.name}  (pending)")
+
+
+if __name__ == '__main__':
+    print("=" * 80)
+    print("🗄️  ATOM SHAALE AMS - SCHEMA MIGRATIONS")
+    print("=" * 80)
+
+    conn = get_migration_connection()
+    try:
+        if len(sys.argv) > 1 and sys.argv[1] == '--status':
+            print_status(conn)
+        elif len(sys.argv) > 1:
+            print("Usage:")
+            print("  python migrate.py            # Apply pending migrations")
+            print("  python migrate.py --status   # Show migration status")
+        else:
+            applied = run_migrations(conn)
+            if applied:
+                print(f"\n✅ Applied {len(applied)} migration(s); schema now at version {applied[-1]}")
+            else:
+                print("\n✓ Schema already up to date")
+    finally:
+        conn.close()
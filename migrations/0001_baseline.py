@@ -0,0 +1,93 @@
+"""
+Baseline: schema changes previously applied by init_database() on every boot
+"""
+
+from migrate import add_column_if_missing, modify_column_if_different
+
+
+def upgrade(cursor):
+    # correct_option extended for multi-answer keys
+    modify_column_if_different(cursor, 'questions', 'correct_option', 'varchar(10)', 'VARCHAR(10)')
+
+    # Custom registration fields
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS registration_fields (
+            field_id INT AUTO_INCREMENT PRIMARY KEY,
+            field_name VARCHAR(100) NOT NULL,
+            field_label VARCHAR(200) NOT NULL,
+            field_type ENUM('text', 'email', 'number', 'tel', 'date', 'select', 'textarea') DEFAULT 'text',
+            field_options TEXT,
+            is_required BOOLEAN DEFAULT TRUE,
+            field_order INT DEFAULT 0,
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    cursor.execute("SELECT COUNT(*) FROM registration_fields WHERE field_name IN ('student_name', 'email', 'password', 'phone', 'roll_number')")
+    if cursor.fetchone()[0] == 0:
+        default_fields = [
+            ('student_name', 'Full Name', 'text', None, True, 1),
+            ('email', 'Email Address', 'email', None, True, 2),
+            ('password', 'Password', 'text', None, True, 3),
+            ('phone', 'Phone Number', 'tel', None, False, 4),
+            ('roll_number', 'Roll Number', 'text', None, False, 5)
+        ]
+        cursor.executemany("""
+            INSERT IGNORE INTO registration_fields (field_name, field_label, field_type, field_options, is_required, field_order)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, default_fields)
+
+    # Values of custom registration fields
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS student_custom_data (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            student_id INT NOT NULL,
+            field_name VARCHAR(100) NOT NULL,
+            field_value TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            UNIQUE KEY unique_student_field (student_id, field_name),
+            INDEX idx_student_id (student_id),
+            INDEX idx_field_name (field_name)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    # Course-based scheduling, question papers and exam windows
+    add_column_if_missing(cursor, 'exam', 'courses', "TEXT COMMENT 'Comma-separated course names'")
+    add_column_if_missing(cursor, 'exam', 'question_paper_path', "VARCHAR(500) COMMENT 'Path to uploaded question paper file'")
+    add_column_if_missing(cursor, 'exam', 'start_datetime', "DATETIME COMMENT 'Exam availability start time'")
+    add_column_if_missing(cursor, 'exam', 'end_datetime', "DATETIME COMMENT 'Exam deadline/close time'")
+
+    # Announcements
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS announcements (
+            announcement_id INT AUTO_INCREMENT PRIMARY KEY,
+            title VARCHAR(200) NOT NULL,
+            content TEXT NOT NULL,
+            course VARCHAR(100) COMMENT 'Specific course or NULL for all',
+            is_pinned BOOLEAN DEFAULT FALSE,
+            created_by VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_course (course),
+            INDEX idx_pinned (is_pinned)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS announcement_reads (
+            read_id INT AUTO_INCREMENT PRIMARY KEY,
+            announcement_id INT NOT NULL,
+            student_id INT NOT NULL,
+            read_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (announcement_id) REFERENCES announcements(announcement_id) ON DELETE CASCADE,
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            UNIQUE KEY unique_read (announcement_id, student_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    # Descriptive answers and submission timestamps
+    modify_column_if_different(cursor, 'student_responses', 'selected_option', 'text', 'TEXT')
+    add_column_if_missing(cursor, 'student_responses', 'submitted_at', "TIMESTAMP DEFAULT CURRENT_TIMESTAMP")
@@ -0,0 +1,40 @@
+"""
+Normalized exam-to-course assignment: exam.all_courses flag plus the
+exam_courses(exam_id, course) table, backfilled from exam.courses
+"""
+
+from migrate import add_column_if_missing, add_index_if_missing
+
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'exam', 'all_courses',
+                          "BOOLEAN NOT NULL DEFAULT FALSE COMMENT 'Visible to students of every course'")
+    add_index_if_missing(cursor, 'exam', 'idx_exam_all_courses', 'all_courses, created_at')
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_courses (
+            exam_id INT NOT NULL,
+            course VARCHAR(100) NOT NULL,
+            PRIMARY KEY (course, exam_id),
+            INDEX idx_exam_courses_exam (exam_id),
+            FOREIGN KEY (exam_id) REFERENCES exam(exam_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    # Split the legacy comma-separated strings. NULL, empty or 'All Courses'
+    # meant "every student" in the old LIKE / FIND_IN_SET filter.
+    cursor.execute("SELECT exam_id, courses FROM exam")
+    all_course_exams = []
+    assignments = []
+    for exam_id, courses in cursor.fetchall():
+        names = [name.strip() for name in (courses or '').split(',') if name.strip()]
+        if not names or 'All Courses' in names:
+            all_course_exams.append((exam_id,))
+        else:
+            assignments.extend((exam_id, name) for name in dict.fromkeys(names))
+
+    if all_course_exams:
+        cursor.executemany("UPDATE exam SET all_courses = TRUE WHERE exam_id = %s", all_course_exams)
+    if assignments:
+        cursor.executemany("INSERT IGNORE INTO exam_courses (exam_id, course) VALUES (%s, %s)", assignments)
+    print(f"   ✓ {len(all_course_exams)} exam(s) for all courses, {len(assignments)} course assignment(s) backfilled")
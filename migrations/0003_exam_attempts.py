@@ -0,0 +1,22 @@
+"""
+Server-side exam attempt state: one exam_attempts row per exam start holding
+the shuffle mapping that used to live in the session cookie
+"""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_attempts (
+            attempt_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            student_id INT NOT NULL,
+            exam_id INT NOT NULL,
+            status ENUM('in_progress', 'submitted') NOT NULL DEFAULT 'in_progress',
+            started_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            submitted_at DATETIME NULL,
+            option_mapping JSON NOT NULL COMMENT 'question_id -> correct option letter as shown to the student',
+            INDEX idx_exam_attempts_student_exam (student_id, exam_id),
+            INDEX idx_exam_attempts_exam (exam_id),
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            FOREIGN KEY (exam_id) REFERENCES exam(exam_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
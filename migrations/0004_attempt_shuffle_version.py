@@ -0,0 +1,23 @@
+"""
+Attempts started with the deterministic shuffle record its version instead
+of storing an option mapping (which stays for attempts started earlier)
+"""
+
+from migrate import add_column_if_missing
+
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'exam_attempts', 'shuffle_version',
+                          "SMALLINT NULL COMMENT 'shuffle.SHUFFLE_VERSION; NULL = option_mapping stored' AFTER started_at")
+    # 'json' is the COLUMN_TYPE either way, so check nullability directly
+    cursor.execute("""
+        SELECT IS_NULLABLE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'exam_attempts' AND COLUMN_NAME = 'option_mapping'
+    """)
+    row = cursor.fetchone()
+    if row and row[0] == 'NO':
+        cursor.execute("""
+            ALTER TABLE exam_attempts MODIFY COLUMN option_mapping JSON NULL
+            COMMENT 'Legacy: question_id -> correct option letter as shown to the student'
+        """)
+        print("   ✓ exam_attempts.option_mapping made nullable")
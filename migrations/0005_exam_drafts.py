@@ -0,0 +1,18 @@
+"""
+Autosaved answers: latest draft answer per (attempt, question), written in
+coalesced batches by autosave.py, read back when an attempt is resumed and
+by the grading workers for answers a submitted form lacks
+"""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_drafts (
+            attempt_id BIGINT NOT NULL,
+            question_id INT NOT NULL,
+            answer TEXT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (attempt_id, question_id),
+            FOREIGN KEY (attempt_id) REFERENCES exam_attempts(attempt_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
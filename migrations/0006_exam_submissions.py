@@ -0,0 +1,28 @@
+"""
+Durable submission queue: submit_exam() stores the raw answers here and
+returns; grading workers (submission_queue.py) grade and record results
+"""
+
+
+def upgrade(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS exam_submissions (
+            submission_id BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+            student_id INT NOT NULL,
+            exam_id INT NOT NULL,
+            attempt_id BIGINT NULL,
+            student_name VARCHAR(255) NULL,
+            payload JSON NOT NULL COMMENT 'Raw answers as posted: {"answers": {question_id: value}}',
+            status ENUM('queued', 'grading', 'graded', 'failed') NOT NULL DEFAULT 'queued',
+            tries TINYINT UNSIGNED NOT NULL DEFAULT 0,
+            error TEXT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            claimed_at DATETIME NULL,
+            graded_at DATETIME NULL,
+            UNIQUE KEY uq_exam_submissions_student_exam (student_id, exam_id),
+            INDEX idx_exam_submissions_status (status, submission_id),
+            INDEX idx_exam_submissions_exam (exam_id),
+            FOREIGN KEY (student_id) REFERENCES students(student_id) ON DELETE CASCADE,
+            FOREIGN KEY (exam_id) REFERENCES exam(exam_id) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
@@ -0,0 +1,18 @@
+"""
+Idempotent submits: attempt_exam() issues a per-attempt submission token and
+submit_exam() claims it with one conditional INSERT into exam_submissions;
+a retried or double-clicked submit finds its token already claimed
+"""
+
+from migrate import add_column_if_missing, index_exists
+
+
+def upgrade(cursor):
+    add_column_if_missing(cursor, 'exam_attempts', 'submission_token',
+                          "CHAR(32) NULL COMMENT 'Posted back by the exam form; claimed once by submit_exam' AFTER shuffle_version")
+    add_column_if_missing(cursor, 'exam_submissions', 'submission_token',
+                          "CHAR(32) NULL AFTER attempt_id")
+    for table, index in (('exam_attempts', 'uq_exam_attempts_token'), ('exam_submissions', 'uq_exam_submissions_token')):
+        if not index_exists(cursor, table, index):
+            cursor.execute(f"ALTER TABLE `{table}` ADD UNIQUE KEY `{index}` (submission_token)")
+            print(f"   ✓ index {table}.{index} added")
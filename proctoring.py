@@ -0,0 +1,311 @@
+"""
+Proctoring Face Detection for ATOM SHAALE AMS
+Face detection (base64 + JPEG decode, histogram equalization, Haar face
+and eye passes) takes tens of milliseconds of CPU per frame, which would
+stall every socket and request of an eventlet worker. It runs in a small
+process pool instead:
+- ProctorPool.submit(): non-blocking; at most one frame in flight per
+  socket and PROCTOR_MAX_PENDING overall - frames over that are dropped
+  and the caller is told to slow down (backpressure)
+- Results are handed back through a queue drained by a background task in
+  the web worker, which runs the caller's callback (alerts to the
+  originating socket)
+- load_cascades() / count_verified_faces(): the detection itself, run in
+  the pool processes; OpenCV and NumPy are only imported there
+
+Frames arrive as binary Socket.IO attachments (raw JPEG bytes, decoded
+straight from the received buffer). The capture resolution and JPEG
+quality are set by the server (frame_settings(), sent to the client when
+it connects); the base64 data URLs of older pages are still accepted.
+"""
+
+import os
+import base64
+import queue
+import logging
+import threading
+from multiprocessing import get_context
+
+logger = logging.getLogger(__name__)
+
+PROCTOR_PROCESSES = int(os.getenv('PROCTOR_PROCESSES', 2))         # per web worker; 0 = detect inline
+PROCTOR_MAX_PENDING = int(os.getenv('PROCTOR_MAX_PENDING', 16))    # frames queued or in flight
+PROCTOR_RESULT_POLL = 0.05   # seconds between result-queue drains
+
+PROCTOR_FRAME_WIDTH = int(os.getenv('PROCTOR_FRAME_WIDTH', 480))        # largest capture size asked of clients
+PROCTOR_FRAME_HEIGHT = int(os.getenv('PROCTOR_FRAME_HEIGHT', 360))
+PROCTOR_JPEG_QUALITY = float(os.getenv('PROCTOR_JPEG_QUALITY', 0.7))    # canvas.toBlob() quality, 0-1
+PROCTOR_MAX_FRAME_BYTES = int(os.getenv('PROCTOR_MAX_FRAME_BYTES', 262144))
+MIN_FRAME_WIDTH = 160
+REFERENCE_WIDTH = 640        # frame width the detection thresholds were tuned at
+
+_cascades = None
+_cascades_lock = threading.Lock()
+
+
+def load_cascades():
+    """Face and eye CascadeClassifier, loaded on first call"""
+    global _cascades
+    if _cascades is not None:
+        return _cascades
+    with _cascades_lock:
+        if _cascades is None:
+            import cv2
+            face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+            eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+            if face_cascade.empty() or eye_cascade.empty():
+                raise RuntimeError("Failed to load OpenCV Haar cascades")
+            _cascades = (face_cascade, eye_cascade)
+    return _cascades
+
+
+def cascades_loaded():
+    return _cascades is not None
+
+
+def count_verified_faces(img_bytes):
+    """
+    Enhanced face detection on one webcam frame
+
+    Args:
+        img_bytes: encoded image (JPEG/PNG), any buffer; read in place
+
+    Returns:
+        int: number of verified faces, or None if the frame can't be decoded
+    """
+    import cv2
+    import numpy as np
+
+    face_cascade, eye_cascade = load_cascades()
+
+    nparr = np.frombuffer(img_bytes, np.uint8)
+    img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+
+    # Size thresholds scale with the negotiated resolution
+    scale = img.shape[1] / REFERENCE_WIDTH
+    min_face = max(24, int(80 * scale))
+    large_face_area = 12000 * scale * scale
+
+    # Convert to grayscale for face detection
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    # Apply histogram equalization for better detection in varying lighting
+    gray = cv2.equalizeHist(gray)
+
+    # Improved face detection with optimized parameters
+    # scaleFactor=1.1 (more thorough), minNeighbors=4 (balanced accuracy)
+    # minSize prevents tiny false detections
+    faces = face_cascade.detectMultiScale(
+        gray,
+        scaleFactor=1.1,
+        minNeighbors=4,
+        minSize=(min_face, min_face),  # Minimum face size
+        flags=cv2.CASCADE_SCALE_IMAGE
+    )
+
+    # Enhanced validation: check for eyes within detected faces for higher confidence
+    verified_faces = 0
+    for (x, y, w, h) in faces:
+        roi_gray = gray[y:y+h, x:x+w]
+        eyes = eye_cascade.detectMultiScale(roi_gray, scaleFactor=1.1, minNeighbors=3)
+        # If eyes detected, it's very likely a real face
+        if len(eyes) >= 1:  # At least one eye detected
+            verified_faces += 1
+        else:
+            # Even without eye detection, if face is large enough, count it
+            if w * h > large_face_area:  # Large face area threshold
+                verified_faces += 1
+
+    return verified_faces
+
+
+def frame_settings(offered_width=None, offered_height=None):
+    """
+    Capture settings for one client
+
+    Args:
+        offered_width, offered_height: the client's camera resolution; the
+            frame keeps its aspect ratio and is never scaled up
+
+    Returns:
+        dict: width, height, quality, max_bytes and binary (send raw JPEG)
+    """
+    width, height = PROCTOR_FRAME_WIDTH, PROCTOR_FRAME_HEIGHT
+    try:
+        offered_width, offered_height = int(offered_width), int(offered_height)
+    except (TypeError, ValueError):
+        offered_width = offered_height = 0
+    if offered_width > 0 and offered_height > 0:
+        scale = min(1.0, width / offered_width, height / offered_height)
+        width = max(MIN_FRAME_WIDTH, int(offered_width * scale))
+        height = max(1, int(offered_height * width / offered_width))
+    return {
+        'binary': True,
+        'width': width,
+        'height': height,
+        'quality': PROCTOR_JPEG_QUALITY,
+        'max_bytes': PROCTOR_MAX_FRAME_BYTES,
+    }
+
+
+def frame_payload(frame):
+    """
+    A received frame as accepted by ProctorPool.submit(), or None
+
+    Binary attachments are passed on as received (no copy, no decode); a
+    legacy data URL is only size-checked here and decoded in the pool.
+    """
+    if isinstance(frame, (bytes, bytearray)):
+        size = len(frame)
+    elif isinstance(frame, str):
+        size = len(frame) * 3 // 4
+    else:
+        return None
+    if size == 0 or size > PROCTOR_MAX_FRAME_BYTES:
+        return None
+    return frame
+
+
+def analyze_frame(frame):
+    """
+    Pool entry point: verified face count of one frame
+
+    Args:
+        frame: encoded image bytes, or a data URL ('data:image/jpeg;base64,...')
+    """
+    if isinstance(frame, str):
+        frame = base64.b64decode(frame.split(',', 1)[-1])
+    return count_verified_faces(frame)
+
+
+def _init_pool_process():
+    load_cascades()
+
+
+class ProctorPool:
+    """Bounded process pool for frame analysis with asynchronous result delivery"""
+
+    def __init__(self, processes=PROCTOR_PROCESSES, max_pending=PROCTOR_MAX_PENDING):
+        self.processes = processes
+        self.max_pending = max(1, max_pending)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = set()     # keys (socket ids) with a frame being analyzed
+        self._results = queue.Queue()
+        self._running = False
+        self._submitted = 0
+        self._completed = 0
+        self._dropped_busy = 0      # caller already had a frame in flight
+        self._dropped_full = 0      # pool at max_pending
+        self._errors = 0
+
+    def start(self, spawn, sleep):
+        """
+        Start delivering results (once per process, after fork)
+
+        Args:
+            spawn: background task starter (socketio.start_background_task)
+            sleep: cooperative sleep of the server (socketio.sleep)
+        """
+        if self._running:
+            return
+        self._running = True
+        spawn(self._deliver, sleep)
+
+    def _get_executor(self):
+        if self._executor is None:
+            from concurrent.futures import ProcessPoolExecutor
+            # spawn: children must not inherit the web worker's sockets, hub or pool
+            self._executor = ProcessPoolExecutor(max_workers=self.processes, mp_context=get_context('spawn'),
+                                                 initializer=_init_pool_process)
+        return self._executor
+
+    def submit(self, key, frame, callback):
+        """
+        Queue one frame for analysis
+
+        Args:
+            key: caller identity; a caller gets one frame in flight at a time
+            frame: encoded image bytes or data URL (see frame_payload())
+            callback: callback(face_count or None) run by the result task
+
+        Returns:
+            'queued', 'busy' (previous frame of `key` still in flight) or
+            'full' (pool at capacity)
+        """
+        with self._lock:
+            if key in self._in_flight:
+                self._dropped_busy += 1
+                return 'busy'
+            if self._pending >= self.max_pending:
+                self._dropped_full += 1
+                return 'full'
+            self._pending += 1
+            self._in_flight.add(key)
+            self._submitted += 1
+
+        if self.processes <= 0:
+            self._finish(key, callback, self._run_inline, frame)
+            return 'queued'
+        try:
+            future = self._get_executor().submit(analyze_frame, frame)
+        except Exception as err:
+            logger.error("Proctoring pool unavailable: %s", err)
+            self._executor = None   # a broken pool is rebuilt on the next frame
+            self._finish(key, callback, lambda f: None, frame)
+            return 'queued'
+        future.add_done_callback(lambda done: self._finish(key, callback, self._future_result, done))
+        return 'queued'
+
+    def _run_inline(self, frame):
+        return analyze_frame(frame)
+
+    def _future_result(self, future):
+        return future.result()
+
+    def _finish(self, key, callback, get_result, source):
+        # Runs in the executor's management thread: only hand the result over
+        try:
+            face_count = get_result(source)
+        except Exception as err:
+            self._errors += 1
+            logger.warning("Frame analysis failed: %s", err)
+            face_count = None
+        with self._lock:
+            self._pending -= 1
+            self._in_flight.discard(key)
+            self._completed += 1
+        self._results.put((callback, face_count))
+
+    def _deliver(self, sleep):
+        while self._running:
+            while True:
+                try:
+                    callback, face_count = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback(face_count)
+                except Exception as err:
+                    logger.error("Proctoring result handler failed: %s", err)
+            sleep(PROCTOR_RESULT_POLL)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'processes': self.processes,
+                'max_pending': self.max_pending,
+                'pending': self._pending,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'dropped_busy': self._dropped_busy,
+                'dropped_full': self._dropped_full,
+                'errors': self._errors,
+                'pid': os.getpid(),
+            }
+
+
+proctor_pool = ProctorPool()
@@ -0,0 +1,76 @@
+"""
+Paged Question Delivery for ATOM SHAALE AMS
+attempt_exam() sends the exam shell with only the first page of the
+student's shuffled questions; the page fetches the rest from the JSON
+question API one page at a time, prefetching the next page while the
+current one is answered. Time to first question depends on the page size,
+not on the length of the exam.
+
+Payloads are compact and never include the correct option or explanation:
+    {"id": 12, "n": 3, "type": "mcq", "text": "...",
+     "options": [["A", "..."], ["B", "..."]],              (mcq / image_mcq)
+     "media": {"url": "/static/...", "kind": "image"}}     (when present)
+"""
+
+import os
+
+QUESTION_PAGE_SIZE = int(os.getenv('QUESTION_PAGE_SIZE', 10))
+
+VIDEO_EXTENSIONS = ('.mp4', '.webm', '.avi', '.mov')
+
+# Columns of exam_statements.ATTEMPT_QUESTIONS rows
+_ID, _TEXT, _TYPE, _OPTIONS, _MEDIA = 0, 2, 3, slice(4, 8), 10
+
+
+def static_path(media_path):
+    """media_path as stored ('static/uploads/x.png', Windows separators allowed) -> path under static/"""
+    return media_path.replace('static\\', '').replace('static/', '').replace('\\', '/')
+
+
+def question_payload(row, number, static_url):
+    """
+    JSON-ready dict for one (shuffled) question row
+
+    Args:
+        row: ATTEMPT_QUESTIONS row, options already in the student's order
+        number: 1-based position in the student's exam
+        static_url: callable(path under static/) -> URL
+    """
+    question_type = row[_TYPE] or 'mcq'
+    payload = {'id': row[_ID], 'n': number, 'type': question_type, 'text': row[_TEXT]}
+    if question_type not in ('true_false', 'descriptive', 'video_response'):
+        options = row[_OPTIONS]
+        # A and B are always shown; C and D only when set
+        payload['options'] = [[letter, text or ''] for letter, text in zip('ABCD', options)
+                              if letter in 'AB' or text]
+    media_path = row[_MEDIA]
+    if media_path:
+        kind = ('video' if question_type == 'video_mcq' and media_path.lower().endswith(VIDEO_EXTENSIONS)
+                else 'image')
+        payload['media'] = {'url': static_url(static_path(media_path)), 'kind': kind}
+    return payload
+
+
+def page_count(total, page_size=None):
+    page_size = page_size or QUESTION_PAGE_SIZE
+    return max(1, -(-total // page_size))
+
+
+def question_page(questions, page, static_url, page_size=None):
+    """
+    One page of a student's shuffled questions
+
+    Args:
+        questions: every shuffled ATTEMPT_QUESTIONS row of the attempt
+        page: 1-based page number (out-of-range pages are empty)
+    """
+    page_size = page_size or QUESTION_PAGE_SIZE
+    start = (page - 1) * page_size
+    rows = questions[start:start + page_size] if page >= 1 else []
+    return {
+        'page': page,
+        'pages': page_count(len(questions), page_size),
+        'page_size': page_size,
+        'total': len(questions),
+        'questions': [question_payload(row, start + i + 1, static_url) for i, row in enumerate(rows)],
+    }
@@ -0,0 +1,219 @@
+"""
+Bulk Regrade for ATOM SHAALE AMS
+Recomputes student_responses.is_correct and student_performance for a whole
+exam after its answer key changes, set-based instead of per student:
+1. One streaming read of every response of the exam
+2. One vectorized grading pass over the (students x questions) matrix
+   (grading.py), with each student's shuffle rebuilt from their attempt
+3. Changed rows are loaded into temporary tables and written back with two
+   UPDATE ... JOIN statements in one transaction
+
+Students whose option layout cannot be rebuilt (exams taken before the
+deterministic shuffle) are left untouched and reported as skipped.
+The connection needs the CREATE TEMPORARY TABLES privilege.
+
+Usage:
+    python regrade.py --exam-id 12
+"""
+
+import os
+import sys
+import time
+from collections import namedtuple
+
+from grading import AnswerKey, UNANSWERED, encode_answer, grade
+from shuffle import SHUFFLE_VERSION, attempt_seed, shuffle_exam
+from exam_statements import ATTEMPT_QUESTIONS
+from db_prepared import statement_sql
+
+REGRADE_FETCH_SIZE = 5000     # rows per fetchmany() of the streaming read
+REGRADE_WRITE_BATCH = 1000    # rows per multi-row INSERT into the temp tables
+
+RegradeReport = namedtuple('RegradeReport', [
+    'exam_id', 'students', 'skipped_students', 'responses',
+    'changed_responses', 'changed_scores', 'duration',
+])
+
+
+def _insert_rows(cursor, table, columns, rows):
+    """Multi-row INSERT in REGRADE_WRITE_BATCH chunks"""
+    placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    for start in range(0, len(rows), REGRADE_WRITE_BATCH):
+        batch = rows[start:start + REGRADE_WRITE_BATCH]
+        cursor.execute(f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ', '.join([placeholder] * len(batch)),
+                       [value for row in batch for value in row])
+
+
+def regrade_exam(conn, exam_id, secret, progress=None):
+    """
+    Regrade every submission of an exam against its current answer key
+
+    Args:
+        conn: database connection (committed on success, rolled back on error)
+        exam_id: exam to regrade
+        secret: shuffle secret the attempts were started with (SHUFFLE_SECRET)
+        progress: optional callback(stage, done, total)
+
+    Returns:
+        RegradeReport
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    report = progress or (lambda stage, done, total: None)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(statement_sql(ATTEMPT_QUESTIONS), (exam_id,))
+        questions = [tuple(row) for row in cursor.fetchall()]
+        key = AnswerKey((q[0] for q in questions), (q[3] for q in questions), (q[8] for q in questions))
+        columns = {question_id: i for i, question_id in enumerate(key.question_ids)}
+
+        # Submitted students, their current totals and the attempt each one was graded with
+        cursor.execute("""
+            SELECT p.student_id, p.total_questions, p.correct_answers, MAX(a.attempt_id)
+            FROM student_performance p
+            LEFT JOIN exam_attempts a
+                   ON a.student_id = p.student_id AND a.exam_id = p.exam_id
+                  AND a.status = 'submitted' AND a.shuffle_version = %s
+            WHERE p.exam_id = %s
+            GROUP BY p.student_id, p.total_questions, p.correct_answers
+        """, (SHUFFLE_VERSION, exam_id))
+        submitted = cursor.fetchall()
+        regradable = [row for row in submitted if row[3] is not None]
+        skipped = len(submitted) - len(regradable)
+        student_ids = [row[0] for row in regradable]
+        rows = {student_id: i for i, student_id in enumerate(student_ids)}
+
+        answers = np.full((len(student_ids), len(key)), UNANSWERED, dtype=np.int8)
+        stored = np.zeros((len(student_ids), len(key)), dtype=bool)     # current is_correct
+        has_row = np.zeros((len(student_ids), len(key)), dtype=bool)    # student_responses row exists
+
+        # ---- 1. streaming read ----
+        cursor.execute("""
+            SELECT student_id, question_id, selected_option, is_correct
+            FROM student_responses
+            WHERE exam_id = %s
+        """, (exam_id,))
+        encoded = {}
+        responses = 0
+        while True:
+            batch = cursor.fetchmany(REGRADE_FETCH_SIZE)
+            if not batch:
+                break
+            for student_id, question_id, selected_option, is_correct in batch:
+                row = rows.get(student_id)
+                column = columns.get(question_id)
+                if row is None or column is None or not key.graded[column]:
+                    continue
+                question_type = key.question_types[column]
+                code = encoded.get((question_type, selected_option))
+                if code is None:
+                    code = encoded[(question_type, selected_option)] = encode_answer(question_type, selected_option)
+                answers[row, column] = code
+                stored[row, column] = bool(is_correct)
+                has_row[row, column] = True
+            responses += len(batch)
+            report('read', responses, None)
+
+        # ---- 2. vectorized grading ----
+        key_codes = np.empty_like(answers)
+        for row, (student_id, _, _, attempt_id) in enumerate(regradable):
+            layout = shuffle_exam(questions, attempt_seed(student_id, exam_id, attempt_id, secret))
+            key_codes[row] = key.mapped_codes(layout.mapping)
+            if (row + 1) % 500 == 0 or row + 1 == len(student_ids):
+                report('grade', row + 1, len(student_ids))
+        result = grade(key, answers, key_codes)
+
+        changed = has_row & key.graded & (result.correct != stored)
+        changed_rows, changed_columns = np.nonzero(changed)
+        response_updates = [(student_ids[r], key.question_ids[c], int(result.correct[r, c]))
+                            for r, c in zip(changed_rows, changed_columns)]
+        score_updates = [(student_id, len(questions), int(result.correct_count[r]),
+                          int(result.incorrect_count[r]), round(float(result.score[r]), 2))
+                         for r, (student_id, total_questions, correct_answers, _) in enumerate(regradable)
+                         if total_questions != len(questions) or correct_answers != result.correct_count[r]]
+
+        pending = len(response_updates) + len(score_updates)
+
+        # ---- 3. set-based write-back ----
+        conn.rollback()   # end the read snapshot; the writes get their own transaction
+        if pending:
+            cursor.execute("""
+                CREATE TEMPORARY TABLE IF NOT EXISTS regrade_responses (
+                    student_id INT NOT NULL, question_id INT NOT NULL, is_correct BOOLEAN NOT NULL,
+                    PRIMARY KEY (student_id, question_id)
+                ) ENGINE=InnoDB
+            """)
+            cursor.execute("""
+                CREATE TEMPORARY TABLE IF NOT EXISTS regrade_scores (
+                    student_id INT NOT NULL PRIMARY KEY, total_questions INT NOT NULL,
+                    correct_answers INT NOT NULL, incorrect_answers INT NOT NULL, score DECIMAL(5,2) NOT NULL
+                ) ENGINE=InnoDB
+            """)
+            # Autocommit is off: everything from here to commit() is one transaction
+            cursor.execute("DELETE FROM regrade_responses")
+            cursor.execute("DELETE FROM regrade_scores")
+            _insert_rows(cursor, 'regrade_responses', ('student_id', 'question_id', 'is_correct'), response_updates)
+            _insert_rows(cursor, 'regrade_scores',
+                         ('student_id', 'total_questions', 'correct_answers', 'incorrect_answers', 'score'),
+                         score_updates)
+            report('write', 0, pending)
+            cursor.execute("""
+                UPDATE student_responses r
+                JOIN regrade_responses t ON t.student_id = r.student_id AND t.question_id = r.question_id
+                SET r.is_correct = t.is_correct
+                WHERE r.exam_id = %s
+            """, (exam_id,))
+            cursor.execute("""
+                UPDATE student_performance p
+                JOIN regrade_scores t ON t.student_id = p.student_id
+                SET p.total_questions = t.total_questions,
+                    p.correct_answers = t.correct_answers,
+                    p.incorrect_answers = t.incorrect_answers,
+                    p.score = t.score
+                WHERE p.exam_id = %s
+            """, (exam_id,))
+            conn.commit()
+            cursor.execute("DROP TEMPORARY TABLE IF EXISTS regrade_responses, regrade_scores")
+            report('write', pending, pending)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+    return RegradeReport(exam_id, len(student_ids), skipped, responses, len(response_updates),
+                         len(score_updates), time.perf_counter() - started)
+
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+    from db_drivers import get_driver
+    from db_pool import load_db_config
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Regrade every submission of an exam against its current answer key")
+    parser.add_argument('--exam-id', type=int, required=True)
+    args = parser.parse_args()
+
+    secret = os.getenv('SHUFFLE_SECRET') or os.getenv('SECRET_KEY')
+    if not secret:
+        print("❌ SHUFFLE_SECRET or SECRET_KEY must match the running app's to rebuild shuffles")
+        sys.exit(1)
+
+    def progress(stage, done, total):
+        print(f"   {stage}: {done}" + (f"/{total}" if total else ""), flush=True)
+
+    conn = get_driver().connect(load_db_config())
+    try:
+        report = regrade_exam(conn, args.exam_id, secret, progress)
+    finally:
+        conn.close()
+    print(f"✓ Exam {report.exam_id}: {report.students} submissions regraded in {report.duration:.2f}s "
+          f"({report.responses} responses read, {report.changed_responses} changed, "
+          f"{report.changed_scores} scores updated, {report.skipped_students} skipped)")
+
+
+if __name__ == '__main__':
+    main()
@@ -222,6 +222,23 @@ def init_security(app):
     return limiter, csrf
 
 
+def reset_limiter_storage(limiter):
+    """
+    Drop rate-limit storage connections inherited from a preloading master
+    
+    Call in each worker after fork so workers never share a Redis socket.
+    No-op for in-memory storage and the dummy limiter.
+    """
+    try:
+        storage = limiter.storage
+    except (AttributeError, AssertionError):
+        return
+    client = getattr(storage, 'storage', None)
+    connection_pool = getattr(client, 'connection_pool', None)
+    if connection_pool is not None:
+        connection_pool.reset()
+
+
 # ============================================================================
 # INPUT SANITIZATION FUNCTIONS
 # ============================================================================
@@ -0,0 +1,215 @@
+"""
+Shared Cache Tier for ATOM SHAALE AMS
+Cross-worker / cross-host L2 store under the per-process LRU caches in
+app_cache.py:
+- CACHE_URL selects the store: redis://... in production, memory:// for a
+  single process (default), fakeredis:// for tests (fakeredis package)
+- Versioned keys: values live under their key's current version token; an
+  invalidation writes a new token, so a load that raced a write can only
+  fill a key nobody reads any more
+- Pub/sub: invalidations are published on one channel and every process
+  drops its L1 copy when the message arrives
+
+Store errors never fail a request: callers fall back to the database.
+"""
+
+import os
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ams:cache:v1'    # bump the version when cached value layouts change
+CHANNEL = 'ams:cache:invalidate'
+SEPARATOR = '|'
+
+LISTEN_POLL_SECONDS = 1.0      # pub/sub wait per get_message(); an idle channel is not an error
+RECONNECT_DELAY = 1.0          # first retry after a lost pub/sub connection, doubling up to 30s
+MAX_RECONNECT_DELAY = 30.0
+
+
+class StoreError(Exception):
+    """Shared store unreachable or misbehaving"""
+
+
+# ============================================================================
+# STORES
+# ============================================================================
+
+class MemoryStore:
+    """Process-local stand-in with the subset of the Redis API used here"""
+
+    name = 'memory'
+
+    def __init__(self):
+        self._data = {}   # key -> (value, expires_at or None)
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and key in self._data:
+                return False
+            self._data[key] = (value, time.monotonic() + ex if ex else None)
+            return True
+
+    def publish(self, channel, message):
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def listen(self, channel, callback, on_reconnect=None):
+        self._subscribers.append(callback)
+
+
+class RedisStore:
+    """Redis (or fakeredis) client with a background pub/sub listener"""
+
+    def __init__(self, client, name='redis'):
+        self.client = client
+        self.name = name
+
+    def _call(self, method, *args, **kwargs):
+        try:
+            return getattr(self.client, method)(*args, **kwargs)
+        except Exception as err:
+            raise StoreError(f"{self.name} {method} failed: {err}") from err
+
+    def get(self, key):
+        return self._call('get', key)
+
+    def set(self, key, value, ex=None, nx=False):
+        return self._call('set', key, value, ex=int(ex) if ex else None, nx=nx)
+
+    def publish(self, channel, message):
+        return self._call('publish', channel, message)
+
+    def listen(self, channel, callback, on_reconnect=None):
+        """
+        Deliver channel messages to callback from a daemon thread, reconnecting forever
+
+        Polls with get_message(timeout=...) rather than pubsub.listen(): the
+        client's short socket_timeout would otherwise turn every quiet
+        moment on the channel into a "disconnect". on_reconnect runs only
+        after a real connection error, once subscribed again.
+        """
+        def run():
+            delay = RECONNECT_DELAY
+            lost = False
+            while True:
+                pubsub = None
+                try:
+                    pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(channel)
+                    if lost and on_reconnect:
+                        on_reconnect()   # messages may have been missed while disconnected
+                    lost = False
+                    delay = RECONNECT_DELAY
+                    while True:
+                        message = pubsub.get_message(timeout=LISTEN_POLL_SECONDS)
+                        if message is None:
+                            continue
+                        data = message.get('data')
+                        try:
+                            callback(data.decode() if isinstance(data, bytes) else data)
+                        except Exception as err:
+                            logger.error("Cache invalidation handler failed: %s", err)
+                except Exception as err:
+                    lost = True
+                    logger.warning("Cache invalidation listener (%s) reconnecting in %.0fs: %s", self.name, delay, err)
+                    if pubsub is not None:
+                        try:
+                            pubsub.close()
+                        except Exception:
+                            pass
+                    time.sleep(delay)
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+        thread = threading.Thread(target=run, name='cache-invalidation', daemon=True)
+        thread.start()
+        return thread
+
+
+def create_store(url=None):
+    """Build the shared store named by CACHE_URL"""
+    url = url or os.getenv('CACHE_URL', 'memory://')
+    if url.startswith('memory://'):
+        return MemoryStore()
+    if url.startswith('fakeredis://'):
+        import fakeredis
+        return RedisStore(fakeredis.FakeRedis(), name='fakeredis')
+    import redis
+    client = redis.Redis.from_url(
+        url,
+        socket_timeout=float(os.getenv('CACHE_SOCKET_TIMEOUT', 0.5)),
+        socket_connect_timeout=float(os.getenv('CACHE_SOCKET_TIMEOUT', 0.5)),
+        health_check_interval=30,   # pings the idle pub/sub connection so a dead one is noticed
+    )
+    return RedisStore(client)
+
+
+# ============================================================================
+# PROCESS-WIDE STORE
+# ============================================================================
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Shared store for this process (a forked child builds its own client)"""
+    global _store, _store_pid
+    if _store is not None and _store_pid == os.getpid():
+        return _store
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = create_store()
+            _store_pid = os.getpid()
+    return _store
+
+
+def version_key(namespace, key):
+    return f"{KEY_PREFIX}:{namespace}:{key}:ver"
+
+
+def value_key(namespace, key, version):
+    return f"{KEY_PREFIX}:{namespace}:{key}:{version}"
+
+
+def new_version():
+    # Unique across processes and hosts; never reused, unlike a counter that
+    # restarts at 0 when Redis evicts it
+    return f"{time.time_ns():x}.{os.getpid():x}"
+
+
+def current_version(store, namespace, key):
+    version = store.get(version_key(namespace, key))
+    if version is None:
+        store.set(version_key(namespace, key), new_version(), nx=True)
+        version = store.get(version_key(namespace, key))
+    return version.decode() if isinstance(version, bytes) else version
+
+
+def bump_version(store, namespace, key):
+    store.set(version_key(namespace, key), new_version())
+    store.publish(CHANNEL, f"{namespace}{SEPARATOR}{key}")
+
+
+def parse_message(message):
+    """(namespace, key) from an invalidation message, or None"""
+    if not message or SEPARATOR not in message:
+        return None
+    namespace, key = message.split(SEPARATOR, 1)
+    return namespace, key
@@ -0,0 +1,111 @@
+"""
+Deterministic Exam Shuffle for ATOM SHAALE AMS
+Question order and option permutations are derived from a keyed hash of
+(student_id, exam_id, attempt_id) instead of random.shuffle, so they never
+need to be stored: submit_exam() and regrades recompute the mapping.
+- attempt_seed(): HMAC-SHA256 over the attempt, keyed with the app secret
+- shuffle_exam(): order + permutations for a whole exam in one NumPy pass
+- Per-question keys come from the question_id (not its position), so adding
+  or removing a question doesn't change the other questions' options
+
+Keys are plain splitmix64 arithmetic rather than a NumPy Generator stream,
+whose output may change between NumPy releases. Bump SHUFFLE_VERSION if the
+derivation ever changes; attempts record the version they were started with.
+"""
+
+import hmac
+import hashlib
+from collections import namedtuple
+
+SHUFFLE_VERSION = 1
+
+# Question types whose options are shuffled (when they have 2+ options and a
+# letter answer; true/false stores 'True'/'False' and keeps its layout)
+SHUFFLED_TYPES = ('mcq', 'image_mcq', 'true_false')
+LETTERS = 'ABCD'
+
+# Columns of an attempt question row (exam_statements.ATTEMPT_QUESTIONS)
+Q_ID, Q_TYPE, Q_OPTIONS, Q_CORRECT = 0, 3, slice(4, 8), 8
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_UINT64_MAX = 0xFFFFFFFFFFFFFFFF
+
+ExamShuffle = namedtuple('ExamShuffle', ['order', 'permutations', 'mapping'])
+
+
+def attempt_seed(student_id, exam_id, attempt_id, secret):
+    """64-bit seed for one attempt; unpredictable without the secret"""
+    if isinstance(secret, str):
+        secret = secret.encode()
+    message = f"{SHUFFLE_VERSION}:{student_id}:{exam_id}:{attempt_id}".encode()
+    return int.from_bytes(hmac.new(secret, message, hashlib.sha256).digest()[:8], 'big')
+
+
+def _mix(np, x):
+    """splitmix64 finalizer over a uint64 array (wrapping arithmetic)"""
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def shuffle_exam(questions, seed):
+    """
+    Shuffle layout for an exam
+
+    Args:
+        questions: attempt question rows, as in ExamSnapshot.questions
+        seed: attempt_seed() of the attempt
+
+    Returns:
+        ExamShuffle(order, permutations, mapping):
+        order - row indices of `questions` in display order
+        permutations - (n, 4) array; row i lists the original option column
+            shown at positions A-D for questions[i] (unused slots last)
+        mapping - {str(question_id): correct option as displayed}
+    """
+    import numpy as np
+
+    n = len(questions)
+    qids = np.fromiter((q[Q_ID] for q in questions), dtype=np.uint64, count=n)
+    question_keys = _mix(np, qids * np.uint64(_GOLDEN) ^ np.uint64(seed))
+    order = np.argsort(question_keys, kind='stable')
+
+    present = np.array([[bool(option) for option in q[Q_OPTIONS]] for q in questions], dtype=bool).reshape(n, 4)
+    correct = np.array([LETTERS.find((q[Q_CORRECT] or '').strip().upper()) if q[Q_CORRECT] else -1
+                        for q in questions], dtype=np.int64)
+    shuffled = (
+        np.array([(q[Q_TYPE] or 'mcq') in SHUFFLED_TYPES for q in questions], dtype=bool)
+        & (present.sum(axis=1) >= 2)
+        & (correct >= 0)
+        & present[np.arange(n), np.clip(correct, 0, 3)]
+    )
+
+    option_keys = _mix(np, question_keys[:, None] + np.arange(1, 5, dtype=np.uint64) * np.uint64(_GOLDEN))
+    option_keys[~present] = np.uint64(_UINT64_MAX)
+    # Unshuffled questions keep their original layout
+    option_keys[~shuffled] = np.arange(4, dtype=np.uint64)
+    permutations = np.argsort(option_keys, axis=1, kind='stable')
+
+    # Displayed position of the originally-correct column
+    new_correct = np.argmax(permutations == np.clip(correct, 0, 3)[:, None], axis=1)
+
+    mapping = {}
+    for i, q in enumerate(questions):
+        mapping[str(q[Q_ID])] = LETTERS[new_correct[i]] if shuffled[i] else q[Q_CORRECT]
+    return ExamShuffle(order, permutations, mapping)
+
+
+def shuffled_questions(questions, layout):
+    """Question rows in display order with options and correct letter rearranged"""
+    rows = []
+    for i in layout.order:
+        q = questions[i]
+        options = q[Q_OPTIONS]
+        permutation = layout.permutations[i]
+        row = list(q)
+        row[Q_OPTIONS] = [options[column] if options[column] else None for column in permutation]
+        row[Q_CORRECT] = layout.mapping[str(q[Q_ID])]
+        rows.append(tuple(row))
+    return rows
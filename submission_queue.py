@@ -0,0 +1,550 @@
+"""
+Submission Queue for ATOM SHAALE AMS
+Accept-then-grade exam submission, so the end-of-exam rush costs one INSERT
+per student instead of a full grading transaction:
+- claim_submission(): submit_exam() stores the raw answers in
+  exam_submissions and redirects immediately; the attempt's submission token
+  is claimed by the same conditional INSERT, so a retried submit is answered
+  from submission_for_token() without queueing anything
+- GradingWorkers: background tasks that claim queued submissions in batches
+  (FOR UPDATE SKIP LOCKED, so any number of workers and processes can drain
+  the same queue), grade them with grading.py and record every result of the
+  batch with a handful of multi-row statements in one transaction; the posted
+  answers are authoritative, and drafts saved before the submission only fill
+  questions the form lacks
+- submission_result(): what exam_result shows - the score, or "grading..."
+
+A submission that fails to grade is retried up to GRADING_MAX_TRIES times;
+claims held by a worker that died are released after GRADING_CLAIM_TIMEOUT.
+A submission that still fails stays 'failed' - and keeps the exam taken - until
+an admin requeues it (/admin/grading_queue/requeue, or --requeue-failed).
+Results are written only while the claim is still the worker's own (status
+and tries unchanged since it claimed), so a slow worker whose claim was
+released and taken over cannot record the same submission a second time.
+
+Usage (dedicated grading process, in addition to the in-app workers):
+    python submission_queue.py --workers 4
+    python submission_queue.py --requeue-failed [--submission-id 12 ...]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+
+from grading import AnswerKey, grade
+from shuffle import SHUFFLE_VERSION, attempt_seed, shuffle_exam
+from exam_responses import insert_responses
+from exam_attempts import mark_submitted
+from exam_statements import ATTEMPT_QUESTIONS
+from db_prepared import statement_sql
+
+logger = logging.getLogger(__name__)
+
+GRADING_WORKERS = int(os.getenv('GRADING_WORKERS', 2))           # per app process
+GRADING_BATCH_SIZE = int(os.getenv('GRADING_BATCH_SIZE', 50))     # submissions claimed at once
+GRADING_POLL_INTERVAL = float(os.getenv('GRADING_POLL_INTERVAL', 1))
+GRADING_MAX_TRIES = int(os.getenv('GRADING_MAX_TRIES', 3))
+GRADING_CLAIM_TIMEOUT = int(os.getenv('GRADING_CLAIM_TIMEOUT', 300))
+
+# MySQL: "Duplicate entry ... for key ..."
+ER_DUP_ENTRY = 1062
+
+MIN_DESCRIPTIVE_LENGTH = 10   # shorter descriptive answers are not stored
+
+Submission = namedtuple('Submission', ['submission_id', 'student_id', 'exam_id', 'attempt_id',
+                                       'student_name', 'payload', 'tries'])
+GradedSubmission = namedtuple('GradedSubmission', ['submission', 'responses', 'performance'])
+SubmissionResult = namedtuple('SubmissionResult', ['status', 'exam_title', 'total_questions',
+                                                   'correct_answers', 'incorrect_answers', 'score'])
+
+
+def _placeholders(count, row):
+    return ', '.join([row] * count)
+
+
+# ============================================================================
+# REQUEST SIDE
+# ============================================================================
+
+def _payload(answers, option_mapping=None):
+    payload = {'answers': {str(question_id): value for question_id, value in answers.items()}}
+    if option_mapping:
+        payload['option_mapping'] = option_mapping
+    return json.dumps(payload)
+
+
+def submission_for_token(cursor, student_id, token):
+    """exam_id of the submission that already claimed `token`, or None (submit fast path)"""
+    cursor.execute("""
+        SELECT exam_id FROM exam_submissions
+        WHERE submission_token = %s AND student_id = %s
+    """, (token, student_id))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def claim_submission(cursor, student_id, student_name, exam_id, token, answers):
+    """
+    Queue a submission by claiming its attempt's token (inside the caller's transaction)
+
+    One INSERT ... SELECT: nothing is written unless the token belongs to
+    one of this student's attempts at the exam (the token, not the session,
+    identifies the attempt), and the unique token/student-exam keys make a
+    second claim fail instead of queueing the exam twice.
+
+    Returns:
+        submission_id, or None if the token does not match the attempt
+
+    Raises:
+        mysql.connector.IntegrityError (errno ER_DUP_ENTRY) if the token was
+        already claimed or the student already submitted this exam
+    """
+    cursor.execute("""
+        INSERT INTO exam_submissions (student_id, exam_id, attempt_id, submission_token, student_name, payload)
+        SELECT student_id, exam_id, attempt_id, submission_token, %s, %s
+        FROM exam_attempts
+        WHERE submission_token = %s AND student_id = %s AND exam_id = %s
+    """, (student_name, _payload(answers), token, student_id, exam_id))
+    return cursor.lastrowid if cursor.rowcount == 1 else None
+
+
+def enqueue_submission(cursor, student_id, student_name, exam_id, attempt_id, answers, option_mapping=None):
+    """
+    Queue a submission without a token (forms rendered before tokens existed)
+
+    Args:
+        answers: {question_id: raw posted value}
+        option_mapping: stored mapping of an attempt started before
+            exam_attempts existed (otherwise derived from the attempt)
+
+    Raises:
+        mysql.connector.IntegrityError (errno ER_DUP_ENTRY) if the student
+        already submitted this exam
+    """
+    cursor.execute("""
+        INSERT INTO exam_submissions (student_id, exam_id, attempt_id, student_name, payload)
+        VALUES (%s, %s, %s, %s, %s)
+    """, (student_id, exam_id, attempt_id, student_name, _payload(answers, option_mapping)))
+    return cursor.lastrowid
+
+
+def submission_result(cursor, student_id, exam_id):
+    """SubmissionResult of a student's exam, or None if there is neither a result nor a queued submission"""
+    cursor.execute("""
+        SELECT e.exam_title, s.status, p.total_questions, p.correct_answers, p.incorrect_answers, p.score
+        FROM exam e
+        LEFT JOIN exam_submissions s ON s.exam_id = e.exam_id AND s.student_id = %s
+        LEFT JOIN student_performance p ON p.exam_id = e.exam_id AND p.student_id = %s
+        WHERE e.exam_id = %s
+    """, (student_id, student_id, exam_id))
+    row = cursor.fetchone()
+    if not row or (row[1] is None and row[2] is None):
+        return None
+    exam_title, status, total_questions, correct_answers, incorrect_answers, score = row
+    if total_questions is not None and status in (None, 'graded'):
+        return SubmissionResult('graded', exam_title, total_questions, correct_answers,
+                                incorrect_answers, float(score or 0))
+    return SubmissionResult(status, exam_title, None, None, None, None)
+
+
+# ============================================================================
+# GRADING
+# ============================================================================
+
+def grade_submission(submission, questions, option_mapping, drafts):
+    """
+    Grade one submission against the exam's questions
+
+    Returns:
+        GradedSubmission with student_responses rows (exam_responses column
+        order) and the student_performance row
+    """
+    student_id, exam_id = submission.student_id, submission.exam_id
+    posted = submission.payload.get('answers', {})
+    if not isinstance(posted, dict):
+        raise ValueError(f"submission {submission.submission_id}: answers is not an object")
+
+    def submitted_answer(question_id):
+        # The posted form is authoritative for every question it carries (a cleared answer stays
+        # blank); drafts only fill the ones it doesn't, e.g. a form rendered before drafts existed
+        if str(question_id) in posted:
+            return (posted[str(question_id)] or '').strip()
+        return (drafts.get(question_id) or '').strip()
+
+    key = AnswerKey.from_questions([(q[0], q[3], q[8]) for q in questions], option_mapping)
+    raw_answers = {question_id: submitted_answer(question_id)
+                   for question_id, graded in zip(key.question_ids, key.graded) if graded}
+    result = grade(key, key.encode(raw_answers))
+
+    responses = []
+    for i, question_id in enumerate(key.question_ids):
+        question_type = key.question_types[i]
+        if question_type == 'video_response':
+            continue   # stored by the video upload
+        if question_type == 'descriptive':
+            text_answer = submitted_answer(question_id)
+            if len(text_answer) >= MIN_DESCRIPTIVE_LENGTH:
+                responses.append((student_id, exam_id, question_id, text_answer, None, 'descriptive'))
+            elif not text_answer:
+                responses.append((student_id, exam_id, question_id, None, None, 'descriptive'))
+        elif result.answered[i]:
+            responses.append((student_id, exam_id, question_id, raw_answers[question_id],
+                              int(result.correct[i]), question_type))
+        else:
+            responses.append((student_id, exam_id, question_id, None, 0, question_type))
+
+    performance = (submission.student_name, student_id, exam_id, len(questions),
+                   result.correct_count, result.incorrect_count, round(result.score, 2))
+    return GradedSubmission(submission, responses, performance)
+
+
+def _claim(conn, batch_size):
+    """Release stale claims, then claim up to batch_size queued submissions"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE exam_submissions SET status = 'queued'
+            WHERE status = 'grading' AND claimed_at < NOW() - INTERVAL %s SECOND
+        """, (GRADING_CLAIM_TIMEOUT,))
+        cursor.execute("""
+            SELECT submission_id, student_id, exam_id, attempt_id, student_name, payload, tries
+            FROM exam_submissions
+            WHERE status = 'queued'
+            ORDER BY submission_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (batch_size,))
+        rows = cursor.fetchall()
+        if rows:
+            cursor.execute(f"""
+                UPDATE exam_submissions SET status = 'grading', claimed_at = NOW(), tries = tries + 1
+                WHERE submission_id IN ({_placeholders(len(rows), '%s')})
+            """, [row[0] for row in rows])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    # tries as set by this claim: the fence for _record() and _fail()
+    return [Submission(*row[:5], json.loads(row[5]) if isinstance(row[5], (str, bytes, bytearray)) else row[5],
+                       row[6] + 1)
+            for row in rows]
+
+
+def _load_context(cursor, submissions):
+    """Questions per exam, attempts and drafts of a claimed batch (one query each)"""
+    questions = {}
+    for exam_id in {submission.exam_id for submission in submissions}:
+        cursor.execute(statement_sql(ATTEMPT_QUESTIONS), (exam_id,))
+        questions[exam_id] = [tuple(row) for row in cursor.fetchall()]
+
+    attempts, drafts = {}, {}
+    attempt_ids = [submission.attempt_id for submission in submissions if submission.attempt_id]
+    if attempt_ids:
+        cursor.execute(f"""
+            SELECT attempt_id, shuffle_version, option_mapping FROM exam_attempts
+            WHERE attempt_id IN ({_placeholders(len(attempt_ids), '%s')})
+        """, attempt_ids)
+        for attempt_id, shuffle_version, option_mapping in cursor.fetchall():
+            if isinstance(option_mapping, (str, bytes, bytearray)):
+                option_mapping = json.loads(option_mapping)
+            attempts[attempt_id] = (shuffle_version, option_mapping)
+        # Drafts flushed after the submission (e.g. buffered by another web worker) are ignored
+        cursor.execute(f"""
+            SELECT d.attempt_id, d.question_id, d.answer
+            FROM exam_drafts d
+            JOIN exam_submissions s ON s.attempt_id = d.attempt_id
+            WHERE d.attempt_id IN ({_placeholders(len(attempt_ids), '%s')}) AND d.updated_at <= s.created_at
+        """, attempt_ids)
+        for attempt_id, question_id, answer in cursor.fetchall():
+            drafts.setdefault(attempt_id, {})[question_id] = answer
+    return questions, attempts, drafts
+
+
+def _option_mapping(submission, questions, attempts, secret):
+    shuffle_version, stored_mapping = attempts.get(submission.attempt_id, (None, None))
+    if shuffle_version == SHUFFLE_VERSION:
+        seed = attempt_seed(submission.student_id, submission.exam_id, submission.attempt_id, secret)
+        return shuffle_exam(questions, seed).mapping
+    return stored_mapping or submission.payload.get('option_mapping') or {}
+
+
+def _fence(submissions):
+    """WHERE condition (and params) matching submissions still held by this worker's claim"""
+    condition = f"status = 'grading' AND (submission_id, tries) IN ({_placeholders(len(submissions), '(%s, %s)')})"
+    return condition, [value for submission in submissions for value in (submission.submission_id, submission.tries)]
+
+
+def _record(conn, graded):
+    """
+    Write the results of graded submissions in one transaction
+
+    Returns:
+        False (nothing written) if any of the claims was released and taken
+        over by another worker meanwhile
+    """
+    cursor = conn.cursor()
+    try:
+        # First, so the claims are locked before anything else is written
+        condition, params = _fence([item.submission for item in graded])
+        cursor.execute(f"""
+            UPDATE exam_submissions SET status = 'graded', graded_at = NOW(), error = NULL
+            WHERE {condition}
+        """, params)
+        if cursor.rowcount != len(graded):
+            conn.rollback()
+            return False
+        insert_responses(cursor, [row for item in graded for row in item.responses])
+        cursor.execute(f"""
+            INSERT INTO student_performance
+            (student_name, student_id, exam_id, total_questions, correct_answers, incorrect_answers, score, recorded_at)
+            VALUES {_placeholders(len(graded), '(%s, %s, %s, %s, %s, %s, %s, NOW())')}
+            ON DUPLICATE KEY UPDATE
+                total_questions = VALUES(total_questions),
+                correct_answers = VALUES(correct_answers),
+                incorrect_answers = VALUES(incorrect_answers),
+                score = VALUES(score),
+                recorded_at = NOW()
+        """, [value for item in graded for value in item.performance])
+        # regrade.py finds the attempt each result was graded with by this status
+        mark_submitted(cursor, [item.submission.attempt_id for item in graded if item.submission.attempt_id])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    return True
+
+
+def _fail(conn, submission, error):
+    cursor = conn.cursor()
+    try:
+        condition, params = _fence([submission])
+        cursor.execute(f"""
+            UPDATE exam_submissions
+            SET status = IF(tries >= %s, 'failed', 'queued'), error = %s
+            WHERE {condition}
+        """, [GRADING_MAX_TRIES, str(error)[:2000]] + params)
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def drain_once(conn, secret, batch_size=GRADING_BATCH_SIZE):
+    """Claim, grade and record one batch; returns (graded, failed) counts"""
+    submissions = _claim(conn, batch_size)
+    if not submissions:
+        return 0, 0
+
+    cursor = conn.cursor()
+    try:
+        questions, attempts, drafts = _load_context(cursor, submissions)
+    finally:
+        cursor.close()
+    conn.rollback()   # end the read snapshot before writing
+
+    graded, failed = [], 0
+    for submission in submissions:
+        try:
+            exam_questions = questions[submission.exam_id]
+            mapping = _option_mapping(submission, exam_questions, attempts, secret)
+            graded.append(grade_submission(submission, exam_questions, mapping,
+                                           drafts.get(submission.attempt_id, {})))
+        except Exception as err:
+            logger.exception("Grading submission %s failed", submission.submission_id)
+            _fail(conn, submission, err)
+            failed += 1
+
+    if not graded:
+        return 0, failed
+    try:
+        if _record(conn, graded):
+            return len(graded), failed
+        logger.warning("Claims of a batch of %d submissions were taken over; recording individually", len(graded))
+    except Exception as err:
+        # Isolate the bad submission(s): record the rest one by one
+        logger.warning("Batch write of %d submissions failed (%s); retrying individually", len(graded), err)
+    recorded = 0
+    for item in graded:
+        try:
+            if _record(conn, [item]):
+                recorded += 1
+            else:
+                logger.warning("Submission %s was re-claimed by another worker; leaving it to that worker",
+                               item.submission.submission_id)
+        except Exception as item_err:
+            _fail(conn, item.submission, item_err)
+            failed += 1
+    return recorded, failed
+
+
+# ============================================================================
+# WORKERS
+# ============================================================================
+
+class GradingWorkers:
+    """Background tasks draining the submission queue"""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._running = False
+        self._workers = 0
+        self._graded = 0
+        self._failed = 0
+        self._batches = 0
+        self._errors = 0
+        self._busy_seconds = 0.0
+
+    def start(self, get_connection, secret, count=GRADING_WORKERS, spawn=None):
+        """Start `count` grading loops (once per process, after fork)"""
+        if self._running or count <= 0:
+            return
+        self._running = True
+        self._workers = count
+        for index in range(count):
+            if spawn is not None:
+                spawn(self._run, get_connection, secret)
+            else:
+                threading.Thread(target=self._run, args=(get_connection, secret),
+                                 name=f'grading-worker-{index}', daemon=True).start()
+
+    def wake(self):
+        """Signal that a submission was just queued"""
+        self._wake.set()
+
+    def _run(self, get_connection, secret):
+        while self._running:
+            graded = failed = 0
+            conn = None
+            started = time.perf_counter()
+            try:
+                conn = get_connection()
+                graded, failed = drain_once(conn, secret)
+            except Exception as err:
+                self._errors += 1
+                logger.error("Grading worker error: %s", err)
+            finally:
+                if conn is not None:
+                    conn.close()
+            if graded or failed:
+                self._batches += 1
+                self._graded += graded
+                self._failed += failed
+                self._busy_seconds += time.perf_counter() - started
+                continue   # more may be waiting
+            self._wake.wait(GRADING_POLL_INTERVAL)
+            self._wake.clear()
+
+    def stats(self):
+        return {
+            'workers': self._workers,
+            'graded': self._graded,
+            'failed': self._failed,
+            'batches': self._batches,
+            'errors': self._errors,
+            'avg_batch_seconds': round(self._busy_seconds / self._batches, 4) if self._batches else 0.0,
+            'batch_size': GRADING_BATCH_SIZE,
+            'pid': os.getpid(),
+        }
+
+
+grading_workers = GradingWorkers()
+
+
+def queue_depth(cursor):
+    """{status: count} of submissions not yet graded"""
+    cursor.execute("""
+        SELECT status, COUNT(*) FROM exam_submissions
+        WHERE status IN ('queued', 'grading', 'failed')
+        GROUP BY status
+    """)
+    return dict(cursor.fetchall())
+
+
+def failed_submissions(cursor, limit=100):
+    """Submissions that exhausted GRADING_MAX_TRIES, oldest first, with their last error"""
+    cursor.execute("""
+        SELECT submission_id, student_id, student_name, exam_id, tries, error, created_at
+        FROM exam_submissions
+        WHERE status = 'failed'
+        ORDER BY submission_id
+        LIMIT %s
+    """, (limit,))
+    columns = ('submission_id', 'student_id', 'student_name', 'exam_id', 'tries', 'error', 'created_at')
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def requeue_failed(cursor, submission_ids=None):
+    """
+    Put failed submissions back in the queue with a fresh set of tries
+
+    Args:
+        submission_ids: submissions to requeue (default: every failed one)
+
+    Returns:
+        number of submissions requeued
+    """
+    condition, params = "status = 'failed'", []
+    if submission_ids:
+        condition += f" AND submission_id IN ({_placeholders(len(submission_ids), '%s')})"
+        params = list(submission_ids)
+    cursor.execute(f"""
+        UPDATE exam_submissions SET status = 'queued', tries = 0, claimed_at = NULL
+        WHERE {condition}
+    """, params)
+    return cursor.rowcount
+
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+    from db_pool import ConnectionPool, load_db_config
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run grading workers for the exam submission queue")
+    parser.add_argument('--workers', type=int, default=GRADING_WORKERS, help="Concurrent grading loops")
+    parser.add_argument('--requeue-failed', action='store_true',
+                        help="Requeue failed submissions (all, or those given with --submission-id) and exit")
+    parser.add_argument('--submission-id', type=int, action='append', help="Submission to requeue (repeatable)")
+    args = parser.parse_args()
+
+    if args.requeue_failed:
+        from db_drivers import get_driver
+        conn = get_driver().connect(load_db_config())
+        cursor = conn.cursor()
+        try:
+            requeued = requeue_failed(cursor, args.submission_id)
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        print(f"✓ {requeued} failed submission(s) requeued")
+        return
+
+    secret = os.getenv('SHUFFLE_SECRET') or os.getenv('SECRET_KEY')
+    if not secret:
+        print("❌ SHUFFLE_SECRET or SECRET_KEY must match the running app's to rebuild shuffles")
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    pool = ConnectionPool('grading', load_db_config(), size=args.workers, prewarm=args.workers)
+    grading_workers.start(pool.get_connection, secret, count=args.workers)
+    print(f"✓ {args.workers} grading worker(s) running - Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(30)
+            print(f"   {grading_workers.stats()}", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+In-memory stand-ins for the MySQL driver used by the unit tests.
+
+FakeConnection records every statement (whitespace collapsed) and answers
+them through an optional handler(cursor, sql, params) that returns rows,
+sets cursor.rowcount / cursor.lastrowid, or raises a mysql.connector error.
+"""
+
+import mysql.connector
+
+
+def normalize(sql):
+    return ' '.join(sql.split())
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rowcount = -1
+        self.lastrowid = None
+        self.closed = False
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        sql = normalize(sql)
+        self.conn.executed.append((sql, params))
+        self.conn.in_transaction = True
+        self.rowcount = -1
+        rows = self.conn.handler(self, sql, params) if self.conn.handler else None
+        self._rows = list(rows or [])
+
+    def executemany(self, sql, seq_params):
+        seq_params = list(seq_params)
+        sql = normalize(sql)
+        self.conn.executed.append((sql, seq_params))
+        self.conn.in_transaction = True
+        self.rowcount = len(seq_params)
+        if self.conn.handler:
+            self.conn.handler(self, sql, seq_params)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.executed = []
+        self.in_transaction = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.healthy = True
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def start_transaction(self, **kwargs):
+        self.in_transaction = True
+
+    def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise mysql.connector.errors.OperationalError(msg="Lost connection")
+
+    def close(self):
+        self.closed = True
+
+    def statements(self, prefix):
+        """Executed (sql, params) whose SQL starts with `prefix`"""
+        return [(sql, params) for sql, params in self.executed if sql.startswith(prefix)]
+
+
+class FakeDriver:
+    name = 'fake'
+
+    def __init__(self, handler=None):
+        self.handler = handler
+        self.connections = []
+
+    def available(self):
+        return True
+
+    def connect(self, config):
+        conn = FakeConnection(self.handler)
+        self.connections.append(conn)
+        return conn
@@ -0,0 +1,200 @@
+import datetime
+import pickle
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+
+import pytest
+
+import app_cache
+from app_cache import LRUCache, TieredCache
+from attempt_page import AttemptSkeleton
+
+
+class BlockingLoader:
+    """Loader that returns `value` once released, counting its calls"""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        return self.value
+
+
+def in_thread(fn, *args):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(fn(*args)), daemon=True)
+    thread.start()
+    return thread, results
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_concurrent_misses_share_one_load():
+    cache = LRUCache('test')
+    loader = BlockingLoader('exam')
+    threads = [in_thread(cache.get, 'k', loader) for _ in range(10)]
+    assert wait_for(lambda: cache.stats()['coalesced_loads'] == 9)
+    loader.release.set()
+
+    for thread, results in threads:
+        thread.join(5)
+        assert results == ['exam']
+    assert loader.calls == 1
+    assert cache.get('k', pytest.fail) == 'exam'
+
+
+def test_failed_load_is_not_cached():
+    cache = LRUCache('test')
+
+    def failing():
+        raise ConnectionError('db down')
+
+    with pytest.raises(ConnectionError):
+        cache.get('k', failing)
+    assert cache.get('k', lambda: 'exam') == 'exam'
+    assert cache.stats()['size'] == 1
+
+
+def test_none_is_returned_but_not_cached():
+    cache = LRUCache('test')
+    assert cache.get('missing', lambda: None) is None
+    assert cache.get('missing', lambda: 'created') == 'created'
+
+
+def test_invalidation_during_load_keeps_stale_value_out():
+    cache = LRUCache('test')
+    stale = BlockingLoader('old')
+    leader, results = in_thread(cache.get, 'k', stale)
+    assert stale.started.wait(2)
+
+    cache.invalidate('k')   # admin edit committed while the old row was being read
+    assert cache.get('k', lambda: 'new') == 'new'
+
+    stale.release.set()
+    leader.join(5)
+    assert results == ['old']
+    assert cache.get('k', pytest.fail) == 'new'
+
+
+def test_clear_during_load_keeps_stale_value_out():
+    cache = LRUCache('test')
+    stale = BlockingLoader('old')
+    leader, _ = in_thread(cache.get, 'k', stale)
+    assert stale.started.wait(2)
+
+    cache.clear()
+    stale.release.set()
+    leader.join(5)
+    assert cache.get('k', lambda: 'new') == 'new'
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(app_cache.time, 'monotonic', lambda: now[0])
+    cache = LRUCache('test', ttl=10)
+    cache.get('k', lambda: 'v1')
+
+    now[0] += 9
+    assert cache.get('k', pytest.fail) == 'v1'
+    now[0] += 2
+    assert cache.get('k', lambda: 'v2') == 'v2'
+    assert cache.stats()['expirations'] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache('test', maxsize=2)
+    cache.get('a', lambda: 1)
+    cache.get('b', lambda: 2)
+    cache.get('a', pytest.fail)     # 'b' is now the oldest
+    cache.get('c', lambda: 3)
+
+    assert cache.get('a', pytest.fail) == 1
+    assert cache.get('b', lambda: 'reloaded') == 'reloaded'
+    assert cache.stats()['evictions'] == 2
+
+
+def test_invalidation_from_another_worker_reaches_l1(monkeypatch):
+    store = app_cache.shared_cache.MemoryStore()
+    monkeypatch.setattr(app_cache.shared_cache, 'get_store', lambda: store)
+    monkeypatch.setattr(app_cache, '_tiered', {})
+    app_cache.start_invalidation_listener()
+    cache = TieredCache('exam_test', maxsize=8, ttl=60)
+    assert cache.get(1, lambda: 'v1') == 'v1'
+    assert cache.get(1, pytest.fail) == 'v1'
+
+    # What TieredCache.invalidate() does in the worker that saved the edit
+    app_cache.shared_cache.bump_version(store, 'exam_test', '1')
+
+    assert cache.l1.stats()['size'] == 0
+    assert cache.get(1, lambda: 'v2') == 'v2'
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    store = app_cache.shared_cache.MemoryStore()
+    monkeypatch.setattr(app_cache.shared_cache, 'get_store', lambda: store)
+    monkeypatch.setattr(app_cache, '_tiered', {})
+    return store
+
+
+def from_another_worker(namespace, key):
+    """Read `key` through a fresh L1, so the value comes from the shared store"""
+    return TieredCache(namespace, maxsize=8, ttl=60).get(key, pytest.fail)
+
+
+def test_shared_values_round_trip_as_json(shared):
+    exam = (1, 'Algebra', 'Maths', 60, datetime.datetime(2026, 3, 1, 9, 30), None, 'papers/1.pdf')
+    snapshot = app_cache.ExamSnapshot(exam, ((10, 1, 'What is 2 + 2?', 'mcq', '3', '4', '5', '6', 'B', None, None),))
+    skeleton = AttemptSkeleton('abc123', ('<html>', '__ATTEMPT_NONCE__', '</html>'))
+    field = (1, 'phone', 'Phone', 'tel', None, 1, 2, True, Decimal('40.00'), datetime.timedelta(hours=1))
+
+    TieredCache('exam_test', maxsize=8, ttl=60).get(1, lambda: snapshot)
+    TieredCache('skeleton_test', maxsize=8, ttl=60).get('k', lambda: skeleton)
+    TieredCache('fields_test', maxsize=8, ttl=60).get('active', lambda: (field,))
+
+    assert from_another_worker('exam_test', 1) == snapshot
+    assert type(from_another_worker('exam_test', 1)) is app_cache.ExamSnapshot
+    assert type(from_another_worker('skeleton_test', 'k')) is AttemptSkeleton
+    assert from_another_worker('fields_test', 'active') == (field,)
+
+
+class Exploit:
+    ran = False
+
+    def __reduce__(self):
+        return (setattr, (Exploit, 'ran', True))
+
+
+def test_pickle_payload_in_the_shared_store_is_not_executed(shared):
+    version = app_cache.shared_cache.current_version(shared, 'exam_test', '1')
+    shared.set(app_cache.shared_cache.value_key('exam_test', '1', version), pickle.dumps(Exploit()))
+    cache = TieredCache('exam_test', maxsize=8, ttl=60)
+
+    assert cache.get(1, lambda: 'from db') == 'from db'
+    assert not Exploit.ran
+    assert cache.stats()['l2_errors'] == 1
+    assert from_another_worker('exam_test', 1) == 'from db'   # the bad entry was replaced
+
+
+def test_unregistered_type_is_served_but_not_shared(shared):
+    Point = namedtuple('Point', ['x', 'y'])
+    cache = TieredCache('point_test', maxsize=8, ttl=60)
+
+    assert cache.get('p', lambda: Point(1, 2)) == Point(1, 2)
+    assert cache.stats()['l2_errors'] == 1
+    assert TieredCache('point_test', maxsize=8, ttl=60).get('p', lambda: 'reloaded') == 'reloaded'
@@ -0,0 +1,29 @@
+import pytest
+
+import app as ams
+from db_pool import ConnectionPool
+from fakes import FakeDriver
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = ConnectionPool('test', {}, size=2, prewarm=0, borrow_timeout=0.05, driver=FakeDriver())
+    monkeypatch.setattr(ams, 'get_pool', lambda name='primary': pool)
+    return pool
+
+
+def test_connections_left_open_are_released_in_teardown(pool):
+    # More requests than pool slots, each dropping its connection without close()
+    for _ in range(pool.size + 1):
+        with ams.app.test_request_context('/'):
+            assert ams.get_db_connection() is not None
+    assert pool.stats()['in_use'] == 0
+
+
+def test_teardown_tolerates_connections_closed_by_the_route(pool):
+    with ams.app.test_request_context('/'):
+        ams.get_db_connection().close()
+        ams.get_db().cursor()
+    stats = pool.stats()
+    assert stats['in_use'] == 0
+    assert stats['open'] == 1
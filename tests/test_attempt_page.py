@@ -0,0 +1,51 @@
+import json
+from datetime import datetime
+
+import attempt_page
+from attempt_page import build_skeleton, render_attempt_page, skeleton_key
+
+EXAM = (1, 'Physics Midterm', 'Physics', 60, datetime(2026, 1, 5, 9), datetime(2026, 1, 5, 11), None)
+
+
+def fake_render(csp_nonce, csrf_token, attempt_data):
+    return (f'<script nonce="{csp_nonce()}"></script><input value="{csrf_token()}">'
+            f'<script type="application/json">{attempt_data}</script>')
+
+
+def test_render_splices_request_values():
+    skeleton = build_skeleton(fake_render)
+    html = render_attempt_page(skeleton, 'n0nce', 'tok', {'text': '</script><b>'})
+
+    assert 'nonce="n0nce"' in html
+    assert 'value="tok"' in html
+    assert '__ATTEMPT_' not in html
+    assert '</script><b>' not in html
+    payload = html.split('<script type="application/json">')[1].split('</script>')[0]
+    assert json.loads(payload) == {'text': '</script><b>'}
+
+
+def test_key_follows_exam_data_and_template_build(monkeypatch):
+    key = skeleton_key(1, EXAM, 10)
+    assert skeleton_key(1, list(EXAM), 10) == key
+    assert skeleton_key(1, EXAM, 11) != key
+    assert skeleton_key(1, EXAM[:1] + ('Physics Final',) + EXAM[2:], 10) != key
+
+    monkeypatch.setattr(attempt_page, 'TEMPLATE_BUILD', 'newdeploy')
+    assert skeleton_key(1, EXAM, 10) != key
+
+
+def test_old_and_new_deploys_do_not_invalidate_each_other(monkeypatch):
+    import app as ams
+    from app_cache import attempt_skeleton_cache, exam_cache
+
+    invalidations = exam_cache.l1.stats()['invalidations'], attempt_skeleton_cache.l1.stats()['invalidations']
+    with ams.app.test_request_context('/student/exam/1'):
+        builds = []
+        for build in ('olddeploy', 'newdeploy', 'olddeploy', 'newdeploy'):
+            monkeypatch.setattr(attempt_page, 'TEMPLATE_BUILD', build)
+            builds.append(ams.attempt_skeleton(1, EXAM, 10).build)
+
+    assert builds == ['olddeploy', 'newdeploy', 'olddeploy', 'newdeploy']
+    assert (exam_cache.l1.stats()['invalidations'],
+            attempt_skeleton_cache.l1.stats()['invalidations']) == invalidations
+    assert attempt_skeleton_cache.l1.stats()['hits'] >= 2
@@ -0,0 +1,129 @@
+import mysql.connector
+import pytest
+
+from autosave import DraftBuffer
+from fakes import FakeConnection
+
+INSERT = 'INSERT INTO exam_drafts'
+
+
+def rows_of(params):
+    return [tuple(params[i:i + 3]) for i in range(0, len(params), 3)]
+
+
+class Drafts:
+    """exam_drafts as seen through the fake connection, with optional rejects"""
+
+    def __init__(self, reject=None, fail=None):
+        self.table = {}
+        self.reject = reject    # row -> mysql.connector error for rows the database refuses
+        self.fail = fail        # connection-level error raised for any write
+
+    def __call__(self, cursor, sql, params):
+        if not sql.startswith(INSERT):
+            return None
+        if self.fail:
+            raise self.fail
+        rows = rows_of(params)
+        for row in rows:
+            err = self.reject and self.reject(row)
+            if err:
+                raise err
+        for attempt_id, question_id, answer in rows:
+            self.table[(attempt_id, question_id)] = answer
+        return None
+
+
+@pytest.fixture
+def drafts():
+    return Drafts()
+
+
+@pytest.fixture
+def buffer(drafts):
+    buffer = DraftBuffer()
+    buffer._get_connection = lambda: FakeConnection(drafts)
+    return buffer
+
+
+def test_deltas_coalesce_to_latest_answer(buffer, drafts):
+    buffer.add(1, {'10': 'A'})
+    buffer.add(1, {'10': 'B', '11': 'C'})
+
+    assert buffer.flush() == 2
+    assert drafts.table == {(1, 10): 'B', (1, 11): 'C'}
+    assert buffer.stats()['coalesced'] == 1
+    assert buffer.flush() == 0
+
+
+def test_flush_writes_all_attempts_in_one_statement(buffer):
+    conn = FakeConnection(Drafts())
+    buffer.add(1, {'10': 'A'})
+    buffer.add(2, {'20': 'B'})
+
+    assert buffer.flush(conn=conn) == 2
+    assert len(conn.statements(INSERT)) == 1
+    assert conn.commits == 1
+
+
+def test_only_the_exams_questions_are_accepted(buffer):
+    accepted = buffer.add(1, {'10': 'A', '99999999999': 'B', 'x': 'C', '12': 'D'}, question_ids={10, 11})
+    assert accepted == 1
+    assert buffer.stats()['pending_answers'] == 1
+
+
+def test_nothing_accepted_leaves_no_pending_attempt(buffer):
+    assert buffer.add(1, {'99': 'A'}, question_ids={10}) == 0
+    assert buffer.stats()['pending_attempts'] == 0
+
+
+def test_flush_attempt_leaves_other_attempts_pending(buffer, drafts):
+    buffer.add(1, {'10': 'A'})
+    buffer.add(2, {'20': 'B'})
+
+    assert buffer.flush_attempt(1, FakeConnection(drafts)) == 1
+    assert drafts.table == {(1, 10): 'A'}
+    assert buffer.stats()['pending_attempts'] == 1
+
+
+def test_rejected_attempt_is_dropped_and_others_are_written(buffer, drafts):
+    # Attempt 2 was deleted with its exam: the FK rejects every batch it is in
+    drafts.reject = lambda row: (mysql.connector.IntegrityError(msg='FK', errno=1452) if row[0] == 2 else None)
+    buffer.add(1, {'10': 'A'})
+    buffer.add(2, {'20': 'B', '21': 'C'})
+    buffer.add(3, {'30': 'D'})
+
+    assert buffer.flush() == 2
+    assert drafts.table == {(1, 10): 'A', (3, 30): 'D'}
+    assert buffer.stats()['dropped'] == 2
+    assert buffer.stats()['pending_answers'] == 0
+
+    # The buffer keeps working after the bad rows are gone
+    buffer.add(1, {'10': 'E'})
+    assert buffer.flush() == 1
+    assert drafts.table[(1, 10)] == 'E'
+
+
+def test_rejected_row_is_dropped_and_rest_of_attempt_is_written(buffer, drafts):
+    drafts.reject = lambda row: (mysql.connector.DataError(msg='Data too long', errno=1406)
+                                 if row[1] == 11 else None)
+    buffer.add(1, {'10': 'A', '11': 'B', '12': 'C'})
+
+    assert buffer.flush() == 2
+    assert drafts.table == {(1, 10): 'A', (1, 12): 'C'}
+    assert buffer.stats()['dropped'] == 1
+
+
+def test_connection_failure_keeps_drafts_for_next_flush(buffer, drafts):
+    drafts.fail = mysql.connector.OperationalError(msg='Lost connection', errno=2013)
+    buffer.add(1, {'10': 'A', '11': 'B'})
+
+    assert buffer.flush() == 0
+    assert buffer.stats()['errors'] == 1
+    assert buffer.stats()['pending_answers'] == 2
+
+    # A newer answer that arrived meanwhile wins over the restored one
+    buffer.add(1, {'10': 'C'})
+    drafts.fail = None
+    assert buffer.flush() == 2
+    assert drafts.table == {(1, 10): 'C', (1, 11): 'B'}
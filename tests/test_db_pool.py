@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeoutError
+from fakes import FakeDriver
+
+
+def make_pool(size=2, **kwargs):
+    kwargs.setdefault('prewarm', 0)
+    kwargs.setdefault('borrow_timeout', 0.05)
+    return ConnectionPool('test', {}, size=size, driver=FakeDriver(), **kwargs)
+
+
+def test_release_returns_connection_for_reuse():
+    pool = make_pool()
+    conn = pool.get_connection()
+    raw = conn.raw
+    conn.close()
+
+    again = pool.get_connection()
+    assert again.raw is raw
+    assert len(pool.driver.connections) == 1
+    again.close()
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_close_twice_releases_once():
+    pool = make_pool()
+    conn = pool.get_connection()
+    conn.close()
+    conn.close()
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['open'] == 1
+
+
+def test_release_rolls_back_open_transaction():
+    pool = make_pool()
+    conn = pool.get_connection()
+    conn.start_transaction()
+    conn.close()
+    assert pool.driver.connections[0].rollbacks == 1
+
+
+def test_returned_connection_cannot_be_used():
+    pool = make_pool()
+    conn = pool.get_connection()
+    conn.close()
+    with pytest.raises(Exception):
+        conn.cursor()
+
+
+def test_borrow_times_out_when_exhausted():
+    pool = make_pool(size=2)
+    held = [pool.get_connection(), pool.get_connection()]
+
+    with pytest.raises(PoolTimeoutError) as excinfo:
+        pool.get_connection()
+    assert excinfo.value.stats['in_use'] == 2
+    assert pool.stats()['timeouts'] == 1
+
+    held[0].close()
+    pool.get_connection().close()
+
+
+def test_waiting_borrower_gets_released_connection():
+    pool = make_pool(size=1, borrow_timeout=2)
+    conn = pool.get_connection()
+    threading.Timer(0.05, conn.close).start()
+
+    started = time.monotonic()
+    pool.get_connection().close()
+    assert time.monotonic() - started < 1
+    assert pool.stats()['waited_borrows'] == 1
+
+
+def test_unhealthy_idle_connection_is_replaced():
+    pool = make_pool(idle_check_seconds=0)
+    conn = pool.get_connection()
+    conn.raw.healthy = False
+    conn.close()
+
+    fresh = pool.get_connection()
+    assert fresh.raw is pool.driver.connections[1]
+    assert pool.driver.connections[0].closed
+    assert pool.stats()['health_check_failures'] == 1
+    fresh.close()
+
+
+def test_prewarm_opens_connections_up_front():
+    pool = make_pool(size=4, prewarm=3)
+    assert pool.prewarm() == 3
+    assert pool.stats()['idle'] == 3
+    assert pool.prewarm() == 0
@@ -0,0 +1,39 @@
+from exam_attempts import ExamAttempt, ensure_submission_token
+from fakes import FakeConnection
+
+LEGACY_ATTEMPT = ExamAttempt(30, 'in_progress', None, 1, None, None)
+
+
+def token_column(stored):
+    """exam_attempts.submission_token of attempt 30, already set to `stored` (or NULL)"""
+    def handler(cursor, sql, params):
+        if sql.startswith('UPDATE exam_attempts SET submission_token'):
+            cursor.rowcount = 0 if stored else 1
+        elif sql.startswith('SELECT submission_token FROM exam_attempts'):
+            return [(stored,)]
+        return None
+    return handler
+
+
+def test_existing_token_is_returned_without_writing():
+    conn = FakeConnection(token_column(None))
+    assert ensure_submission_token(conn, LEGACY_ATTEMPT._replace(submission_token='abc')) == 'abc'
+    assert conn.executed == []
+
+
+def test_token_is_issued_for_a_legacy_attempt():
+    conn = FakeConnection(token_column(None))
+    token = ensure_submission_token(conn, LEGACY_ATTEMPT)
+
+    assert len(token) == 32
+    assert conn.statements('UPDATE exam_attempts')[0][1] == (token, 30)
+    assert conn.statements('SELECT') == []
+    assert conn.commits == 1
+
+
+def test_resume_that_lost_the_race_returns_the_stored_token():
+    conn = FakeConnection(token_column('winner'))
+    assert ensure_submission_token(conn, LEGACY_ATTEMPT) == 'winner'
+    # The stored token is read after the losing UPDATE's transaction ended
+    assert [sql.split()[0] for sql, _ in conn.executed] == ['UPDATE', 'SELECT']
+    assert conn.commits == 1 and not conn.in_transaction
@@ -0,0 +1,13 @@
+import re
+
+import app as ams
+
+
+def test_waiting_page_retry_script_carries_the_csp_nonce(monkeypatch):
+    monkeypatch.setattr(ams.attempt_admission, 'try_admit', lambda: None)
+    response = ams.app.test_client().get('/student/exam/1', base_url='https://localhost')
+
+    nonce = re.search(r"'nonce-([^']+)'", response.headers['Content-Security-Policy']).group(1)
+    scripts = re.findall(r'<script[^>]*>', response.get_data(as_text=True))
+    assert scripts and all(f'nonce="{nonce}"' in script for script in scripts)
+    assert response.headers['Retry-After']
@@ -0,0 +1,135 @@
+import random
+
+import numpy as np
+import pytest
+
+from grading import AnswerKey, grade
+from submission_queue import Submission, grade_submission
+
+STUDENT_ID, EXAM_ID = 7, 1
+TYPES = ('mcq', 'image_mcq', 'true_false', 'descriptive', 'video_response', None)
+POSTED = ('A', 'b', ' c ', 'D', 'E', 'AB', '', '   ', 'True', 'False', 'true', ' False ',
+          'A thorough descriptive answer', 'too short')
+
+
+def baseline(questions, form, option_mappings):
+    """The per-question grading loop submit_exam ran before grading.py (prints removed)"""
+    correct_count = 0
+    total_mcq_questions = 0
+    responses = []
+    for question_id, question_type, correct_option in questions:
+        question_type = question_type if question_type else 'mcq'
+        if question_type in ['mcq', 'image_mcq', 'true_false']:
+            if str(question_id) in option_mappings:
+                correct_option = option_mappings[str(question_id)]
+        if question_type == 'video_response':
+            pass
+        elif question_type == 'descriptive':
+            text_answer = form.get(f"answer_{question_id}", "").strip()
+            if text_answer and len(text_answer) >= 10:
+                responses.append((STUDENT_ID, EXAM_ID, question_id, text_answer, None, 'descriptive'))
+            elif not text_answer:
+                responses.append((STUDENT_ID, EXAM_ID, question_id, None, None, 'descriptive'))
+        else:
+            total_mcq_questions += 1
+            selected_answer = form.get(f"answer_{question_id}", "").strip()
+            if selected_answer:
+                if question_type == 'true_false':
+                    if selected_answer not in ['True', 'False']:
+                        selected_answer = None
+                elif selected_answer.upper() not in ['A', 'B', 'C', 'D']:
+                    selected_answer = None
+            if selected_answer:
+                if question_type == 'true_false':
+                    is_correct = 1 if selected_answer == correct_option else 0
+                else:
+                    is_correct = 1 if selected_answer.upper() == correct_option.strip().upper() else 0
+                correct_count += is_correct
+                responses.append((STUDENT_ID, EXAM_ID, question_id, selected_answer, is_correct, question_type))
+            else:
+                responses.append((STUDENT_ID, EXAM_ID, question_id, None, 0, question_type))
+    incorrect_count = total_mcq_questions - correct_count
+    score = (correct_count / total_mcq_questions * 100) if total_mcq_questions > 0 else 0
+    return responses, correct_count, incorrect_count, score
+
+
+def random_exam(rng, count):
+    questions, mapping = [], {}
+    for question_id in range(1, count + 1):
+        question_type = rng.choice(TYPES)
+        if question_type == 'true_false':
+            correct = rng.choice(['True', 'False'])
+            if rng.random() < 0.3:
+                mapping[str(question_id)] = rng.choice(['True', 'False'])
+        elif question_type in ('descriptive', 'video_response'):
+            correct = None
+        else:
+            correct = rng.choice(['A', 'b', ' C', 'd '])
+            if rng.random() < 0.3:
+                mapping[str(question_id)] = rng.choice('ABCD')
+        questions.append((question_id, question_type, correct))
+    form = {f"answer_{q[0]}": rng.choice(POSTED) for q in questions if rng.random() < 0.8}
+    return questions, form, mapping
+
+
+def attempt_rows(questions):
+    """ATTEMPT_QUESTIONS rows for (question_id, question_type, correct_option)"""
+    return [(question_id, EXAM_ID, 'text', question_type, 'a', 'b', 'c', 'd', correct, None, None)
+            for question_id, question_type, correct in questions]
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_grade_submission_matches_baseline(seed):
+    rng = random.Random(seed)
+    questions, form, mapping = random_exam(rng, rng.randint(1, 12))
+    answers = {key[len('answer_'):]: value for key, value in form.items()}
+    submission = Submission(1, STUDENT_ID, EXAM_ID, None, 'Asha', {'answers': answers}, 1)
+
+    graded = grade_submission(submission, attempt_rows(questions), mapping, {})
+    responses, correct_count, incorrect_count, score = baseline(questions, form, mapping)
+
+    assert graded.responses == responses
+    assert graded.performance == ('Asha', STUDENT_ID, EXAM_ID, len(questions),
+                                  correct_count, incorrect_count, round(score, 2))
+
+
+def test_cohort_grading_matches_one_by_one():
+    rng = random.Random(1)
+    questions, _, _ = random_exam(rng, 15)
+    key = AnswerKey.from_questions(questions)
+    forms, mappings = [], []
+    for _ in range(20):
+        _, form, mapping = random_exam(random.Random(rng.random()), 15)
+        forms.append({field[len('answer_'):]: value.strip() for field, value in form.items()})
+        mappings.append(mapping)
+
+    answers = np.stack([key.encode(form) for form in forms])
+    key_codes = np.stack([key.mapped_codes(mapping) for mapping in mappings])
+    cohort = grade(key, answers, key_codes)
+
+    for i, (form, mapping) in enumerate(zip(forms, mappings)):
+        single = grade(AnswerKey.from_questions(questions, mapping), key.encode(form))
+        assert cohort.correct_count[i] == single.correct_count
+        assert cohort.score[i] == pytest.approx(single.score)
+        assert (cohort.correct[i] == single.correct).all()
+
+
+def test_missing_correct_option_never_matches():
+    # The old loop raised AttributeError on .strip() of a NULL correct_option
+    key = AnswerKey.from_questions([(1, 'mcq', None), (2, 'true_false', None), (3, 'mcq', 'A')])
+    result = grade(key, key.encode({1: 'A', 2: 'True', 3: 'A'}))
+    assert result.correct.tolist() == [False, False, True]
+    assert (result.correct_count, result.incorrect_count) == (1, 2)
+
+
+def test_exam_without_objective_questions_scores_zero():
+    key = AnswerKey.from_questions([(1, 'descriptive', None), (2, 'video_response', None)])
+    result = grade(key, key.encode({1: 'An essay'}))
+    assert (result.graded_count, result.correct_count, result.score) == (0, 0, 0.0)
+    assert result.by_type == {}
+
+
+def test_totals_by_question_type():
+    key = AnswerKey.from_questions([(1, 'mcq', 'A'), (2, 'mcq', 'B'), (3, 'true_false', 'False')])
+    result = grade(key, key.encode({1: 'a', 2: 'C', 3: 'False'}))
+    assert result.by_type == {'mcq': {'correct': 1, 'total': 2}, 'true_false': {'correct': 1, 'total': 1}}
@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import pytest
+
+import proctoring
+from proctoring import ProctorPool
+
+
+def wait_for(condition, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def spawn_thread(target, *args):
+    threading.Thread(target=target, args=args, daemon=True).start()
+
+
+class HeldExecutor:
+    """Executor whose futures complete only when the test says so"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+
+@pytest.fixture
+def held():
+    executor = HeldExecutor()
+    pool = ProctorPool(processes=1, max_pending=2)
+    pool._get_executor = lambda: executor
+    pool.start(spawn_thread, time.sleep)
+    yield pool, executor
+    pool._running = False
+
+
+def blank_jpeg():
+    cv2 = pytest.importorskip('cv2')
+    np = pytest.importorskip('numpy')
+    ok, encoded = cv2.imencode('.jpg', np.full((120, 160, 3), 128, np.uint8))
+    assert ok
+    return encoded.tobytes()
+
+
+def test_frame_analyzed_in_pool_process_reaches_its_callback():
+    pool = ProctorPool(processes=1, max_pending=4)
+    pool.start(spawn_thread, time.sleep)
+    received = []
+    try:
+        assert pool.submit('sid-1', blank_jpeg(), received.append) == 'queued'
+        assert wait_for(lambda: received)
+    finally:
+        pool._running = False
+        if pool._executor:
+            pool._executor.shutdown()
+
+    assert received == [0]
+    assert pool.stats()['pending'] == 0
+    assert pool.stats()['errors'] == 0
+
+
+def test_inline_frame_reaches_its_callback(monkeypatch):
+    monkeypatch.setattr(proctoring, 'analyze_frame', lambda frame: 2)
+    pool = ProctorPool(processes=0)
+    pool.start(spawn_thread, time.sleep)
+    received = []
+    try:
+        assert pool.submit('sid-1', b'jpeg', received.append) == 'queued'
+        assert wait_for(lambda: received, timeout=2)
+    finally:
+        pool._running = False
+    assert received == [2]
+
+
+def test_one_frame_in_flight_per_socket_and_bounded_overall(held):
+    pool, executor = held
+    received = []
+
+    assert pool.submit('a', b'1', received.append) == 'queued'
+    assert pool.submit('a', b'2', received.append) == 'busy'
+    assert pool.submit('b', b'3', received.append) == 'queued'
+    assert pool.submit('c', b'4', received.append) == 'full'
+
+    executor.futures[0].set_result(1)
+    assert wait_for(lambda: received == [1], timeout=2)
+    assert pool.submit('a', b'5', received.append) == 'queued'
+
+    stats = pool.stats()
+    assert (stats['pending'], stats['dropped_busy'], stats['dropped_full']) == (2, 1, 1)
+
+
+def test_failed_analysis_still_reaches_callback_and_frees_the_socket(held):
+    pool, executor = held
+    received = []
+
+    pool.submit('a', b'not a jpeg', received.append)
+    executor.futures[0].set_exception(ValueError('corrupt frame'))
+
+    assert wait_for(lambda: received == [None], timeout=2)
+    assert pool.stats()['errors'] == 1
+    assert pool.submit('a', b'next', received.append) == 'queued'
+
+
+def test_failing_callback_does_not_stop_delivery(held):
+    pool, executor = held
+    received = []
+
+    def broken(face_count):
+        raise RuntimeError('socket gone')
+
+    pool.submit('a', b'1', broken)
+    pool.submit('b', b'2', received.append)
+    for future in executor.futures:
+        future.set_result(1)
+
+    assert wait_for(lambda: received == [1], timeout=2)
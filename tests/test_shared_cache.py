@@ -0,0 +1,141 @@
+import socket
+import threading
+import time
+
+import pytest
+
+import shared_cache
+from shared_cache import RedisStore, create_store
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class FakePubSub:
+    def __init__(self, script):
+        self.script = script
+
+    def subscribe(self, channel):
+        self.script.subscriptions += 1
+
+    def get_message(self, timeout=None):
+        step = self.script.next_step()
+        if isinstance(step, Exception):
+            raise step
+        if step is None:
+            time.sleep(min(timeout, 0.01))
+            return None
+        return {'type': 'message', 'data': step}
+
+    def close(self):
+        pass
+
+
+class FakeClient:
+    """pubsub() whose get_message() follows a script, then stays idle"""
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.subscriptions = 0
+        self.lock = threading.Lock()
+
+    def next_step(self):
+        with self.lock:
+            return self.steps.pop(0) if self.steps else None
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+
+@pytest.fixture(autouse=True)
+def fast_reconnect(monkeypatch):
+    monkeypatch.setattr(shared_cache, 'RECONNECT_DELAY', 0.01)
+    monkeypatch.setattr(shared_cache, 'LISTEN_POLL_SECONDS', 0.01)
+
+
+def test_idle_channel_is_not_a_disconnect():
+    client = FakeClient(*[None] * 20, b'exam_content|7')
+    received, reconnects = [], []
+    RedisStore(client).listen('ch', received.append, on_reconnect=lambda: reconnects.append(1))
+
+    assert wait_for(lambda: received == ['exam_content|7'])
+    assert reconnects == []
+    assert client.subscriptions == 1
+
+
+def test_reconnect_after_connection_error_clears_once():
+    client = FakeClient(b'a|1', ConnectionError('reset by peer'), b'a|2')
+    received, reconnects = [], []
+    RedisStore(client).listen('ch', received.append, on_reconnect=lambda: reconnects.append(1))
+
+    assert wait_for(lambda: received == ['a|1', 'a|2'])
+    assert reconnects == [1]
+    assert client.subscriptions == 2
+
+
+def test_failing_handler_does_not_resubscribe():
+    client = FakeClient(b'a|1', b'a|2')
+    received, reconnects = [], []
+
+    def handler(message):
+        received.append(message)
+        raise ValueError('bad message')
+
+    RedisStore(client).listen('ch', handler, on_reconnect=lambda: reconnects.append(1))
+
+    assert wait_for(lambda: len(received) == 2)
+    assert reconnects == []
+    assert client.subscriptions == 1
+
+
+def serve_idle_redis():
+    """Minimal RESP server: accepts SUBSCRIBE and then never publishes"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(4)
+
+    def reply(commands):
+        for command in commands.upper().split(b'*')[1:]:
+            if b'SUBSCRIBE' in command:
+                yield b'*3\r\n$9\r\nsubscribe\r\n$2\r\nch\r\n:1\r\n'
+            elif b'HEALTH' in command:
+                yield b'*2\r\n$4\r\npong\r\n$21\r\nredis-py-health-check\r\n'
+            elif b'PING' in command:
+                yield b'+PONG\r\n'
+            elif command.strip():
+                yield b'+OK\r\n'
+
+    def handle(conn):
+        with conn:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                for response in reply(data):
+                    conn.sendall(response)
+
+    def accept():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server.getsockname()[1]
+
+
+def test_redis_listener_survives_idle_socket_timeouts(monkeypatch):
+    pytest.importorskip('redis')
+    monkeypatch.setattr(shared_cache, 'LISTEN_POLL_SECONDS', 0.2)
+    monkeypatch.setenv('CACHE_SOCKET_TIMEOUT', '0.1')
+    store = create_store(f'redis://127.0.0.1:{serve_idle_redis()}/0')
+    reconnects = []
+    store.listen('ch', lambda message: None, on_reconnect=lambda: reconnects.append(1))
+
+    time.sleep(1.0)   # ten socket timeouts' worth of silence
+    assert reconnects == []
@@ -0,0 +1,84 @@
+import pytest
+
+from shuffle import attempt_seed, shuffle_exam, shuffled_questions
+
+SECRET = 'test-secret'
+
+
+def question(question_id, question_type='mcq', options=('a', 'b', 'c', 'd'), correct='A'):
+    """ATTEMPT_QUESTIONS row"""
+    return (question_id, 1, f'Question {question_id}', question_type, *options, correct, None, None)
+
+
+def exam(count=20):
+    return [question(question_id, correct='ABCD'[question_id % 4]) for question_id in range(1, count + 1)]
+
+
+def layout_for(questions, attempt_id=1, secret=SECRET):
+    return shuffle_exam(questions, attempt_seed(7, 1, attempt_id, secret))
+
+
+def test_every_question_shown_exactly_once():
+    questions = exam()
+    rows = shuffled_questions(questions, layout_for(questions))
+    assert sorted(row[0] for row in rows) == [q[0] for q in questions]
+
+
+def test_correct_letter_points_at_the_original_correct_text():
+    questions = exam()
+    for row in shuffled_questions(questions, layout_for(questions)):
+        original = questions[row[0] - 1]
+        original_text = original[4 + 'ABCD'.index(original[8])]
+        assert row[4 + 'ABCD'.index(row[8])] == original_text
+        assert sorted(row[4:8]) == sorted(original[4:8])
+
+
+def test_missing_options_stay_missing():
+    questions = [question(1, options=('yes', 'no', None, None), correct='B')]
+    row = shuffled_questions(questions, layout_for(questions))[0]
+    assert sorted(row[4:6]) == ['no', 'yes']
+    assert row[6:8] == (None, None)
+    assert row[4 + 'ABCD'.index(row[8])] == 'no'
+
+
+@pytest.mark.parametrize('row', [
+    question(1, 'descriptive', options=(None, None, None, None), correct=None),
+    question(1, 'true_false', options=('True', 'False', None, None), correct='True'),
+    question(1, options=('only', None, None, None), correct='A'),
+    question(1, 'video_mcq', correct='C'),
+])
+def test_unshuffled_questions_keep_their_layout(row):
+    layout = layout_for([row])
+    assert shuffled_questions([row], layout)[0][4:9] == row[4:9]
+    assert layout.mapping == {'1': row[8]}
+
+
+def test_layout_is_reproducible_from_the_attempt():
+    questions = exam()
+    first = layout_for(questions)
+    again = layout_for(list(questions))
+    assert list(first.order) == list(again.order)
+    assert first.mapping == again.mapping
+
+
+def test_attempts_and_secrets_get_different_layouts():
+    questions = exam()
+    orders = {tuple(layout_for(questions, attempt_id=attempt_id).order) for attempt_id in range(1, 6)}
+    assert len(orders) == 5
+    assert list(layout_for(questions, secret='other').order) != list(layout_for(questions).order)
+
+
+def test_removing_a_question_keeps_other_option_layouts():
+    questions = exam()
+    full = layout_for(questions)
+    fewer = layout_for(questions[1:])
+    for q in questions[1:]:
+        assert full.mapping[str(q[0])] == fewer.mapping[str(q[0])]
+
+
+def test_app_refuses_to_start_without_a_stable_shuffle_secret(monkeypatch):
+    import app as ams
+    monkeypatch.setattr(ams, '_app_ready', False)
+    monkeypatch.setattr(ams, 'SHUFFLE_SECRET', None)
+    with pytest.raises(RuntimeError, match='SHUFFLE_SECRET'):
+        ams.create_app()
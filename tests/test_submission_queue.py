@@ -0,0 +1,379 @@
+import json
+import time
+
+import mysql.connector
+import pytest
+
+import app as ams
+import submission_queue
+from db_pool import ConnectionPool
+from fakes import FakeConnection, FakeDriver
+from regrade import regrade_exam
+from shuffle import SHUFFLE_VERSION, attempt_seed, shuffle_exam
+from submission_queue import ER_DUP_ENTRY, GradingWorkers, claim_submission, drain_once, submission_for_token
+
+SECRET = 'test-secret'
+STUDENT_ID, EXAM_ID, ATTEMPT_ID = 7, 1, 30
+
+
+def question(question_id, question_type='mcq', correct='A'):
+    """ATTEMPT_QUESTIONS row"""
+    return (question_id, EXAM_ID, f'Question {question_id}', question_type,
+            'w', 'x', 'y', 'z', correct, None, None)
+
+
+QUESTIONS = [question(1, correct='A'), question(2, correct='B'), question(3, 'true_false', 'True'),
+             question(4, correct='D'), question(5, 'descriptive', None)]
+
+
+class Database:
+    """The tables the grading queue touches, answered through FakeConnection"""
+
+    def __init__(self, shuffle_version=None):
+        self.submissions = {}   # submission_id -> dict row
+        self.attempts = {ATTEMPT_ID: (shuffle_version, None)}
+        self.attempt_status = {ATTEMPT_ID: 'in_progress'}
+        self.drafts = {}        # (attempt_id, question_id) -> answer
+        self.late_drafts = set()   # draft keys flushed after their attempt was submitted
+        self.performance = {}   # (student_id, exam_id) -> row
+        self.responses = []
+
+    def queue(self, answers, attempt_id=ATTEMPT_ID, student_id=STUDENT_ID):
+        submission_id = len(self.submissions) + 1
+        self.submissions[submission_id] = {
+            'student_id': student_id, 'exam_id': EXAM_ID, 'attempt_id': attempt_id,
+            'payload': json.dumps({'answers': answers}), 'status': 'queued', 'tries': 0,
+        }
+        return submission_id
+
+    def status(self, submission_id):
+        return self.submissions[submission_id]['status']
+
+    def claimed(self, fence):
+        """Rows matching status = 'grading' AND (submission_id, tries) IN (...)"""
+        pairs = zip(fence[::2], fence[1::2])
+        return [self.submissions[submission_id] for submission_id, tries in pairs
+                if self.submissions[submission_id]['status'] == 'grading'
+                and self.submissions[submission_id]['tries'] == tries]
+
+    def __call__(self, cursor, sql, params):
+        if sql.startswith('SELECT submission_id, student_id, exam_id, attempt_id, student_name, payload, tries'):
+            return [(submission_id, row['student_id'], row['exam_id'], row['attempt_id'], 'Asha', row['payload'],
+                     row['tries'])
+                    for submission_id, row in self.submissions.items() if row['status'] == 'queued'][:params[0]]
+        if sql.startswith("UPDATE exam_submissions SET status = 'grading'"):
+            for submission_id in params:
+                self.submissions[submission_id].update(status='grading')
+                self.submissions[submission_id]['tries'] += 1
+        elif sql.startswith('SELECT question_id, exam_id, question_text'):
+            return QUESTIONS
+        elif sql.startswith('SELECT attempt_id, shuffle_version, option_mapping FROM exam_attempts'):
+            return [(attempt_id,) + self.attempts[attempt_id] for attempt_id in params if attempt_id in self.attempts]
+        elif sql.startswith('SELECT d.attempt_id, d.question_id, d.answer FROM exam_drafts d'):
+            return [key + (answer,) for key, answer in self.drafts.items()
+                    if key[0] in params and key not in self.late_drafts]
+        elif sql.startswith('INSERT INTO student_responses'):
+            self.responses.extend(tuple(params[i:i + 6]) for i in range(0, len(params), 6))
+        elif sql.startswith('INSERT INTO student_performance'):
+            for i in range(0, len(params), 7):
+                row = params[i:i + 7]
+                self.performance[(row[1], row[2])] = row
+        elif sql.startswith("UPDATE exam_attempts SET status = 'submitted'"):
+            self.attempt_status.update(dict.fromkeys(params, 'submitted'))
+        elif sql.startswith("UPDATE exam_submissions SET status = 'graded'"):
+            claimed = self.claimed(params)
+            if len(claimed) == len(params) // 2:   # else _record() rolls the batch back
+                for row in claimed:
+                    row['status'] = 'graded'
+            cursor.rowcount = len(claimed)
+        elif sql.startswith("UPDATE exam_submissions SET status = 'queued', tries = 0"):
+            requeued = [row for submission_id, row in self.submissions.items()
+                        if row['status'] == 'failed' and (not params or submission_id in params)]
+            for row in requeued:
+                row.update(status='queued', tries=0)
+            cursor.rowcount = len(requeued)
+        elif sql.startswith('UPDATE exam_submissions SET status = IF'):
+            max_tries, _, *fence = params
+            for row in self.claimed(fence):
+                row['status'] = 'failed' if row['tries'] >= max_tries else 'queued'
+        return None
+
+
+def test_queued_submission_is_graded_and_recorded():
+    db = Database()
+    submission_id = db.queue({'1': 'A', '2': 'C', '3': 'True', '5': 'A long descriptive answer'})
+    db.drafts[(ATTEMPT_ID, 4)] = 'D'   # autosaved, missing from the posted form
+
+    assert drain_once(FakeConnection(db), SECRET) == (1, 0)
+    assert db.status(submission_id) == 'graded'
+    # 1, 3 and the drafted 4 are right, 2 is wrong; the descriptive question is not graded
+    assert db.performance[(STUDENT_ID, EXAM_ID)] == ['Asha', STUDENT_ID, EXAM_ID, 5, 3, 1, 75.0]
+    assert (STUDENT_ID, EXAM_ID, 2, 'C', 0, 'mcq') in db.responses
+    assert (STUDENT_ID, EXAM_ID, 5, 'A long descriptive answer', None, 'descriptive') in db.responses
+    assert drain_once(FakeConnection(db), SECRET) == (0, 0)
+
+
+def test_posted_answers_are_authoritative_over_drafts():
+    db = Database()
+    db.queue({'1': 'A', '2': ''})
+    db.drafts[(ATTEMPT_ID, 1)] = 'B'   # older autosave of an answer the student changed
+    db.drafts[(ATTEMPT_ID, 2)] = 'B'   # autosave of an answer the student then cleared
+    db.drafts[(ATTEMPT_ID, 3)] = 'True'
+    db.late_drafts.add((ATTEMPT_ID, 3))   # flushed by another web worker after the submit
+
+    assert drain_once(FakeConnection(db), SECRET) == (1, 0)
+    responses = {row[2]: row[3] for row in db.responses}
+    assert (responses[1], responses[2], responses[3]) == ('A', None, None)
+    assert db.performance[(STUDENT_ID, EXAM_ID)][4] == 1
+
+
+def test_shuffled_attempt_is_graded_against_the_layout_it_showed():
+    db = Database(shuffle_version=SHUFFLE_VERSION)
+    mapping = shuffle_exam(QUESTIONS, attempt_seed(STUDENT_ID, EXAM_ID, ATTEMPT_ID, SECRET)).mapping
+    db.queue({str(q[0]): mapping[str(q[0])] for q in QUESTIONS[:4]})
+
+    assert drain_once(FakeConnection(db), SECRET) == (1, 0)
+    assert db.performance[(STUDENT_ID, EXAM_ID)][-1] == 100.0
+
+
+def test_submission_that_cannot_be_graded_is_requeued_then_failed(monkeypatch):
+    monkeypatch.setattr(submission_queue, 'GRADING_MAX_TRIES', 2)
+    db = Database()
+    submission_id = db.queue({'1': 'A'})
+    db.submissions[submission_id]['payload'] = json.dumps({'answers': ['A']})   # malformed
+    graded_id = db.queue({'1': 'A'}, student_id=8)
+
+    assert drain_once(FakeConnection(db), SECRET) == (1, 1)
+    assert db.status(graded_id) == 'graded'
+    assert db.status(submission_id) == 'queued'
+    assert drain_once(FakeConnection(db), SECRET) == (0, 1)
+    assert db.status(submission_id) == 'failed'
+    assert drain_once(FakeConnection(db), SECRET) == (0, 0)   # failed for good until requeued
+
+
+def test_admin_requeues_a_failed_submission(monkeypatch):
+    db = Database()
+    failed_id = db.queue({'1': 'A'})
+    other_failed_id = db.queue({'1': 'B'}, student_id=8)
+    for submission_id in (failed_id, other_failed_id):
+        db.submissions[submission_id].update(status='failed', tries=3)
+    pool = ConnectionPool('test', {}, size=1, prewarm=0, driver=FakeDriver(db))
+    monkeypatch.setattr(ams, 'get_pool', lambda name='primary': pool)
+    woken = []
+    monkeypatch.setattr(ams.grading_workers, 'wake', lambda: woken.append(1))
+
+    with ams.app.test_request_context('/admin/grading_queue/requeue', method='POST',
+                                      data={'submission_id': str(failed_id)}):
+        ams.session['admin_username'] = 'admin'
+        response = ams.requeue_failed_submissions()
+
+    assert response.get_json() == {'success': True, 'requeued': 1}
+    assert woken == [1]
+    assert (db.status(failed_id), db.submissions[failed_id]['tries']) == ('queued', 0)
+    assert db.status(other_failed_id) == 'failed'
+    assert drain_once(FakeConnection(db), SECRET) == (1, 0)
+    assert db.status(failed_id) == 'graded'
+    assert pool.stats()['in_use'] == 0
+
+
+def test_claim_taken_over_by_another_worker_is_not_recorded_twice():
+    db = Database()
+    slow_id = db.queue({'1': 'A'})
+    other_id = db.queue({'1': 'B'}, student_id=8)
+
+    def stall_then_lose_claim(cursor, sql, params):
+        if sql.startswith('SELECT d.attempt_id, d.question_id, d.answer FROM exam_drafts d'):
+            # While this worker stalls, its claim on slow_id times out and another worker re-claims it
+            db.submissions[slow_id]['tries'] += 1
+        return db(cursor, sql, params)
+
+    assert drain_once(FakeConnection(stall_then_lose_claim), SECRET) == (1, 0)
+    assert db.status(slow_id) == 'grading'    # still the other worker's
+    assert db.status(other_id) == 'graded'
+    assert {row[:2] for row in db.responses} == {(8, EXAM_ID)}
+    assert list(db.performance) == [(8, EXAM_ID)]
+
+
+def test_queue_graded_attempt_is_found_by_regrade():
+    db = Database(shuffle_version=SHUFFLE_VERSION)
+    mapping = shuffle_exam(QUESTIONS, attempt_seed(STUDENT_ID, EXAM_ID, ATTEMPT_ID, SECRET)).mapping
+    db.queue({'1': mapping['1'], '2': mapping['2']})
+    drain_once(FakeConnection(db), SECRET)
+    assert db.attempt_status[ATTEMPT_ID] == 'submitted'
+
+    def regrade_reads(cursor, sql, params):
+        if sql.startswith('SELECT p.student_id, p.total_questions, p.correct_answers, MAX(a.attempt_id)'):
+            shuffle_version, exam_id = params
+            return [(row[1], row[3], row[4], max((attempt_id for attempt_id, status in db.attempt_status.items()
+                                                  if status == 'submitted'
+                                                  and db.attempts[attempt_id][0] == shuffle_version), default=None))
+                    for row in db.performance.values() if row[2] == exam_id]
+        if sql.startswith('SELECT student_id, question_id, selected_option, is_correct FROM student_responses'):
+            return [(row[0], row[2], row[3], row[4]) for row in db.responses]
+        return db(cursor, sql, params)
+
+    report = regrade_exam(FakeConnection(regrade_reads), EXAM_ID, SECRET)
+    assert (report.students, report.skipped_students) == (1, 0)
+    assert (report.changed_responses, report.changed_scores) == (0, 0)
+
+
+def test_grading_workers_drain_the_queue_in_the_background():
+    db = Database()
+    submission_ids = [db.queue({'1': 'A'}, student_id=student_id) for student_id in (7, 8, 9)]
+    connections = []
+
+    def get_connection():
+        connections.append(FakeConnection(db))
+        return connections[-1]
+
+    workers = GradingWorkers()
+    workers.start(get_connection, SECRET, count=1)
+    try:
+        workers.wake()
+        deadline = time.monotonic() + 2
+        while workers.stats()['graded'] < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        workers._running = False
+        workers.wake()
+
+    assert [db.status(submission_id) for submission_id in submission_ids] == ['graded'] * 3
+    assert len(db.performance) == 3
+    assert all(conn.closed for conn in connections[:-1])
+
+
+def test_queued_submission_counts_as_taken(monkeypatch):
+    def handler(cursor, sql, params):
+        # No student_performance row yet, only the queued submission
+        if sql.startswith('SELECT performance_id') and 'FROM exam_submissions' in sql:
+            assert params == (STUDENT_ID, EXAM_ID) * 2
+            return [(None, None, '2026-01-05 10:00:00')]
+        return None
+
+    pool = ConnectionPool('test', {}, size=1, prewarm=0, driver=FakeDriver(handler))
+    monkeypatch.setattr(ams, 'get_pool', lambda name='primary': pool)
+    with ams.app.test_request_context(f'/student/exam/{EXAM_ID}'):
+        ams.session['student_id'] = STUDENT_ID
+        response = ams.attempt_exam(EXAM_ID)
+        flashes = ams.session.get('_flashes', [])
+
+    assert response.status_code == 302
+    assert ('warning', 'You have already taken this exam!') in flashes
+    assert pool.stats()['in_use'] == 0
+
+
+class Claims:
+    """exam_attempts tokens and the unique keys of exam_submissions"""
+
+    def __init__(self):
+        self.attempts = {'tok-1': (ATTEMPT_ID, STUDENT_ID, EXAM_ID), 'tok-2': (ATTEMPT_ID + 1, STUDENT_ID, EXAM_ID),
+                         'tok-other': (ATTEMPT_ID + 2, 8, EXAM_ID)}
+        self.submissions = []   # (submission_token, student_id, exam_id)
+        self.inserts = 0
+
+    def __call__(self, cursor, sql, params):
+        if sql.startswith('INSERT INTO exam_submissions') and 'FROM exam_attempts' in sql:
+            self.inserts += 1
+            token, student_id, exam_id = params[2:]
+            if self.attempts.get(token, (None,))[1:] != (student_id, exam_id):
+                cursor.rowcount = 0
+                return None
+            if any(row[0] == token or row[1:] == (student_id, exam_id) for row in self.submissions):
+                raise mysql.connector.IntegrityError(msg='Duplicate entry', errno=ER_DUP_ENTRY)
+            self.submissions.append((token, student_id, exam_id))
+            cursor.rowcount, cursor.lastrowid = 1, len(self.submissions)
+        elif sql.startswith('SELECT exam_id FROM exam_submissions WHERE submission_token'):
+            token, student_id = params
+            return [(row[2],) for row in self.submissions if row[:2] == (token, student_id)]
+        elif sql.startswith('SELECT exam_title, time_limit, end_datetime FROM exam'):
+            return [('Physics Midterm', 60, None)]
+        return None
+
+
+def test_token_is_claimed_once():
+    claims = Claims()
+    cursor = FakeConnection(claims).cursor()
+
+    assert claim_submission(cursor, STUDENT_ID, 'Asha', EXAM_ID, 'tok-1', {1: 'A'}) == 1
+    with pytest.raises(mysql.connector.IntegrityError) as dup:
+        claim_submission(cursor, STUDENT_ID, 'Asha', EXAM_ID, 'tok-1', {1: 'B'})
+    assert dup.value.errno == ER_DUP_ENTRY
+    assert submission_for_token(cursor, STUDENT_ID, 'tok-1') == EXAM_ID
+    assert len(claims.submissions) == 1
+
+
+def test_token_of_another_attempt_claims_nothing():
+    claims = Claims()
+    cursor = FakeConnection(claims).cursor()
+
+    assert claim_submission(cursor, STUDENT_ID, 'Asha', EXAM_ID, 'tok-other', {1: 'A'}) is None
+    assert claim_submission(cursor, STUDENT_ID, 'Asha', EXAM_ID + 1, 'tok-1', {1: 'A'}) is None
+    assert claim_submission(cursor, STUDENT_ID, 'Asha', EXAM_ID, 'forged', {1: 'A'}) is None
+    assert claims.submissions == []
+    assert submission_for_token(cursor, STUDENT_ID, 'tok-other') is None
+
+
+@pytest.fixture
+def claims(monkeypatch):
+    claims = Claims()
+    pool = ConnectionPool('test', {}, size=1, prewarm=0, driver=FakeDriver(claims))
+    monkeypatch.setattr(ams, 'get_pool', lambda name='primary': pool)
+    monkeypatch.setattr(ams.grading_workers, 'wake', lambda: None)
+    yield claims
+    assert pool.stats()['in_use'] == 0
+
+
+def submit(token):
+    with ams.app.test_request_context(f'/student/exam/{EXAM_ID}/submit', method='POST',
+                                      data={'submission_token': token, 'answer_1': 'A'}):
+        ams.session['student_id'] = STUDENT_ID
+        response = ams.submit_exam(EXAM_ID)
+        return response.status_code, response.location, ams.session.get('_flashes', [])
+
+
+def url_for(endpoint, **values):
+    with ams.app.test_request_context():
+        return ams.url_for(endpoint, **values)
+
+
+def test_retried_submit_is_answered_without_queueing_again(claims):
+    first = submit('tok-1')
+    retry = submit('tok-1')
+
+    assert first == retry == (302, url_for('exam_result', exam_id=EXAM_ID), [])
+    assert claims.submissions == [('tok-1', STUDENT_ID, EXAM_ID)]
+    assert claims.inserts == 1   # the retry took the fast path
+
+
+def test_second_attempt_at_a_submitted_exam_is_refused(claims):
+    submit('tok-1')
+    status, location, flashes = submit('tok-2')
+
+    assert (status, location) == (302, url_for('student_dashboard'))
+    assert ('warning', 'You have already submitted this exam!') in flashes
+    assert len(claims.submissions) == 1
+
+
+def test_dashboard_shows_submitted_exams_as_grading(monkeypatch):
+    # Exam 1 graded, 2 queued, 3 failed to grade, 4 not taken
+    exams = [(exam_id, f'Exam {exam_id}', 'Physics', 'All Courses', None, None, None) for exam_id in (1, 2, 3, 4)]
+
+    def handler(cursor, sql, params):
+        if sql.startswith('SELECT e.exam_id, e.exam_title'):
+            return exams
+        if sql.startswith('SELECT exam_id, NULL FROM student_performance'):
+            assert params == (STUDENT_ID, STUDENT_ID)
+            return [(1, None), (2, 'queued'), (3, 'failed')]
+        return None
+
+    pool = ConnectionPool('test', {}, size=1, prewarm=0, driver=FakeDriver(handler))
+    monkeypatch.setattr(ams, 'get_pool', lambda name='primary': pool)
+    rendered = {}
+    monkeypatch.setattr(ams, 'render_template', lambda template, **context: rendered.update(context) or '')
+    with ams.app.test_request_context('/student-dashboard'):
+        ams.session['student_id'] = STUDENT_ID
+        ams.student_dashboard()
+
+    assert [exam['exam_id'] for exam in rendered['available_exams']] == [4]
+    assert [(exam['exam_id'], exam['status']) for exam in rendered['grading_exams']] == [(2, 'queued'), (3, 'failed')]
+    assert rendered['taken_exams'] == [1, 2, 3]
@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Replays the eventlet worker's boot order in a fresh interpreter:
+# post_fork -> EventletWorker.patch() (new hub) -> post_worker_init -> run loop
+WORKER_BOOT = textwrap.dedent("""
+    import runpy
+    import eventlet
+    from eventlet import hubs
+
+    conf = runpy.run_path('gunicorn.conf.py')   # monkey-patches, like the master
+    import app
+
+    started = []
+    spawn = app.socketio.start_background_task
+
+    def recording_spawn(target, *args, **kwargs):
+        name = getattr(target, '__qualname__', repr(target))
+        return spawn(lambda *a, **kw: started.append(name), *args, **kwargs)
+
+    app.socketio.start_background_task = recording_spawn
+    app.init_pool = lambda *args, **kwargs: None
+
+    class Log:
+        def info(self, *args):
+            pass
+
+    class Worker:
+        pid = 1
+        log = Log()
+
+    conf['post_fork'](Worker(), Worker())
+    hubs.use_hub()
+    eventlet.monkey_patch()
+    conf['post_worker_init'](Worker())
+    eventlet.sleep(0.2)
+    print(sorted(set(started)))
+""")
+
+
+def test_background_tasks_run_after_worker_hub_is_installed():
+    env = dict(os.environ, GUNICORN_WORKER_CLASS='eventlet', GRADING_WORKERS='1', PROCTOR_PROCESSES='0')
+    result = subprocess.run([sys.executable, '-c', WORKER_BOOT], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    started = result.stdout.strip().splitlines()[-1]
+    for task in ('DraftBuffer.start', 'GradingWorkers._run', 'ExamPrewarmer._run', 'ProctorPool._deliver'):
+        assert task in started